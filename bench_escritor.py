@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark do escritor em grupo (modules.db.EscritorBanco)
+
+Vários caixas gravando vendas ao mesmo tempo no mesmo banco: compara uma
+transação por venda (db.transacao) com o commit em grupo do escritor, para
+algumas janelas de latência. Mostra vendas/s e a latência de cada venda
+(do pedido até o commit), com o perfil "seguro" (fsync a cada commit).
+
+Uso: python bench_escritor.py [vendas_por_caixa] [numero_de_caixas]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import random
+import statistics
+import tempfile
+import threading
+import time
+from modules import db
+from modules.vendas import gravar_venda
+
+NUMERO_PRODUTOS = 1000
+LATENCIAS = (0.0, 0.002, 0.005, 0.010)
+
+
+def popular_produtos(quantidade):
+    with db.transacao() as conn:
+        conn.executemany(
+            "INSERT INTO produtos (nome, categoria, quantidade, preco_custo, preco_venda) VALUES (?, 'Outros', 1000000, 100, 990)",
+            [(f"Produto {i}",) for i in range(quantidade)])
+
+
+def montar_carrinho():
+    return [(random.randint(1, NUMERO_PRODUTOS), random.randint(1, 3), 990) for _ in range(random.randint(1, 8))]
+
+
+def direto(carrinho):
+    with db.transacao(imediata=True) as conn:
+        gravar_venda(conn, carrinho)
+
+
+def executar(gravar, vendas, caixas):
+    """Cada caixa grava ``vendas`` vendas; retorna (duração, latências em ms)"""
+    latencias = []
+
+    def caixa():
+        carrinhos = [montar_carrinho() for _ in range(vendas)]
+        tempos = []
+        for carrinho in carrinhos:
+            inicio = time.perf_counter()
+            gravar(carrinho)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        latencias.extend(tempos)
+
+    threads = [threading.Thread(target=caixa) for _ in range(caixas)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - inicio, sorted(latencias)
+
+
+def mostrar(nome, vendas, duracao, latencias, lotes=""):
+    p99 = latencias[int(len(latencias) * 0.99) - 1]
+    print(f"{nome:<18}{vendas / duracao:>10.0f}{statistics.median(latencias):>10.2f}"
+          f"{p99:>10.2f}{latencias[-1]:>10.2f}{lotes:>10}")
+
+
+def main():
+    vendas = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    caixas = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    with tempfile.TemporaryDirectory() as pasta:
+        pool = db.configurar_banco(os.path.join(pasta, "bench.sqlite3"), tamanho_pool=caixas + 1,
+                                   perfil="seguro")
+        db.criar_tabelas()
+        popular_produtos(NUMERO_PRODUTOS)
+
+        print(f"{caixas} caixas x {vendas} vendas, perfil seguro")
+        print(f"{'':<18}{'vendas/s':>10}{'mediana':>10}{'p99':>10}{'máx':>10}{'por lote':>10}  (latência em ms)")
+        duracao, latencias = executar(direto, vendas, caixas)
+        mostrar("uma por commit", vendas * caixas, duracao, latencias)
+
+        for latencia in LATENCIAS:
+            escritor = db.EscritorBanco(pool, latencia=latencia).iniciar()
+            duracao, latencias = executar(
+                lambda carrinho: escritor.executar(gravar_venda, carrinho), vendas, caixas)
+            escritor.parar()
+            lotes = f"{escritor.estatisticas()['trabalhos_por_lote']:.1f}"
+            mostrar(f"grupo {latencia * 1000:.0f} ms", vendas * caixas, duracao, latencias, lotes)
+        db.fechar_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark da fila de impressão de cupons (utils.impressora)
+
+Compara o tempo que o caixa fica parado em cada venda imprimindo direto
+na impressora com o tempo de apenas enfileirar o cupom, usando uma
+impressora simulada lenta (arquivo + espera por cupom).
+
+Uso: python bench_impressora.py [cupons] [ms_por_cupom]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import statistics
+import tempfile
+import time
+from utils.impressora import Cupom, FilaImpressao, ImpressoraSimulada, ItemCupom, renderizar_cupom
+
+
+def montar_cupom(venda_id, linhas=15):
+    itens = [ItemCupom(f"Produto {i}", 1 + i % 3, 990, (1 + i % 3) * 990) for i in range(linhas)]
+    return Cupom(venda_id, "10/03/2025 09:00", itens, sum(item.subtotal for item in itens))
+
+
+def percentis(tempos):
+    tempos = sorted(tempos)
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.99) - 1], tempos[-1]
+
+
+def main():
+    cupons = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    ms_por_cupom = float(sys.argv[2]) if len(sys.argv) > 2 else 20.0
+    with tempfile.TemporaryDirectory() as pasta:
+        impressora = ImpressoraSimulada(os.path.join(pasta, "impressora.bin"), ms_por_cupom / 1000)
+
+        # Impressão direta: o caixa espera a impressora a cada venda
+        tempos_diretos = []
+        for venda_id in range(cupons):
+            inicio = time.perf_counter()
+            impressora.enviar(renderizar_cupom(montar_cupom(venda_id)))
+            tempos_diretos.append((time.perf_counter() - inicio) * 1000)
+
+        # Fila: o caixa só grava o trabalho na pasta da fila
+        fila = FilaImpressao(impressora, os.path.join(pasta, "fila")).iniciar()
+        tempos_fila = []
+        inicio_total = time.perf_counter()
+        for venda_id in range(cupons):
+            inicio = time.perf_counter()
+            fila.enfileirar(montar_cupom(venda_id))
+            tempos_fila.append((time.perf_counter() - inicio) * 1000)
+        fila.aguardar()
+        total = time.perf_counter() - inicio_total
+        fila.parar()
+
+    print(f"{cupons} cupons, impressora com {ms_por_cupom:.0f} ms por cupom")
+    print(f"{'':<12}{'mediana':>10}{'p99':>10}{'máx':>10}  (ms que o caixa fica parado)")
+    for nome, tempos in (("direto", tempos_diretos), ("fila", tempos_fila)):
+        mediana, p99, maximo = percentis(tempos)
+        print(f"{nome:<12}{mediana:>10.3f}{p99:>10.3f}{maximo:>10.3f}")
+    print(f"fila esvaziada em {total:.2f} s ({cupons / total:.0f} cupons/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos perfis de PRAGMA do banco (modules.db.PERFIS_PRAGMA)
+
+Para cada perfil mede:
+- escritas/s: uma venda por transação (como finalizar_venda)
+- leituras/s: consultas pontuais por id
+- leituras/s concorrentes: consultas de resumo enquanto outra thread escreve
+
+Uso: python bench_pragmas.py [numero_de_vendas]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import random
+import tempfile
+import threading
+import time
+from modules import db
+
+
+def preparar_banco(caminho, perfil):
+    conn = db.conectar(caminho, perfil)
+    db.aplicar_perfil(conn, perfil)
+    conn.execute("CREATE TABLE vendas (id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL, total INTEGER NOT NULL)")
+    conn.commit()
+    return conn
+
+
+def medir_escritas(conn, quantidade):
+    inicio = time.perf_counter()
+    for i in range(quantidade):
+        with conn:
+            conn.execute("INSERT INTO vendas (data, total) VALUES (datetime('now'), ?)", (i * 150,))
+    return quantidade / (time.perf_counter() - inicio)
+
+
+def medir_leituras(conn, quantidade, maximo_id):
+    ids = [random.randint(1, maximo_id) for _ in range(quantidade)]
+    inicio = time.perf_counter()
+    for venda_id in ids:
+        conn.execute("SELECT total FROM vendas WHERE id = ?", (venda_id,)).fetchone()
+    return quantidade / (time.perf_counter() - inicio)
+
+
+def medir_concorrencia(caminho, perfil, quantidade):
+    """Leituras de resumo por segundo enquanto uma thread grava vendas"""
+    parar = threading.Event()
+    leituras = [0]
+
+    def leitor():
+        conn = db.conectar(caminho, perfil)
+        while not parar.is_set():
+            conn.execute("SELECT COALESCE(SUM(total), 0) FROM vendas WHERE id > (SELECT MAX(id) - 100 FROM vendas)").fetchone()
+            leituras[0] += 1
+        conn.close()
+
+    escritor_conn = db.conectar(caminho, perfil)
+    thread = threading.Thread(target=leitor)
+    thread.start()
+    inicio = time.perf_counter()
+    medir_escritas(escritor_conn, quantidade)
+    duracao = time.perf_counter() - inicio
+    parar.set()
+    thread.join()
+    escritor_conn.close()
+    return leituras[0] / duracao
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{'perfil':<16}{'escritas/s':>14}{'leituras/s':>14}{'leit. concorr./s':>18}")
+    for perfil in db.PERFIS_PRAGMA:
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, "bench.sqlite3")
+            conn = preparar_banco(caminho, perfil)
+            escritas = medir_escritas(conn, quantidade)
+            leituras = medir_leituras(conn, quantidade * 5, quantidade)
+            conn.close()
+            concorrentes = medir_concorrencia(caminho, perfil, quantidade // 2)
+        print(f"{perfil:<16}{escritas:>14.0f}{leituras:>14.0f}{concorrentes:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos relatórios de vendas (modules.relatorios)
+
+Para cada tamanho, gera um banco com N vendas (2 itens cada, datas em dois
+anos) e mede a carga em arrays NumPy (período completo e últimos 30 dias)
+e a latência de cada relatório sobre os arrays já carregados. Para
+comparação, mede também a receita por dia somada em um laço Python. Por
+fim mede o CacheRelatorios: primeira abertura, reabertura sem vendas
+novas e reabertura depois de uma venda no dia (só o mês corrente é relido).
+
+Uso: python bench_relatorios.py [vendas ...]   (padrão: 1000000 10000000)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from modules import db
+from modules.relatorios import RELATORIOS, CacheRelatorios, carregar_vendas
+from modules.vendas import registrar_venda
+
+NUMERO_PRODUTOS = 5000
+DIAS = 730
+REPETICOES = 5
+
+
+def popular(vendas):
+    """Gera vendas e itens direto no SQLite (CTE recursiva, sem laço Python)"""
+    with db.transacao() as conn:
+        conn.execute(f"""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {NUMERO_PRODUTOS})
+            INSERT INTO produtos (nome, categoria, quantidade, preco_custo, preco_venda)
+            SELECT 'Produto ' || i, 'Categoria ' || (i % 12), 1000, 100 * (1 + i % 50), 100 * (2 + i % 50) FROM n
+        """)
+        conn.execute(f"""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {vendas})
+            INSERT INTO vendas (data, total)
+            SELECT DATETIME('now', '-' || (abs(random()) % {DIAS * 86400}) || ' seconds'),
+                   abs(random()) % 20000
+            FROM n
+        """)
+        conn.execute(f"""
+            INSERT INTO venda_itens (venda_id, produto_id, quantidade, preco_unitario, subtotal)
+            SELECT v.id, abs(random()) % {NUMERO_PRODUTOS} + 1, 1 + abs(random()) % 4, 500, 1000
+            FROM vendas v, (SELECT 1 UNION ALL SELECT 2)
+        """)
+
+
+def medir(funcao, repeticoes=REPETICOES):
+    """Mediana em milissegundos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def receita_por_dia_em_python(dados):
+    receitas = defaultdict(int)
+    for dia, total in dados.vendas.tolist():
+        receitas[dia] += total
+    return receitas
+
+
+def main():
+    tamanhos = [int(arg) for arg in sys.argv[1:]] or [1_000_000, 10_000_000]
+    for vendas in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            db.configurar_banco(os.path.join(pasta, "bench.sqlite3"))
+            try:
+                db.criar_tabelas()
+                inicio = time.perf_counter()
+                popular(vendas)
+                print(f"\n{vendas} vendas / {2 * vendas} itens (gerados em {time.perf_counter() - inicio:.1f} s)")
+
+                inicio = time.perf_counter()
+                dados = carregar_vendas()
+                print(f"{'carga completa':<24}{(time.perf_counter() - inicio) * 1000:>12.1f} ms")
+                mes = (date.today() - timedelta(days=30)).isoformat()
+                print(f"{'carga últimos 30 dias':<24}{medir(lambda: carregar_vendas(mes)):>12.1f} ms")
+
+                for nome, relatorio in RELATORIOS.items():
+                    print(f"{nome:<24}{medir(lambda: relatorio(dados)):>12.1f} ms")
+                print(f"{'receita/dia (laço)':<24}{medir(lambda: receita_por_dia_em_python(dados), 1):>12.1f} ms")
+                del dados
+
+                cache = CacheRelatorios(limite_bytes=4 * 1024 ** 3)
+                print(f"{'cache: 1ª abertura':<24}{medir(cache.relatorio, 1):>12.1f} ms")
+                print(f"{'cache: reabertura':<24}{medir(cache.relatorio):>12.1f} ms")
+                registrar_venda([(1, 1, 1000)])
+                print(f"{'cache: após venda':<24}{medir(cache.relatorio, 1):>12.1f} ms")
+                print(f"{'cache: taxa de acerto':<24}{cache.estatisticas().taxa_acerto:>12.0%}")
+            finally:
+                db.fechar_pool()
+
+
+if __name__ == "__main__":
+    main()
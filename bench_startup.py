@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de inicialização (cold start) até a tela de login
+
+Executa ``python -X importtime`` em processos novos importando o módulo do
+login, soma o tempo cumulativo de importação e verifica que nenhuma
+dependência pesada das outras telas é carregada antes do login.
+Termina com código 1 se o tempo passar do orçamento ou se algum módulo
+proibido aparecer, para ser usado como verificação antes de publicar.
+
+Uso: python bench_startup.py [orcamento_ms] [repeticoes]
+"""
+
+import sys
+import os
+import subprocess
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+MODULO_INICIAL = "modules.login"
+
+# Carregados sob demanda pelo registro de módulos do dashboard. (PIL não
+# entra na lista: o próprio customtkinter o importa para CTkImage.)
+MODULOS_PROIBIDOS = (
+    "ui.dashbord",
+    "modules.vendas",
+    "modules.estoque",
+    "modules.relatorios",
+    "numpy",
+)
+
+ORCAMENTO_PADRAO_MS = 400.0
+
+
+def medir_importacao(modulo=MODULO_INICIAL):
+    """Importa ``modulo`` em um processo novo.
+
+    Retorna (tempo cumulativo em ms, conjunto de módulos importados).
+    """
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ, capture_output=True, text=True, check=True)
+
+    importados = set()
+    cumulativo_us = 0
+    for linha in resultado.stderr.splitlines():
+        # Formato: "import time: self [us] | cumulative | imported package"
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, cumulativo, nome = linha.split("|")
+        nome_limpo = nome.strip()
+        if not cumulativo.strip().isdigit():
+            continue  # cabeçalho da tabela
+        importados.add(nome_limpo)
+        # Importações de nível superior têm recuo de um único espaço
+        # (as aninhadas já estão somadas no cumulativo delas)
+        if len(nome) - len(nome.lstrip(" ")) == 1:
+            cumulativo_us += int(cumulativo.strip())
+    return cumulativo_us / 1000, importados
+
+
+def main():
+    orcamento = float(sys.argv[1]) if len(sys.argv) > 1 else ORCAMENTO_PADRAO_MS
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    tempos = []
+    importados = set()
+    for _ in range(repeticoes):
+        tempo, importados = medir_importacao()
+        tempos.append(tempo)
+    tempos.sort()
+    mediana = tempos[len(tempos) // 2]
+
+    print(f"Importação de {MODULO_INICIAL}: mediana {mediana:.1f} ms "
+          f"(mín {tempos[0]:.1f} ms, máx {tempos[-1]:.1f} ms, orçamento {orcamento:.0f} ms)")
+
+    falhas = []
+    carregados = [m for m in MODULOS_PROIBIDOS if m in importados]
+    if carregados:
+        falhas.append(f"módulos carregados antes do login: {', '.join(carregados)}")
+    if mediana > orcamento:
+        falhas.append(f"tempo acima do orçamento ({mediana:.1f} ms > {orcamento:.0f} ms)")
+
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark da validação de produtos (modules.validacao)
+
+Gera N linhas de planilha (CSV: todos os valores são texto, com 2% de
+linhas inválidas) e mede linhas/s validando linha a linha com
+preparar_produto e coluna a coluna com preparar_lote, em blocos do
+tamanho usado pela importação. Meta: 100 mil linhas/s no modo em lote.
+
+Uso: python bench_validacao.py [linhas]   (padrão: 200000)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import random
+import time
+from modules.importacao import TAMANHO_LOTE
+from modules.validacao import preparar_lote, preparar_produto
+
+CAMPOS = ["nome", "categoria", "codigo_barras", "quantidade", "estoque_minimo",
+          "preco_custo", "preco_venda", "localizacao", None]
+CATEGORIAS = ["Alimentação", "Bebidas", "Limpeza", "Higiene", "Outros"]
+META = 100_000
+
+
+def gerar_linhas(total, semente=42):
+    aleatorio = random.Random(semente)
+    linhas = []
+    for i in range(total):
+        custo = aleatorio.randint(50, 50_000)
+        venda = custo + aleatorio.randint(0, custo)
+        linha = [f"Produto {i}", aleatorio.choice(CATEGORIAS), str(7890000000000 + i),
+                 str(aleatorio.randint(0, 500)), str(aleatorio.randint(0, 20)),
+                 f"{custo // 100},{custo % 100:02d}", f"{venda // 100},{venda % 100:02d}",
+                 f"Prateleira {aleatorio.choice('ABCDE')}-{aleatorio.randint(1, 9)}", "x"]
+        if aleatorio.random() < 0.02:
+            linha[aleatorio.choice((0, 2, 3, 5))] = "?"
+        linhas.append(linha)
+    return linhas
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    linhas = gerar_linhas(total)
+
+    inicio = time.perf_counter()
+    por_linha = [preparar_produto({campo: valor for campo, valor in zip(CAMPOS, linha) if campo})
+                 for linha in linhas]
+    segundos_linha = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    validas = rejeitadas = 0
+    for i in range(0, total, TAMANHO_LOTE):
+        boas, ruins = preparar_lote(CAMPOS, linhas[i:i + TAMANHO_LOTE])
+        validas += len(boas)
+        rejeitadas += len(ruins)
+    segundos_lote = time.perf_counter() - inicio
+
+    assert validas == sum(not erros for _, erros in por_linha)
+    print(f"{total} linhas, {rejeitadas} inválidas, blocos de {TAMANHO_LOTE}")
+    for nome, segundos in (("linha a linha", segundos_linha), ("em lote", segundos_lote)):
+        print(f"{nome:<15}{segundos:>8.3f} s{total / segundos:>12,.0f} linhas/s")
+    velocidade = total / segundos_lote
+    print(f"meta de {META:,} linhas/s: {'ok' if velocidade >= META else 'NÃO ATINGIDA'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark do registro de vendas (modules.vendas.registrar_venda)
+
+Mede vendas/s e itens/s para carrinhos de 1 a 200 linhas, com um caixa e
+com vários caixas gravando ao mesmo tempo no mesmo banco.
+
+Uso: python bench_vendas.py [vendas_por_cenario] [numero_de_caixas]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import random
+import tempfile
+import threading
+import time
+from modules import db
+from modules.vendas import registrar_venda
+
+TAMANHOS_CARRINHO = (1, 10, 50, 100, 200)
+NUMERO_PRODUTOS = 5000
+
+
+def popular_produtos(quantidade):
+    with db.transacao() as conn:
+        conn.executemany(
+            "INSERT INTO produtos (nome, categoria, quantidade, preco_custo, preco_venda) VALUES (?, 'Outros', 1000000, 100, ?)",
+            [(f"Produto {i}", random.randint(100, 10000)) for i in range(quantidade)])
+
+
+def montar_carrinho(linhas):
+    return [(random.randint(1, NUMERO_PRODUTOS), random.randint(1, 5), 990) for _ in range(linhas)]
+
+
+def executar(vendas, linhas, caixas):
+    """Distribui ``vendas`` entre ``caixas`` threads e retorna o tempo total"""
+    carrinhos = [montar_carrinho(linhas) for _ in range(vendas)]
+    fatias = [carrinhos[i::caixas] for i in range(caixas)]
+
+    def caixa(fatia):
+        for carrinho in fatia:
+            registrar_venda(carrinho)
+
+    threads = [threading.Thread(target=caixa, args=(fatia,)) for fatia in fatias]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - inicio
+
+
+def main():
+    vendas = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    caixas = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "bench.sqlite3"), tamanho_pool=caixas)
+        db.criar_tabelas()
+        popular_produtos(NUMERO_PRODUTOS)
+
+        print(f"{'linhas':>8}{'caixas':>8}{'vendas/s':>12}{'itens/s':>12}")
+        for linhas in TAMANHOS_CARRINHO:
+            for threads in (1, caixas):
+                duracao = executar(vendas, linhas, threads)
+                print(f"{linhas:>8}{threads:>8}{vendas / duracao:>12.0f}{vendas * linhas / duracao:>12.0f}")
+        db.fechar_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Verificação dos planos de consulta (EXPLAIN QUERY PLAN) do PDV
+
+Roda EXPLAIN QUERY PLAN sobre as consultas conhecidas da aplicação e aponta
+as que varrem uma tabela inteira ("SCAN tabela" sem índice, ou uma faixa
+aberta do índice enquanto o filtro seletivo está em outra coluna). Sem
+argumentos, usa um banco temporário criado pelas migrações, ou seja, o
+esquema que será publicado; com um caminho, analisa aquele banco (sem
+migrá-lo).
+Termina com código 1 se alguma consulta não permitida fizer varredura
+completa, para ser usado como verificação antes de publicar.
+
+Uso: python check_indices.py [caminho_do_banco]
+"""
+
+import sys
+import os
+import re
+import sqlite3
+import tempfile
+from collections import namedtuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from modules import db, catalogo, exportacao, produtos, relatorios, vendas
+
+# varredura_permitida: a consulta precisa mesmo ler a tabela toda
+Consulta = namedtuple("Consulta", "nome sql parametros varredura_permitida")
+Analise = namedtuple("Analise", "consulta plano varreduras ordenacoes")
+
+# Busca numa faixa só com limite inferior: "(rowid>?)", "(nome>=?)"
+_FAIXA_ABERTA = re.compile(
+    r"SEARCH \w+(?: AS \w+)? USING (?:INTEGER PRIMARY KEY|(?:COVERING )?INDEX \w+) \((\w+)>=?\?\)$")
+# Coluna comparada com um parâmetro ("v.data >= ?", "data < DATE(?, ...)");
+# comparações de tuplas da paginação ("(nome, id) > (?, ?)") não entram
+_FILTRO = re.compile(r"\b(?:\w+\.)?(\w+)\s*(?:=|>=|<=|>|<|BETWEEN|LIKE)\s*(?:\?|\w+\(\?)", re.IGNORECASE)
+
+
+def _pagina(nome, **filtros):
+    sql, parametros, _ = produtos.consulta_pagina(**filtros)
+    return Consulta(f"grade: {nome}", sql, parametros, False)
+
+
+def consultas_conhecidas(conn):
+    """Consultas da aplicação, com parâmetros de exemplo.
+
+    ``conn`` é usada pelas consultas montadas a partir do banco (exportação).
+    """
+    hoje = ("2024-06-01", "2024-06-30")
+    lista = [
+        # Login e dashboard
+        Consulta("login", "SELECT * FROM usuarios WHERE nome=? AND senha=?", ("admin", "1234"), False),
+        Consulta("dashboard: vendas de hoje", """
+            SELECT COALESCE(SUM(total), 0) FROM vendas_resumo_diario
+            WHERE dia = DATE('now', 'localtime')
+        """, (), False),
+        # O dashboard lê os poucos contadores de uma vez
+        Consulta("dashboard: contadores", "SELECT nome, valor FROM contadores", (), True),
+
+        # Caixa
+        Consulta("caixa: carga do índice", catalogo._SQL_ITENS, (), True),
+        Consulta("caixa: código de barras", f"{catalogo._SQL_ITENS} AND codigo_barras = ?", ("7891000100103",), False),
+        Consulta("caixa: produto por id", f"{catalogo._SQL_ITENS} AND id = ?", (1,), False),
+        Consulta("caixa: busca por texto", catalogo._SQL_BUSCA, ('"arr"*', 15), False),
+        Consulta("venda: baixa de estoque", vendas._SQL_BAIXAR_ESTOQUE, (1, 1), False),
+
+        # Repositório
+        Consulta("repositório: produtos por id", produtos._SQL_PRODUTOS_POR_ID, ("[1, 2, 3]",), False),
+        Consulta("repositório: vendas por id", produtos._SQL_VENDAS_POR_ID, ("[1, 2, 3]",), False),
+        # Lista todos os fornecedores (tabela pequena)
+        Consulta("repositório: fornecedores", produtos._SQL_FORNECEDORES, (), True),
+
+        # Grade do estoque
+        _pagina("primeira página"),
+        _pagina("próxima página", apos=("Arroz", 10)),
+        _pagina("página anterior", antes=("Arroz", 10)),
+        _pagina("por categoria", categoria="Bebidas", apos=("Arroz", 10)),
+        _pagina("por fornecedor", fornecedor_id=1),
+        _pagina("estoque baixo", estoque_baixo=True),
+        _pagina("por quantidade", ordem="quantidade", apos=(5, 10)),
+        _pagina("por código", ordem="id", apos=(10, 10)),
+    ]
+    for nome, filtros in (("todos", {}), ("categoria", {"categoria": "Bebidas"}),
+                          ("estoque baixo", {"estoque_baixo": True})):
+        sql, parametros = produtos.consulta_contagem(**filtros)
+        lista.append(Consulta(f"grade: contagem ({nome})", sql, parametros, False))
+
+    # Exportação por período (sem período, ler tudo é o objetivo): os ids
+    # extremos saem dos índices e limitam a leitura ao trecho do período
+    condicoes, parametros = exportacao._filtro_periodo("v.data", *hoje)
+    lista.append(Consulta("exportação: limites do período",
+                          exportacao._SQL_LIMITES["vendas"].format(condicoes=" AND ".join(condicoes)),
+                          parametros, False))
+    lista.append(Consulta("exportação: limites dos itens", exportacao._SQL_LIMITES["venda_itens"],
+                          (1, 100), False))
+    for tabela in ("vendas", "venda_itens"):
+        sql, parametros = exportacao.consulta_exportacao(conn, tabela, *hoje)
+        lista.append(Consulta(f"exportação: {tabela} por período", sql, parametros, False))
+        sql, parametros = exportacao.consulta_exportacao(conn, tabela)
+        lista.append(Consulta(f"exportação: {tabela} completa", sql, parametros, True))
+
+    # Relatórios por período
+    sql_vendas, sql_itens, parametros = relatorios.consultas_periodo(*hoje)
+    lista.append(Consulta("relatórios: vendas por período", sql_vendas, parametros, False))
+    lista.append(Consulta("relatórios: itens por período", sql_itens, parametros, False))
+    lista.append(Consulta("relatórios: versões dos meses", relatorios._SQL_VERSOES_MESES, hoje, False))
+    lista.append(Consulta("relatórios: dias com vendas", relatorios._SQL_DIAS_COM_VENDAS, (), False))
+    return lista
+
+
+def analisar(conn, consultas=None):
+    """Executa EXPLAIN QUERY PLAN em cada consulta.
+
+    Uma linha "SCAN <tabela>" sem índice em uma tabela real do banco conta
+    como varredura completa; "SCAN ... USING INDEX", tabelas virtuais (FTS)
+    e subconsultas não contam. Também conta uma busca só com limite
+    inferior ("rowid>?") quando a consulta filtra outra coluna por
+    parâmetro: o filtro seletivo fica de fora do índice e a busca lê tudo
+    do limite até o fim da tabela (exportação por data ordenada por id).
+    "USE TEMP B-TREE" é informado à parte: ordenação sem índice, que não é
+    erro mas merece atenção.
+    """
+    tabelas = {nome for (nome,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    analises = []
+    for consulta in consultas or consultas_conhecidas(conn):
+        plano = [linha[3] for linha in conn.execute(f"EXPLAIN QUERY PLAN {consulta.sql}", consulta.parametros)]
+        filtros = {coluna.lower() for coluna in _FILTRO.findall(consulta.sql)}
+        varreduras = []
+        for detalhe in plano:
+            achado = re.match(r"SCAN (\w+)(?: AS \w+)?$", detalhe)
+            if achado and achado.group(1) in tabelas:
+                varreduras.append(detalhe)
+            faixa = _FAIXA_ABERTA.match(detalhe)
+            coluna = faixa and faixa.group(1).lower()
+            if faixa and filtros - ({"id", "rowid"} if coluna == "rowid" else {coluna}):
+                varreduras.append(detalhe)
+        ordenacoes = [detalhe for detalhe in plano if detalhe.startswith("USE TEMP B-TREE")]
+        analises.append(Analise(consulta, plano, varreduras, ordenacoes))
+    return analises
+
+
+def problemas(analises):
+    """Análises com varredura completa em consultas que não a permitem"""
+    return [a for a in analises if a.varreduras and not a.consulta.varredura_permitida]
+
+
+def main():
+    if len(sys.argv) > 1:
+        conn = sqlite3.connect(sys.argv[1])
+        if db.versao_esquema(conn) < db.VERSAO_ESQUEMA:
+            print(f"Aviso: banco na versão {db.versao_esquema(conn)}, "
+                  f"esquema atual é {db.VERSAO_ESQUEMA} (abra o PDV para migrar)")
+        analises = analisar(conn)
+        conn.close()
+    else:
+        with tempfile.TemporaryDirectory() as pasta:
+            conn = db.conectar(os.path.join(pasta, "esquema.sqlite3"))
+            db.migrar(conn)
+            analises = analisar(conn)
+            conn.close()
+
+    for analise in analises:
+        if analise.varreduras and not analise.consulta.varredura_permitida:
+            situacao = "VARREDURA"
+        elif analise.ordenacoes:
+            situacao = "ordena"
+        else:
+            situacao = "ok"
+        print(f"[{situacao:9}] {analise.consulta.nome}")
+        for detalhe in analise.plano:
+            print(f"              {detalhe}")
+
+    falhas = problemas(analises)
+    print(f"\n{len(analises)} consultas analisadas, {len(falhas)} com varredura completa")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
 # Tela principal do PDV
-from modules import db, login
+from modules import db, diario_vendas, login
 
 if __name__ == "__main__":
     db.criar_tabelas()
+    # Reaplica em segundo plano vendas do diário que não chegaram ao banco
+    diario_vendas.obter_diario()
     app = login.TelaLogin()
     app.mainloop()
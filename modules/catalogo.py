@@ -0,0 +1,261 @@
+# Índice de produtos em memória e busca incremental para o caixa
+import difflib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, namedtuple
+from modules import db
+
+# Dados mínimos que o caixa precisa para lançar um item (preço em centavos)
+ItemCatalogo = namedtuple("ItemCatalogo", "id nome codigo_barras preco_venda")
+
+_SQL_ITENS = "SELECT id, nome, codigo_barras, preco_venda FROM produtos WHERE ativo = 1"
+
+# Códigos já consultados sem resultado: quantos guardar e por quanto tempo
+# (um produto cadastrado por outro caixa aparece depois desse intervalo)
+LIMITE_AUSENTES = 1024
+VALIDADE_AUSENTES = 5.0
+
+
+class IndiceProdutos:
+    """Índice em memória dos produtos ativos, por código de barras e por nome.
+
+    É carregado na primeira consulta (uma única leitura da tabela) e depois
+    responde às leituras do scanner em O(1) sem tocar no SQLite. Um código
+    desconhecido gera uma consulta pontual pelo índice UNIQUE de
+    codigo_barras, o que cobre produtos cadastrados por outro caixa. Se ele
+    também não estiver no banco, a ausência fica guardada por
+    ``VALIDADE_AUSENTES`` segundos (no máximo ``LIMITE_AUSENTES`` códigos):
+    um código ilegível lido várias vezes não vai ao banco a cada leitura.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (por_id, por_nome, por_codigo) ou None enquanto não carregado. Um
+        # único atributo é trocado de uma vez, assim uma leitura concorrente
+        # com invalidar() sempre enxerga um índice completo.
+        self._indices = None
+        self._vocabulario = None         # palavras dos nomes, para corrigir buscas
+        self._ausentes = OrderedDict()   # código -> instante da consulta sem resultado
+        self._stats = {
+            'acertos': 0,
+            'faltas': 0,
+            'consultas_banco': 0,
+            'cargas': 0,
+            'tempo_ultima_carga': 0.0,
+        }
+
+    def _carregados(self):
+        indices = self._indices
+        if indices is not None:
+            return indices
+        with self._lock:
+            if self._indices is None:
+                inicio = time.perf_counter()
+                with db.conexao() as conn:
+                    itens = [ItemCatalogo(*linha) for linha in conn.execute(_SQL_ITENS)]
+                self._indices = (
+                    {item.id: item for item in itens},
+                    {item.nome: item for item in itens},
+                    {item.codigo_barras: item for item in itens if item.codigo_barras},
+                )
+                self._stats['cargas'] += 1
+                self._stats['tempo_ultima_carga'] = time.perf_counter() - inicio
+            return self._indices
+
+    def _buscar_no_banco(self, coluna, valor):
+        with self._lock:
+            self._stats['consultas_banco'] += 1
+        with db.conexao() as conn:
+            linha = conn.execute(f"{_SQL_ITENS} AND {coluna} = ?", (valor,)).fetchone()
+        if linha is None:
+            return None
+        item = ItemCatalogo(*linha)
+        self._guardar(item)
+        return item
+
+    def _guardar(self, item):
+        with self._lock:
+            if self._indices is None:
+                return
+            por_id, por_nome, por_codigo = self._indices
+            por_id[item.id] = item
+            por_nome[item.nome] = item
+            if item.codigo_barras:
+                por_codigo[item.codigo_barras] = item
+                self._ausentes.pop(item.codigo_barras, None)
+            if self._vocabulario is not None:
+                self._vocabulario.update(_palavras(item.nome))
+
+    def _remover(self, produto_id):
+        with self._lock:
+            if self._indices is None:
+                return
+            por_id, por_nome, por_codigo = self._indices
+            antigo = por_id.pop(produto_id, None)
+            if antigo is None:
+                return
+            if por_nome.get(antigo.nome) is antigo:
+                del por_nome[antigo.nome]
+            if por_codigo.get(antigo.codigo_barras) is antigo:
+                del por_codigo[antigo.codigo_barras]
+
+    def _contar(self, encontrado):
+        with self._lock:
+            self._stats['acertos' if encontrado else 'faltas'] += 1
+
+    def por_codigo(self, codigo_barras):
+        """Retorna o ItemCatalogo do código de barras ou None"""
+        item = self._carregados()[2].get(codigo_barras)
+        self._contar(item is not None)
+        if item is not None:
+            return item
+        agora = time.monotonic()
+        with self._lock:
+            consultado = self._ausentes.get(codigo_barras)
+            if consultado is not None and agora - consultado < VALIDADE_AUSENTES:
+                return None
+        item = self._buscar_no_banco("codigo_barras", codigo_barras)
+        if item is None:
+            with self._lock:
+                self._ausentes[codigo_barras] = agora
+                self._ausentes.move_to_end(codigo_barras)
+                if len(self._ausentes) > LIMITE_AUSENTES:
+                    self._ausentes.popitem(last=False)
+        return item
+
+    def por_nome(self, nome):
+        """Retorna o ItemCatalogo com o nome exato ou None"""
+        item = self._carregados()[1].get(nome)
+        self._contar(item is not None)
+        return item
+
+    def nomes(self):
+        """Lista os nomes de todos os produtos ativos"""
+        return list(self._carregados()[1])
+
+    def vocabulario(self):
+        """Palavras (sem acento, minúsculas) dos nomes dos produtos ativos"""
+        nomes = self._carregados()[1]
+        with self._lock:
+            if self._vocabulario is None:
+                self._vocabulario = {palavra for nome in nomes for palavra in _palavras(nome)}
+            return self._vocabulario
+
+    def invalidar(self, produto_id=None):
+        """Descarta o índice inteiro ou apenas recarrega um produto alterado"""
+        with self._lock:
+            self._ausentes.clear()
+        if produto_id is None:
+            with self._lock:
+                self._indices = None
+                self._vocabulario = None
+            return
+        if self._indices is None:
+            return
+        # Remove as entradas antigas (nome/código podem ter mudado) e relê a linha
+        self._remover(produto_id)
+        self._buscar_no_banco("id", produto_id)
+
+    def estatisticas(self):
+        """Retorna os contadores de acertos/faltas e o tamanho do índice"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['produtos'] = len(self._indices[0]) if self._indices is not None else 0
+            stats['ausentes'] = len(self._ausentes)
+        consultas = stats['acertos'] + stats['faltas']
+        stats['taxa_acerto'] = stats['acertos'] / consultas if consultas else 0.0
+        return stats
+
+
+_indice = IndiceProdutos()
+
+
+def obter_indice():
+    """Retorna o índice de produtos compartilhado pela aplicação"""
+    return _indice
+
+
+# A relevância é o bm25 com o nome pesando mais que categoria e descrição.
+# Todos os produtos ativos que casam são ordenados antes do LIMIT: com um
+# prefixo curto ("ar") em um catálogo grande isso leva alguns ms, mas a
+# busca roda fora da thread da interface e os melhores nunca ficam de fora.
+_SQL_BUSCA = """
+    SELECT p.id, p.nome, p.codigo_barras, p.preco_venda
+    FROM produtos_busca
+    JOIN produtos p ON p.id = produtos_busca.rowid
+    WHERE produtos_busca MATCH ? AND p.ativo = 1
+    ORDER BY bm25(produtos_busca, 10.0, 1.0, 3.0)
+    LIMIT ?
+"""
+
+# Correção de digitação: só palavras com pelo menos TAMANHO_MINIMO_CORRECAO
+# letras e parecidas o bastante (difflib) com uma palavra cadastrada
+TAMANHO_MINIMO_CORRECAO = 3
+SEMELHANCA_MINIMA = 0.75
+
+
+def _sem_acentos(texto):
+    """Minúsculas e sem acentos, como o FTS5 compara (remove_diacritics)"""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(letra for letra in texto if not unicodedata.combining(letra))
+
+
+def _palavras(texto):
+    """Palavras de um nome que podem servir de correção"""
+    return [palavra for palavra in re.findall(r"\w+", _sem_acentos(texto))
+            if len(palavra) >= TAMANHO_MINIMO_CORRECAO]
+
+
+def _corrigir_termos(termos, vocabulario):
+    """Troca cada termo desconhecido pela palavra cadastrada mais parecida"""
+    corrigidos = []
+    for termo in termos:
+        if len(termo) >= TAMANHO_MINIMO_CORRECAO:
+            # Um erro de digitação muda pouco o tamanho da palavra
+            candidatas = [palavra for palavra in vocabulario if abs(len(palavra) - len(termo)) <= 2]
+            parecidas = difflib.get_close_matches(termo, candidatas, n=1, cutoff=SEMELHANCA_MINIMA)
+            if parecidas:
+                termo = parecidas[0]
+        corrigidos.append(termo)
+    return corrigidos
+
+
+def _termos_busca(texto):
+    """Quebra o texto digitado em termos seguros para a sintaxe do FTS5"""
+    return re.findall(r"\w+", texto.lower())
+
+
+def buscar_produtos(texto, limite=20):
+    """Retorna até ``limite`` ItemCatalogo que casam com o texto digitado.
+
+    Cada palavra é tratada como prefixo ("arr int" encontra "Arroz
+    Integral"), sem diferenciar acentos nem ordem das palavras. Se nenhum
+    produto tiver todas as palavras, repete a busca aceitando qualquer uma
+    delas. Se ainda assim nada for encontrado, cada palavra é trocada pela
+    mais parecida entre as dos nomes cadastrados ("aroz" -> "arroz").
+    """
+    termos = _termos_busca(texto)
+    if not termos:
+        return []
+
+    with db.conexao() as conn:
+        def consultar(termos):
+            prefixos = [f'"{termo}"*' for termo in termos]
+            consultas = [" AND ".join(prefixos)]
+            if len(prefixos) > 1:
+                consultas.append(" OR ".join(prefixos))
+            for consulta in consultas:
+                linhas = conn.execute(_SQL_BUSCA, (consulta, limite)).fetchall()
+                if linhas:
+                    return [ItemCatalogo(*linha) for linha in linhas]
+            return []
+
+        itens = consultar(termos)
+        if not itens:
+            termos = [_sem_acentos(termo) for termo in termos]
+            corrigidos = _corrigir_termos(termos, _indice.vocabulario())
+            if corrigidos != termos:
+                itens = consultar(corrigidos)
+    return itens
@@ -1,15 +1,590 @@
+import atexit
+import os
+import queue
+import re
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 
+CAMINHO_BANCO = "database/db.sqlite3"
 
-def conectar():
-    return sqlite3.connect("database/db.sqlite3")
+# PRAGMAs aplicados a cada conexão nova (valem apenas para a conexão)
+PRAGMAS_CONEXAO = (
+    "foreign_keys = ON",
+)
 
+# Comandos preparados guardados por conexão. As conexões do pool vivem o
+# programa inteiro, então o SQL repetido (repositório, caixa, dashboard)
+# é compilado uma vez por conexão e reaproveitado daí em diante.
+TAMANHO_CACHE_COMANDOS = 256
 
-def criar_tabelas():
-    conn = conectar()
-    cursor = conn.cursor()
+# Perfis de durabilidade/desempenho. "journal_mode" é gravado no arquivo do
+# banco e aplicado uma vez na abertura (criar_tabelas); os demais valem por
+# conexão e são aplicados em conectar().
+PERFIS_PRAGMA = {
+    # Comportamento original do SQLite: journal de rollback, fsync a cada commit
+    'compatibilidade': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+    },
+    # WAL com fsync apenas nos checkpoints: leituras não bloqueiam a escrita
+    # e uma queda de energia pode perder no máximo as últimas transações
+    'desempenho': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,          # 64 MB (valor negativo = KiB)
+        'mmap_size': 268435456,        # 256 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+        'wal_autocheckpoint': 1000,    # páginas (~4 MB) entre checkpoints automáticos
+        'journal_size_limit': 67108864,  # trunca o -wal para 64 MB após checkpoint
+    },
+    # WAL com fsync a cada commit: nenhuma venda confirmada se perde
+    'seguro': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+        'wal_autocheckpoint': 1000,
+        'journal_size_limit': 67108864,
+    },
+}
+
+PERFIL_ATIVO = os.environ.get("PDV_PERFIL_BANCO", "desempenho")
+
+# Escritor em grupo (EscritorBanco): quanto um trabalho pode esperar por
+# outros antes do commit e quantos trabalhos cabem em uma transação
+LATENCIA_ESCRITA = 0.004
+TAMANHO_LOTE_ESCRITA = 128
+
+
+def _obter_perfil(perfil=None):
+    nome = perfil or PERFIL_ATIVO
+    if nome not in PERFIS_PRAGMA:
+        raise ValueError(f"Perfil de banco desconhecido: {nome}")
+    return PERFIS_PRAGMA[nome]
+
+
+def conectar(caminho=None, perfil=None):
+    """Abre uma conexão nova já configurada com os PRAGMAs da aplicação"""
+    conn = sqlite3.connect(caminho or CAMINHO_BANCO, check_same_thread=False,
+                           cached_statements=TAMANHO_CACHE_COMANDOS)
+    for pragma in PRAGMAS_CONEXAO:
+        conn.execute(f"PRAGMA {pragma}")
+    for nome, valor in _obter_perfil(perfil).items():
+        if nome != 'journal_mode':
+            conn.execute(f"PRAGMA {nome} = {valor}")
+    return conn
+
+
+def aplicar_perfil(conn, perfil=None):
+    """Grava o modo de journal do perfil no arquivo do banco.
+
+    Não pode rodar dentro de uma transação. Retorna o modo efetivo, que pode
+    diferir do pedido (ex.: bancos em memória não aceitam WAL).
+    """
+    modo = _obter_perfil(perfil)['journal_mode']
+    return conn.execute(f"PRAGMA journal_mode = {modo}").fetchone()[0]
+
+
+def executar_checkpoint(conn, modo="PASSIVE"):
+    """Transfere o conteúdo do arquivo -wal para o banco principal.
+
+    PASSIVE não espera leitores/escritores; TRUNCATE espera e zera o -wal.
+    Retorna (ocupado, paginas_no_wal, paginas_transferidas).
+    """
+    return conn.execute(f"PRAGMA wal_checkpoint({modo})").fetchone()
+
+
+class PoliticaCheckpoint:
+    """Executa checkpoints periódicos em segundo plano.
+
+    O autocheckpoint do SQLite roda dentro do commit de quem estiver
+    escrevendo e nunca reduz o arquivo -wal se houver leitores ativos.
+    Esta thread faz checkpoints PASSIVE a cada ``intervalo`` segundos e um
+    TRUNCATE quando o -wal passa de ``limite_bytes``, mantendo o arquivo
+    sob controle durante um dia inteiro de vendas.
+    """
+
+    def __init__(self, pool, intervalo=300.0, limite_bytes=32 * 1024 * 1024):
+        self.pool = pool
+        self.intervalo = intervalo
+        self.limite_bytes = limite_bytes
+        self._parar = threading.Event()
+        self._thread = None
+        self.checkpoints = 0
+        self.truncamentos = 0
+
+    def tamanho_wal(self):
+        caminho_wal = self.pool.caminho + "-wal"
+        try:
+            return os.path.getsize(caminho_wal)
+        except OSError:
+            return 0
+
+    def executar(self):
+        """Executa um ciclo da política imediatamente"""
+        modo = "TRUNCATE" if self.tamanho_wal() > self.limite_bytes else "PASSIVE"
+        with self.pool.conexao() as conn:
+            resultado = executar_checkpoint(conn, modo)
+        self.checkpoints += 1
+        if modo == "TRUNCATE":
+            self.truncamentos += 1
+        return resultado
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.executar()
+            except (sqlite3.Error, RuntimeError, TimeoutError) as e:
+                print(f"Erro no checkpoint do banco: {e}")
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._loop, name="checkpoint-wal", daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+
+class PoolConexoes:
+    """Pool de conexões SQLite compartilhado entre threads.
+
+    As conexões ficam abertas entre um uso e outro, preservando o cache de
+    páginas e de statements do SQLite. Cada conexão é emprestada a uma única
+    thread por vez, por isso é criada com ``check_same_thread=False``.
+    """
+
+    def __init__(self, caminho=None, tamanho=4, timeout=10.0, perfil=None):
+        self.caminho = caminho or CAMINHO_BANCO
+        self.perfil = perfil
+        self.tamanho = tamanho
+        self.timeout = timeout
+        # LIFO: a conexão devolvida por último é a que tem o cache mais "quente"
+        self._livres = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._criadas = 0
+        self._fechado = False
+        self._stats = {
+            'checkouts': 0,
+            'esperas': 0,
+            'tempo_espera_total': 0.0,
+            'tempo_espera_max': 0.0,
+            'conexoes_criadas': 0,
+            'conexoes_descartadas': 0,
+        }
+
+    def _criar_conexao(self):
+        """Cria uma conexão para uma vaga já reservada em ``_criadas``"""
+        try:
+            conn = conectar(self.caminho, self.perfil)
+        except Exception:
+            with self._lock:
+                self._criadas -= 1
+            raise
+        with self._lock:
+            self._stats['conexoes_criadas'] += 1
+        return conn
+
+    @staticmethod
+    def _saudavel(conn):
+        """Verifica se a conexão ainda responde antes de entregá-la"""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _descartar(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._criadas -= 1
+            self._stats['conexoes_descartadas'] += 1
+
+    def obter(self):
+        """Retira uma conexão do pool, criando uma nova se houver vaga"""
+        if self._fechado:
+            raise RuntimeError("Pool de conexões já foi fechado")
+
+        inicio = time.perf_counter()
+        esperou = False
+        try:
+            conn = self._livres.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                pode_criar = self._criadas < self.tamanho
+                if pode_criar:
+                    self._criadas += 1
+            if pode_criar:
+                conn = self._criar_conexao()
+            else:
+                # Pool esgotado: aguarda outra thread devolver uma conexão
+                esperou = True
+                try:
+                    conn = self._livres.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(
+                        f"Nenhuma conexão livre após {self.timeout:.1f}s") from None
+
+        if not self._saudavel(conn):
+            self._descartar(conn)
+            with self._lock:
+                self._criadas += 1
+            conn = self._criar_conexao()
+
+        espera = time.perf_counter() - inicio
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['tempo_espera_total'] += espera
+            self._stats['tempo_espera_max'] = max(self._stats['tempo_espera_max'], espera)
+            if esperou:
+                self._stats['esperas'] += 1
+        return conn
+
+    def devolver(self, conn):
+        """Devolve a conexão ao pool, desfazendo transações esquecidas"""
+        if self._fechado:
+            self._descartar(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._descartar(conn)
+            return
+        self._livres.put(conn)
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão durante o bloco ``with``"""
+        conn = self.obter()
+        try:
+            yield conn
+        finally:
+            self.devolver(conn)
+
+    @contextmanager
+    def transacao(self, imediata=False):
+        """Empresta uma conexão e faz commit ao final do bloco (ou rollback em erro).
+
+        Com ``imediata=True`` a trava de escrita é obtida já no início
+        (BEGIN IMMEDIATE), evitando que duas transações que leem e depois
+        escrevem entrem em deadlock.
+        """
+        with self.conexao() as conn:
+            with conn:
+                if imediata:
+                    conn.execute("BEGIN IMMEDIATE")
+                yield conn
+
+    def estatisticas(self):
+        """Retorna uma cópia dos contadores do pool"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['conexoes_abertas'] = self._criadas
+        stats['conexoes_livres'] = self._livres.qsize()
+        checkouts = stats['checkouts']
+        stats['tempo_espera_medio'] = (
+            stats['tempo_espera_total'] / checkouts if checkouts else 0.0)
+        return stats
+
+    def fechar(self):
+        """Fecha todas as conexões ociosas e impede novos empréstimos"""
+        self._fechado = True
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conn)
+
+
+class EscritorBanco:
+    """Thread única de escrita com commit em grupo.
+
+    Cada trabalho é uma função ``funcao(conn, *args)`` enviada por
+    ``enviar()``, que retorna um Future com o resultado. A thread junta os
+    trabalhos que chegam em até ``latencia`` segundos depois do primeiro
+    (no máximo ``tamanho_lote``) e grava todos em uma única transação
+    IMMEDIATE: um commit, e um fsync, por lote em vez de um por venda.
+
+    Cada trabalho roda em seu próprio SAVEPOINT, então o erro de um deles
+    (venda sem itens, produto inexistente) desfaz só aquele trabalho e vai
+    para o seu Future; os demais do lote são gravados normalmente. Se o
+    commit falhar, todos os trabalhos do lote recebem o erro.
+
+    As funções não devem chamar o escritor de novo (a thread esperaria por
+    ela mesma).
+    """
+
+    def __init__(self, pool, latencia=LATENCIA_ESCRITA, tamanho_lote=TAMANHO_LOTE_ESCRITA):
+        self.pool = pool
+        self.latencia = latencia
+        self.tamanho_lote = tamanho_lote
+        self._fila = queue.Queue()
+        self._lock = threading.Lock()
+        self._fechado = False
+        self._thread = None
+        self._ultimo_lote = 0
+        self._stats = {
+            'trabalhos': 0,
+            'lotes': 0,
+            'lotes_com_erro': 0,
+            'maior_lote': 0,
+        }
 
-    cursor.execute("""
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="escritor-banco", daemon=True)
+            self._thread.start()
+        return self
+
+    def enviar(self, funcao, *args):
+        """Coloca ``funcao(conn, *args)`` na fila; retorna um Future"""
+        futuro = Future()
+        with self._lock:
+            if self._fechado:
+                raise RuntimeError("Escritor do banco já foi encerrado")
+            self._fila.put((time.monotonic(), futuro, funcao, args))
+        return futuro
+
+    def executar(self, funcao, *args):
+        """Envia o trabalho e espera o resultado (ou a exceção) dele"""
+        return self.enviar(funcao, *args).result()
+
+    def _coletar(self, primeiro):
+        """Junta ao lote os trabalhos que chegarem dentro da janela do primeiro"""
+        lote = [primeiro]
+        # A janela conta desde a chegada do primeiro, então quem já esperou o
+        # lote anterior terminar não espera de novo. Ela também acaba quando o
+        # lote chega ao tamanho do anterior e a fila está vazia: com os mesmos
+        # caixas ativos, ninguém mais vai chegar (e um caixa sozinho grava já)
+        limite = primeiro[0] + self.latencia
+        while len(lote) < self.tamanho_lote:
+            if len(lote) >= self._ultimo_lote and self._fila.empty():
+                break
+            restante = limite - time.monotonic()
+            try:
+                trabalho = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if trabalho is None:
+                self._fila.put(None)  # encerra depois deste lote
+                break
+            lote.append(trabalho)
+        return lote
+
+    def _gravar(self, lote):
+        resultados = []
+        try:
+            with self.pool.conexao() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    for _, futuro, funcao, args in lote:
+                        if not futuro.set_running_or_notify_cancel():
+                            continue
+                        conn.execute("SAVEPOINT trabalho")
+                        try:
+                            resultados.append((futuro, funcao(conn, *args), None))
+                        except Exception as e:
+                            conn.execute("ROLLBACK TO trabalho")
+                            resultados.append((futuro, None, e))
+                        conn.execute("RELEASE trabalho")
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+        except Exception as e:
+            # Nada do lote foi gravado. O erro pode vir antes do primeiro
+            # trabalho (banco travado no BEGIN): os Futures que ainda nem
+            # começaram também recebem o erro, senão quem espera fica preso
+            with self._lock:
+                self._stats['lotes_com_erro'] += 1
+            for _, futuro, _, _ in lote:
+                if futuro.done():
+                    continue
+                if futuro.running() or futuro.set_running_or_notify_cancel():
+                    futuro.set_exception(e)
+            return
+        for futuro, resultado, erro in resultados:
+            if erro is None:
+                futuro.set_result(resultado)
+            else:
+                futuro.set_exception(erro)
+
+    def _loop(self):
+        while True:
+            trabalho = self._fila.get()
+            if trabalho is None:
+                break
+            lote = self._coletar(trabalho)
+            self._gravar(lote)
+            self._ultimo_lote = len(lote)
+            with self._lock:
+                self._stats['trabalhos'] += len(lote)
+                self._stats['lotes'] += 1
+                self._stats['maior_lote'] = max(self._stats['maior_lote'], len(lote))
+
+    def estatisticas(self):
+        """Retorna uma cópia dos contadores do escritor"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pendentes'] = self._fila.qsize()
+        stats['trabalhos_por_lote'] = stats['trabalhos'] / stats['lotes'] if stats['lotes'] else 0.0
+        return stats
+
+    def parar(self, timeout=5.0):
+        """Grava o que já está na fila e encerra a thread"""
+        with self._lock:
+            if self._fechado:
+                return
+            self._fechado = True
+            self._fila.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_politica_checkpoint = None
+_escritor = None
+
+
+def obter_pool():
+    """Retorna o pool global, criando-o na primeira chamada"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexoes(CAMINHO_BANCO)
+    return _pool
+
+
+def configurar_banco(caminho, tamanho_pool=4, perfil=None):
+    """Troca o arquivo de banco usado pela aplicação (útil em testes e ferramentas)"""
+    global CAMINHO_BANCO, PERFIL_ATIVO, _pool
+    fechar_pool()
+    with _pool_lock:
+        CAMINHO_BANCO = caminho
+        if perfil is not None:
+            _obter_perfil(perfil)
+            PERFIL_ATIVO = perfil
+        _pool = PoolConexoes(caminho, tamanho=tamanho_pool)
+    return _pool
+
+
+def obter_escritor():
+    """Retorna o escritor em grupo do pool global, iniciando-o na primeira chamada"""
+    global _escritor
+    pool = obter_pool()
+    with _pool_lock:
+        if _escritor is None:
+            _escritor = EscritorBanco(pool).iniciar()
+    return _escritor
+
+
+def iniciar_checkpoint_periodico(intervalo=300.0, limite_bytes=32 * 1024 * 1024):
+    """Liga a política de checkpoint do pool global (apenas em modo WAL)"""
+    global _politica_checkpoint
+    if _politica_checkpoint is None:
+        _politica_checkpoint = PoliticaCheckpoint(obter_pool(), intervalo, limite_bytes)
+        _politica_checkpoint.iniciar()
+    return _politica_checkpoint
+
+
+def fechar_pool():
+    """Fecha o pool global (chamado automaticamente ao encerrar o programa)"""
+    global _pool, _politica_checkpoint, _escritor
+    with _pool_lock:
+        if _escritor is not None:
+            _escritor.parar()
+            _escritor = None
+        if _politica_checkpoint is not None:
+            _politica_checkpoint.parar()
+            _politica_checkpoint = None
+        if _pool is not None:
+            # Zera o -wal ao sair para o próximo início não precisar reprocessá-lo
+            if _obter_perfil(_pool.perfil)['journal_mode'] == 'WAL':
+                try:
+                    with _pool.conexao() as conn:
+                        executar_checkpoint(conn, "TRUNCATE")
+                except (sqlite3.Error, TimeoutError):
+                    pass
+            _pool.fechar()
+            _pool = None
+
+
+atexit.register(fechar_pool)
+
+
+def conexao():
+    """Atalho para ``obter_pool().conexao()``"""
+    return obter_pool().conexao()
+
+
+def transacao(imediata=False):
+    """Atalho para ``obter_pool().transacao()``"""
+    return obter_pool().transacao(imediata)
+
+
+def escrever(funcao, *args):
+    """Atalho para ``obter_escritor().executar()``"""
+    return obter_escritor().executar(funcao, *args)
+
+
+# ---------------------------------------------------------------------------
+# Migrações de esquema
+#
+# Cada migração é uma função que recebe a conexão e executa o DDL de uma
+# versão. A versão aplicada fica em PRAGMA user_version (cabeçalho do
+# arquivo), então um banco já atualizado não executa nenhum DDL na abertura.
+# Migrações novas devem ser ACRESCENTADAS ao final de MIGRACOES, nunca
+# editadas depois de publicadas.
+# ---------------------------------------------------------------------------
+
+def _colunas(conn, tabela):
+    return {linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")}
+
+
+SQL_TABELA_PRODUTOS = """
+    CREATE TABLE IF NOT EXISTS produtos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        descricao TEXT,
+        categoria TEXT NOT NULL,
+        codigo_barras TEXT UNIQUE,
+        quantidade INTEGER DEFAULT 0,
+        estoque_minimo INTEGER DEFAULT 0,
+        localizacao TEXT,
+        preco_custo REAL NOT NULL,
+        preco_venda REAL NOT NULL,
+        margem_lucro REAL,
+        fornecedor_id INTEGER,
+        imagem_path TEXT,
+        data_cadastro DATETIME DEFAULT CURRENT_TIMESTAMP,
+        ativo BOOLEAN DEFAULT 1,
+        FOREIGN KEY (fornecedor_id) REFERENCES fornecedores (id)
+    )
+"""
+
+
+def _migracao_001_esquema_inicial(conn):
+    """Tabelas básicas e dados padrão"""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS usuarios (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             nome TEXT NOT NULL,
@@ -18,7 +593,7 @@ def criar_tabelas():
     """)
 
     # Tabela de fornecedores
-    cursor.execute("""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS fornecedores (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             nome TEXT NOT NULL,
@@ -31,28 +606,9 @@ def criar_tabelas():
     """)
 
     # Tabela de produtos completa
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS produtos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            descricao TEXT,
-            categoria TEXT NOT NULL,
-            codigo_barras TEXT UNIQUE,
-            quantidade INTEGER DEFAULT 0,
-            estoque_minimo INTEGER DEFAULT 0,
-            localizacao TEXT,
-            preco_custo REAL NOT NULL,
-            preco_venda REAL NOT NULL,
-            margem_lucro REAL,
-            fornecedor_id INTEGER,
-            imagem_path TEXT,
-            data_cadastro DATETIME DEFAULT CURRENT_TIMESTAMP,
-            ativo BOOLEAN DEFAULT 1,
-            FOREIGN KEY (fornecedor_id) REFERENCES fornecedores (id)
-        )
-    """)
+    conn.execute(SQL_TABELA_PRODUTOS)
 
-    cursor.execute("""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS vendas (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             data TEXT NOT NULL,
@@ -61,17 +617,507 @@ def criar_tabelas():
     """)
 
     # Usuário padrão
-    cursor.execute(
+    conn.execute(
         "INSERT OR IGNORE INTO usuarios (id, nome, senha) VALUES (1, 'admin', '1234')")
-    
+
     # Fornecedores padrão
-    cursor.execute("""
-        INSERT OR IGNORE INTO fornecedores (id, nome, contato, telefone, email) 
-        VALUES 
+    conn.execute("""
+        INSERT OR IGNORE INTO fornecedores (id, nome, contato, telefone, email)
+        VALUES
         (1, 'Fornecedor Geral', 'Contato Geral', '(11) 99999-9999', 'contato@fornecedor.com'),
         (2, 'Distribuidora ABC', 'João Silva', '(11) 88888-8888', 'joao@abc.com'),
         (3, 'Atacado XYZ', 'Maria Santos', '(11) 77777-7777', 'maria@xyz.com')
     """)
-    
-    conn.commit()
-    conn.close()
+
+
+def _migracao_002_produtos_completo(conn):
+    """Converte a tabela produtos antiga (id, nome, preco) para o cadastro completo"""
+    if 'preco_venda' in _colunas(conn, 'produtos'):
+        return
+
+    # O SQLite não altera colunas existentes: recria a tabela e copia os dados
+    conn.execute("ALTER TABLE produtos RENAME TO produtos_antigo")
+    conn.execute(SQL_TABELA_PRODUTOS)
+    conn.execute("""
+        INSERT INTO produtos (id, nome, categoria, preco_custo, preco_venda)
+        SELECT id, nome, 'Outros', preco, preco FROM produtos_antigo
+    """)
+    conn.execute("DROP TABLE produtos_antigo")
+
+
+def _migracao_003_vendas_cliente(conn):
+    """Coluna de cliente nas vendas (usada no card de clientes do dashboard)"""
+    if 'cliente' not in _colunas(conn, 'vendas'):
+        conn.execute("ALTER TABLE vendas ADD COLUMN cliente TEXT")
+
+
+def _migracao_004_venda_itens(conn):
+    """Itens de cada venda (produto, quantidade e preço praticado)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS venda_itens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            venda_id INTEGER NOT NULL,
+            produto_id INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL CHECK (quantidade > 0),
+            preco_unitario REAL NOT NULL,
+            subtotal REAL NOT NULL,
+            FOREIGN KEY (venda_id) REFERENCES vendas (id) ON DELETE CASCADE,
+            FOREIGN KEY (produto_id) REFERENCES produtos (id)
+        )
+    """)
+    # (venda_id, produto_id) atende tanto a listagem dos itens de uma venda
+    # quanto a subconsulta por produto usada na baixa de estoque
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_venda_itens_venda ON venda_itens (venda_id, produto_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_venda_itens_produto ON venda_itens (produto_id)")
+
+
+def _migracao_005_busca_produtos(conn):
+    """Índice FTS5 de nome/descrição/categoria para a busca incremental do caixa"""
+    # Tabela de conteúdo externo: o texto fica só em produtos, o FTS guarda
+    # apenas o índice invertido. prefix='2 3' acelera buscas "ar*", "arr*".
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS produtos_busca USING fts5(
+            nome, descricao, categoria,
+            content='produtos', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    """)
+    conn.execute("INSERT INTO produtos_busca (produtos_busca) VALUES ('rebuild')")
+
+    # Gatilhos mantêm o índice em sincronia com a tabela produtos
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_busca_ai AFTER INSERT ON produtos BEGIN
+            INSERT INTO produtos_busca (rowid, nome, descricao, categoria)
+            VALUES (new.id, new.nome, new.descricao, new.categoria);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_busca_ad AFTER DELETE ON produtos BEGIN
+            INSERT INTO produtos_busca (produtos_busca, rowid, nome, descricao, categoria)
+            VALUES ('delete', old.id, old.nome, old.descricao, old.categoria);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_busca_au AFTER UPDATE OF nome, descricao, categoria ON produtos BEGIN
+            INSERT INTO produtos_busca (produtos_busca, rowid, nome, descricao, categoria)
+            VALUES ('delete', old.id, old.nome, old.descricao, old.categoria);
+            INSERT INTO produtos_busca (rowid, nome, descricao, categoria)
+            VALUES (new.id, new.nome, new.descricao, new.categoria);
+        END
+    """)
+
+
+def _migracao_006_resumos_dashboard(conn):
+    """Agregados do dashboard mantidos por gatilhos (leitura O(1) nos cards)"""
+    # Total e número de vendas por dia (dia = DATE(vendas.data))
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vendas_resumo_diario (
+            dia TEXT PRIMARY KEY,
+            total REAL NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    # Contadores globais: produtos, estoque_baixo, clientes
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS contadores (
+            nome TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    # Clientes que já compraram (para contar clientes distintos sem varrer vendas)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vendas_clientes (
+            cliente TEXT PRIMARY KEY
+        ) WITHOUT ROWID
+    """)
+
+    # Carga inicial a partir dos dados existentes
+    conn.execute("DELETE FROM vendas_resumo_diario")
+    conn.execute("""
+        INSERT INTO vendas_resumo_diario (dia, total, quantidade)
+        SELECT DATE(data), SUM(total), COUNT(*) FROM vendas GROUP BY DATE(data)
+    """)
+    conn.execute("DELETE FROM vendas_clientes")
+    conn.execute("""
+        INSERT INTO vendas_clientes (cliente)
+        SELECT DISTINCT cliente FROM vendas WHERE cliente IS NOT NULL AND cliente != ''
+    """)
+    conn.execute("DELETE FROM contadores")
+    conn.execute("""
+        INSERT INTO contadores (nome, valor) VALUES
+        ('produtos', (SELECT COUNT(*) FROM produtos)),
+        ('estoque_baixo', (SELECT COUNT(*) FROM produtos WHERE quantidade < 10)),
+        ('clientes', (SELECT COUNT(*) FROM vendas_clientes))
+    """)
+
+    # Gatilhos de vendas -> resumo diário
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS vendas_resumo_ai AFTER INSERT ON vendas BEGIN
+            INSERT INTO vendas_resumo_diario (dia, total, quantidade)
+            VALUES (DATE(new.data), new.total, 1)
+            ON CONFLICT (dia) DO UPDATE SET
+                total = total + excluded.total,
+                quantidade = quantidade + 1;
+            INSERT OR IGNORE INTO vendas_clientes (cliente)
+            SELECT new.cliente WHERE new.cliente IS NOT NULL AND new.cliente != '';
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS vendas_resumo_ad AFTER DELETE ON vendas BEGIN
+            UPDATE vendas_resumo_diario
+            SET total = total - old.total, quantidade = quantidade - 1
+            WHERE dia = DATE(old.data);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS vendas_resumo_au AFTER UPDATE OF data, total ON vendas BEGIN
+            UPDATE vendas_resumo_diario
+            SET total = total - old.total, quantidade = quantidade - 1
+            WHERE dia = DATE(old.data);
+            INSERT INTO vendas_resumo_diario (dia, total, quantidade)
+            VALUES (DATE(new.data), new.total, 1)
+            ON CONFLICT (dia) DO UPDATE SET
+                total = total + excluded.total,
+                quantidade = quantidade + 1;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS vendas_clientes_ai AFTER INSERT ON vendas_clientes BEGIN
+            UPDATE contadores SET valor = valor + 1 WHERE nome = 'clientes';
+        END
+    """)
+
+    # Gatilhos de produtos -> contadores
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_contadores_ai AFTER INSERT ON produtos BEGIN
+            UPDATE contadores SET valor = valor + 1 WHERE nome = 'produtos';
+            UPDATE contadores SET valor = valor + (new.quantidade < 10) WHERE nome = 'estoque_baixo';
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_contadores_ad AFTER DELETE ON produtos BEGIN
+            UPDATE contadores SET valor = valor - 1 WHERE nome = 'produtos';
+            UPDATE contadores SET valor = valor - (old.quantidade < 10) WHERE nome = 'estoque_baixo';
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_contadores_au AFTER UPDATE OF quantidade ON produtos
+        WHEN (new.quantidade < 10) != (old.quantidade < 10) BEGIN
+            UPDATE contadores SET valor = valor + (new.quantidade < 10) - (old.quantidade < 10)
+            WHERE nome = 'estoque_baixo';
+        END
+    """)
+
+
+def _migracao_007_grade_produtos(conn):
+    """Índices da grade de produtos do estoque (filtros e ordenação)"""
+    # Índices compostos terminam implicitamente em rowid (id), então também
+    # servem à paginação por chave (nome, id) > (?, ?) dentro de cada filtro
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produtos_nome ON produtos (nome)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produtos_categoria ON produtos (categoria, nome)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produtos_fornecedor ON produtos (fornecedor_id, nome)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produtos_quantidade ON produtos (quantidade)")
+
+
+def _migracao_008_indices_consultas(conn):
+    """Índices dos caminhos de acesso restantes (ver check_indices.py)"""
+    # Filtros por período usam a coluna crua (data >= ? AND data < ?), nunca
+    # DATE(data), senão o índice não pode ser usado
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_vendas_data ON vendas (data)")
+    # Quase todas as telas leem apenas produtos ativos; o índice parcial
+    # substitui o de nome e também conta os ativos sem ler a tabela
+    conn.execute("DROP INDEX IF EXISTS idx_produtos_nome")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produtos_ativos ON produtos (nome) WHERE ativo = 1")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_usuarios_nome ON usuarios (nome)")
+
+
+# Produto abaixo do seu estoque mínimo (mesma expressão do índice parcial)
+_ESTOQUE_BAIXO_NEW = "IFNULL(new.ativo = 1 AND new.quantidade < new.estoque_minimo, 0)"
+_ESTOQUE_BAIXO_OLD = "IFNULL(old.ativo = 1 AND old.quantidade < old.estoque_minimo, 0)"
+
+
+def _migracao_009_estoque_minimo(conn):
+    """Estoque baixo por produto (quantidade < estoque_minimo) e eventos de alerta"""
+    # Só os produtos em alerta entram no índice: listar e contar custa
+    # O(alertas), não O(catálogo)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_produtos_estoque_baixo ON produtos (nome)
+        WHERE ativo = 1 AND quantidade < estoque_minimo
+    """)
+
+    # Cada entrada/saída do estoque baixo vira um evento; o dashboard lê só
+    # os eventos novos (id > último visto), inclusive os gerados por outro caixa
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS eventos_estoque (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            produto_id INTEGER NOT NULL,
+            baixo INTEGER NOT NULL,
+            quantidade INTEGER,
+            estoque_minimo INTEGER,
+            momento DATETIME DEFAULT (DATETIME('now', 'localtime'))
+        )
+    """)
+    # Guarda apenas os últimos 10 mil eventos
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS eventos_estoque_ai AFTER INSERT ON eventos_estoque BEGIN
+            DELETE FROM eventos_estoque WHERE id <= new.id - 10000;
+        END
+    """)
+
+    # Os gatilhos dos contadores passam a usar o mínimo de cada produto
+    for gatilho in ("produtos_contadores_ai", "produtos_contadores_ad", "produtos_contadores_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {gatilho}")
+    conn.execute(f"""
+        CREATE TRIGGER produtos_contadores_ai AFTER INSERT ON produtos BEGIN
+            UPDATE contadores SET valor = valor + 1 WHERE nome = 'produtos';
+            UPDATE contadores SET valor = valor + 1
+            WHERE nome = 'estoque_baixo' AND {_ESTOQUE_BAIXO_NEW};
+            INSERT INTO eventos_estoque (produto_id, baixo, quantidade, estoque_minimo)
+            SELECT new.id, 1, new.quantidade, new.estoque_minimo WHERE {_ESTOQUE_BAIXO_NEW};
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER produtos_contadores_ad AFTER DELETE ON produtos BEGIN
+            UPDATE contadores SET valor = valor - 1 WHERE nome = 'produtos';
+            UPDATE contadores SET valor = valor - 1
+            WHERE nome = 'estoque_baixo' AND {_ESTOQUE_BAIXO_OLD};
+            INSERT INTO eventos_estoque (produto_id, baixo, quantidade, estoque_minimo)
+            SELECT old.id, 0, old.quantidade, old.estoque_minimo WHERE {_ESTOQUE_BAIXO_OLD};
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER produtos_contadores_au AFTER UPDATE OF quantidade, estoque_minimo, ativo ON produtos
+        WHEN {_ESTOQUE_BAIXO_NEW} != {_ESTOQUE_BAIXO_OLD} BEGIN
+            UPDATE contadores SET valor = valor + {_ESTOQUE_BAIXO_NEW} - {_ESTOQUE_BAIXO_OLD}
+            WHERE nome = 'estoque_baixo';
+            INSERT INTO eventos_estoque (produto_id, baixo, quantidade, estoque_minimo)
+            VALUES (new.id, {_ESTOQUE_BAIXO_NEW}, new.quantidade, new.estoque_minimo);
+        END
+    """)
+
+    conn.execute("""
+        UPDATE contadores SET valor = (
+            SELECT COUNT(*) FROM produtos WHERE ativo = 1 AND quantidade < estoque_minimo
+        ) WHERE nome = 'estoque_baixo'
+    """)
+
+
+def _migracao_010_versoes_vendas(conn):
+    """Versões por dia das vendas e versão do cadastro (validade do cache de relatórios)"""
+    # A cada venda gravada, alterada ou apagada 'versao_vendas' aumenta e o
+    # dia afetado guarda o novo valor: o maior número de um intervalo de
+    # dias só muda se alguma venda daqueles dias mudou
+    if 'versao' not in _colunas(conn, 'vendas_resumo_diario'):
+        conn.execute("ALTER TABLE vendas_resumo_diario ADD COLUMN versao INTEGER NOT NULL DEFAULT 0")
+    conn.execute("""
+        INSERT OR IGNORE INTO contadores (nome, valor) VALUES ('versao_vendas', 0), ('versao_produtos', 0)
+    """)
+
+    _versao = "(SELECT valor FROM contadores WHERE nome = 'versao_vendas')"
+    _incrementar = "UPDATE contadores SET valor = valor + 1 WHERE nome = 'versao_vendas';"
+    for gatilho in ("vendas_resumo_ai", "vendas_resumo_ad", "vendas_resumo_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {gatilho}")
+    conn.execute(f"""
+        CREATE TRIGGER vendas_resumo_ai AFTER INSERT ON vendas BEGIN
+            {_incrementar}
+            INSERT INTO vendas_resumo_diario (dia, total, quantidade, versao)
+            VALUES (DATE(new.data), new.total, 1, {_versao})
+            ON CONFLICT (dia) DO UPDATE SET
+                total = total + excluded.total,
+                quantidade = quantidade + 1,
+                versao = excluded.versao;
+            INSERT OR IGNORE INTO vendas_clientes (cliente)
+            SELECT new.cliente WHERE new.cliente IS NOT NULL AND new.cliente != '';
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER vendas_resumo_ad AFTER DELETE ON vendas BEGIN
+            {_incrementar}
+            UPDATE vendas_resumo_diario
+            SET total = total - old.total, quantidade = quantidade - 1, versao = {_versao}
+            WHERE dia = DATE(old.data);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER vendas_resumo_au AFTER UPDATE OF data, total ON vendas BEGIN
+            {_incrementar}
+            UPDATE vendas_resumo_diario
+            SET total = total - old.total, quantidade = quantidade - 1, versao = {_versao}
+            WHERE dia = DATE(old.data);
+            INSERT INTO vendas_resumo_diario (dia, total, quantidade, versao)
+            VALUES (DATE(new.data), new.total, 1, {_versao})
+            ON CONFLICT (dia) DO UPDATE SET
+                total = total + excluded.total,
+                quantidade = quantidade + 1,
+                versao = excluded.versao;
+        END
+    """)
+    # Itens novos entram na mesma transação do cabeçalho (vendas.registrar_venda),
+    # já coberta pelo gatilho de INSERT em vendas; correções posteriores não
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS venda_itens_versao_ad AFTER DELETE ON venda_itens BEGIN
+            {_incrementar}
+            UPDATE vendas_resumo_diario SET versao = {_versao}
+            WHERE dia = (SELECT DATE(data) FROM vendas WHERE id = old.venda_id);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS venda_itens_versao_au AFTER UPDATE ON venda_itens BEGIN
+            {_incrementar}
+            UPDATE vendas_resumo_diario SET versao = {_versao}
+            WHERE dia IN (SELECT DATE(data) FROM vendas WHERE id IN (old.venda_id, new.venda_id));
+        END
+    """)
+    # Nome, categoria e custo entram nos relatórios (ranking, categorias, margem)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_versao_au AFTER UPDATE OF nome, categoria, preco_custo ON produtos BEGIN
+            UPDATE contadores SET valor = valor + 1 WHERE nome = 'versao_produtos';
+        END
+    """)
+
+
+def _migracao_011_chave_vendas(conn):
+    """Chave única das vendas vindas do diário (reaplicar o diário não duplica vendas)"""
+    if 'chave' not in _colunas(conn, 'vendas'):
+        conn.execute("ALTER TABLE vendas ADD COLUMN chave TEXT")
+    # Vendas antigas ficam com chave NULL, que não conflita entre si
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_vendas_chave ON vendas (chave)")
+
+
+def _recriar_em_centavos(conn, tabela, colunas):
+    """Recria ``tabela`` com ``colunas`` INTEGER (centavos) no lugar de REAL (reais).
+
+    Segue o procedimento do SQLite para mudar o tipo de uma coluna: nova
+    tabela, cópia, DROP da antiga e RENAME da nova, refazendo os índices e
+    gatilhos da tabela. Exige chaves estrangeiras desligadas (ver migrar).
+    """
+    sql = conn.execute(
+        "SELECT sql FROM sqlite_schema WHERE type = 'table' AND name = ?", (tabela,)).fetchone()[0]
+    sql = re.sub(rf'^CREATE TABLE "?{tabela}"?', f"CREATE TABLE {tabela}_centavos", sql)
+    for coluna in colunas:
+        sql = re.sub(rf"\b{coluna}\s+REAL\b", f"{coluna} INTEGER", sql)
+    dependentes = [linha[0] for linha in conn.execute(
+        "SELECT sql FROM sqlite_schema WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL",
+        (tabela,))]
+    todas = [linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")]
+    valores = [f"CAST(ROUND({coluna} * 100) AS INTEGER)" if coluna in colunas else coluna for coluna in todas]
+
+    # AUTOINCREMENT: a sequência é mantida, ids de registros apagados não
+    # voltam (nem quando a tabela ficou vazia e a nova não teria sequência)
+    sequencia = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (tabela,)).fetchone()
+
+    conn.execute(sql)
+    conn.execute(f"INSERT INTO {tabela}_centavos ({', '.join(todas)}) SELECT {', '.join(valores)} FROM {tabela}")
+    conn.execute(f"DROP TABLE {tabela}")
+    conn.execute(f"ALTER TABLE {tabela}_centavos RENAME TO {tabela}")
+    if sequencia is not None:
+        # sqlite_sequence não tem chave única: apaga e insere em vez de INSERT OR REPLACE
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (tabela,))
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (tabela, sequencia[0]))
+    for sql in dependentes:
+        conn.execute(sql)
+
+
+def _migracao_012_dinheiro_centavos(conn):
+    """Preços e totais em centavos (INTEGER): somas exatas no banco (utils.dinheiro)"""
+    if conn.execute("SELECT type FROM pragma_table_info('vendas') WHERE name = 'total'").fetchone()[0] == "INTEGER":
+        return
+    _recriar_em_centavos(conn, "produtos", ("preco_custo", "preco_venda"))
+    _recriar_em_centavos(conn, "vendas", ("total",))
+    _recriar_em_centavos(conn, "venda_itens", ("preco_unitario", "subtotal"))
+    _recriar_em_centavos(conn, "vendas_resumo_diario", ("total",))
+    # O resumo acumulava somas em ponto flutuante: refaz a partir das vendas
+    conn.execute("""
+        UPDATE vendas_resumo_diario SET total = (
+            SELECT COALESCE(SUM(v.total), 0) FROM vendas v
+            WHERE v.data >= vendas_resumo_diario.dia AND v.data < DATE(vendas_resumo_diario.dia, '+1 day')
+        )
+    """)
+
+
+def _migracao_013_versao_produtos_cadastro(conn):
+    """Produto cadastrado ou apagado também muda a versão dos produtos (cache dos relatórios)"""
+    for sufixo, evento in (("ai", "INSERT"), ("ad", "DELETE")):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS produtos_versao_{sufixo} AFTER {evento} ON produtos BEGIN
+                UPDATE contadores SET valor = valor + 1 WHERE nome = 'versao_produtos';
+            END
+        """)
+
+
+MIGRACOES = [
+    _migracao_001_esquema_inicial,
+    _migracao_002_produtos_completo,
+    _migracao_003_vendas_cliente,
+    _migracao_004_venda_itens,
+    _migracao_005_busca_produtos,
+    _migracao_006_resumos_dashboard,
+    _migracao_007_grade_produtos,
+    _migracao_008_indices_consultas,
+    _migracao_009_estoque_minimo,
+    _migracao_010_versoes_vendas,
+    _migracao_011_chave_vendas,
+    _migracao_012_dinheiro_centavos,
+    _migracao_013_versao_produtos_cadastro,
+]
+
+VERSAO_ESQUEMA = len(MIGRACOES)
+
+# Migrações que recriam tabelas referenciadas por chaves estrangeiras: rodam
+# com foreign_keys desligado (o DROP da tabela antiga apagaria em cascata os
+# itens das vendas) e conferem as chaves com foreign_key_check antes do commit
+MIGRACOES_SEM_CHAVES_ESTRANGEIRAS = (_migracao_012_dinheiro_centavos,)
+
+
+def versao_esquema(conn):
+    """Versão de esquema gravada no banco (0 = banco novo ou anterior às migrações)"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(conn):
+    """Aplica as migrações pendentes, cada uma em sua própria transação.
+
+    Retorna a lista de versões aplicadas (vazia se o banco já estava atual).
+    """
+    if versao_esquema(conn) >= VERSAO_ESQUEMA:
+        return []
+
+    aplicadas = []
+    for versao, migracao in enumerate(MIGRACOES, start=1):
+        sem_chaves = migracao in MIGRACOES_SEM_CHAVES_ESTRANGEIRAS
+        if sem_chaves:
+            # Só tem efeito fora de uma transação
+            conn.execute("PRAGMA foreign_keys = OFF")
+            conn.execute("PRAGMA legacy_alter_table = ON")
+        # BEGIN IMMEDIATE trava a escrita antes de reler a versão, assim dois
+        # caixas abrindo ao mesmo tempo não aplicam a mesma migração duas vezes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if versao_esquema(conn) >= versao:
+                conn.rollback()
+                continue
+            migracao(conn)
+            if sem_chaves and conn.execute("PRAGMA foreign_key_check").fetchone() is not None:
+                raise sqlite3.IntegrityError(f"Migração {versao} deixou chaves estrangeiras inválidas")
+            conn.execute(f"PRAGMA user_version = {versao}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if sem_chaves:
+                conn.execute("PRAGMA legacy_alter_table = OFF")
+                conn.execute("PRAGMA foreign_keys = ON")
+        aplicadas.append(versao)
+    return aplicadas
+
+
+def criar_tabelas():
+    """Prepara o banco na abertura do programa: perfil de PRAGMAs e migrações"""
+    # Modo de journal do perfil ativo (persistente no arquivo do banco)
+    with conexao() as conn:
+        modo = aplicar_perfil(conn)
+        migrar(conn)
+    if modo.upper() == 'WAL':
+        iniciar_checkpoint_periodico()
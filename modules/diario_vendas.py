@@ -0,0 +1,363 @@
+# Diário de vendas: registro local das vendas antes de chegarem ao banco
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import deque, namedtuple
+from datetime import datetime
+from modules import db
+
+CAMINHO_DIARIO = "database/diario_vendas.log"
+
+# itens: lista de (produto_id, quantidade, preco_unitario em centavos)
+RegistroVenda = namedtuple("RegistroVenda", "chave data cliente itens total")
+
+# Começo de uma linha do diário: CRC32 em hexadecimal + corpo JSON
+_INICIO_REGISTRO = re.compile(rb"[0-9a-f]{8} \{")
+
+
+def _codificar(registro):
+    """Uma linha do diário: CRC32 do corpo + corpo JSON"""
+    corpo = json.dumps({"chave": registro.chave, "data": registro.data, "cliente": registro.cliente,
+                        "itens": registro.itens}, ensure_ascii=False).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(corpo), corpo)
+
+
+def _decodificar(linha):
+    """RegistroVenda de uma linha, ou None se ela estiver incompleta/corrompida"""
+    if not linha.endswith(b"\n"):
+        return None
+    crc, _, corpo = linha[:-1].partition(b" ")
+    try:
+        if int(crc, 16) != zlib.crc32(corpo):
+            return None
+        dados = json.loads(corpo)
+        itens = [tuple(item) for item in dados["itens"]]
+        return _novo_registro(dados["chave"], dados["data"], dados["cliente"], itens)
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _novo_registro(chave, data, cliente, itens):
+    total = sum(quantidade * preco for _, quantidade, preco in itens)
+    return RegistroVenda(chave, data, cliente, itens, total)
+
+
+def _recuperar(linha):
+    """Separa o registro íntegro no fim de uma linha corrompida.
+
+    Uma escrita parcial seguida de outra deixa a venda seguinte colada no
+    lixo da anterior. Retorna (registro ou None, bytes perdidos).
+    """
+    for encontrado in _INICIO_REGISTRO.finditer(linha, 1):
+        registro = _decodificar(linha[encontrado.start():])
+        if registro is not None:
+            return registro, linha[:encontrado.start()]
+    return None, linha
+
+
+def ler_diario(caminho):
+    """Lê os registros válidos do diário.
+
+    Retorna (registros, tamanho_valido, corrompidas). Só uma última linha
+    sem quebra (escrita interrompida por uma queda) encerra a leitura:
+    ``tamanho_valido`` é o byte onde ela começa. Uma linha completa mas
+    corrompida (setor ruim, escrita parcial seguida de outras) é pulada,
+    sem perder as vendas depois dela, e seus bytes vão para
+    ``corrompidas``; se terminar com um registro íntegro, ele é recuperado.
+    """
+    registros, tamanho_valido, corrompidas = [], 0, []
+    try:
+        arquivo = open(caminho, "rb")
+    except FileNotFoundError:
+        return registros, 0, corrompidas
+    with arquivo:
+        for linha in arquivo:
+            if not linha.endswith(b"\n"):
+                break
+            registro = _decodificar(linha)
+            if registro is None:
+                registro, perdido = _recuperar(linha)
+                corrompidas.append(perdido)
+            if registro is not None:
+                registros.append(registro)
+            tamanho_valido += len(linha)
+    return registros, tamanho_valido, corrompidas
+
+
+class DiarioVendas:
+    """Diário local, só de acréscimo, de todas as vendas finalizadas.
+
+    ``registrar()`` acrescenta a venda ao arquivo (uma única escrita, já
+    no sistema operacional: sobrevive a uma queda do programa) e retorna
+    sem tocar no banco. Duas threads fazem o resto:
+
+    - fsync em lote: a cada ``intervalo_fsync`` segundos, um único fsync
+      torna duráveis todas as vendas escritas desde o anterior. Uma queda
+      de energia perde no máximo esse intervalo; ``sincronizar()`` força.
+    - aplicação no banco: grava as vendas pendentes no SQLite, em ordem, em
+      lotes de até ``tamanho_lote`` por transação. Banco travado (backup,
+      relatório longo) ou com erro não para o caixa: o lote é tentado de
+      novo com espera crescente até ``espera_maxima``.
+
+    Cada venda tem uma chave única (vendas.chave), então reaplicar o diário
+    inteiro, por exemplo ao abrir o programa após uma queda, não duplica
+    nada. Uma venda que o banco nunca vai aceitar (produto inexistente,
+    quantidade zero) vai para ``<caminho>.rejeitadas`` em vez de travar a
+    fila. Linhas corrompidas no meio do arquivo vão para
+    ``<caminho>.corrompidas`` e o diário é regravado sem elas ao abrir.
+    Quando todas as vendas já estão no banco e o arquivo passou de
+    ``limite_bytes``, ele é zerado (depois de um checkpoint do banco, para
+    que as vendas estejam duráveis lá antes de saírem daqui).
+    """
+
+    def __init__(self, caminho=CAMINHO_DIARIO, intervalo_fsync=0.02, tamanho_lote=200,
+                 espera_maxima=5.0, limite_bytes=4 * 1024 * 1024):
+        self.caminho = caminho
+        self.intervalo_fsync = intervalo_fsync
+        self.tamanho_lote = tamanho_lote
+        self.espera_maxima = espera_maxima
+        self.limite_bytes = limite_bytes
+        self._fd = None
+        self._lock = threading.Lock()
+        self._escrita = threading.Condition(self._lock)
+        self._pendentes = deque()      # registros ainda não aplicados no banco
+        self._escritos = 0
+        self._sincronizados = 0
+        self._parar = threading.Event()
+        self._threads = []
+        self.aplicadas = 0
+        self.repetidas = 0
+        self.rejeitadas = 0
+        self.falhas = 0
+        self.corrompidas = 0
+        self.ultimo_erro = None
+
+    def _isolar_corrompidas(self, registros, corrompidas):
+        """Guarda as linhas corrompidas à parte e regrava o diário só com as íntegras"""
+        with open(self.caminho + ".corrompidas", "ab") as arquivo:
+            arquivo.write(b"".join(linha if linha.endswith(b"\n") else linha + b"\n"
+                                   for linha in corrompidas))
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(b"".join(_codificar(registro) for registro in registros))
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, self.caminho)
+        self.corrompidas += len(corrompidas)
+        print(f"Diário de vendas: {len(corrompidas)} linha(s) corrompida(s) isolada(s) em "
+              f"{self.caminho}.corrompidas")
+        return os.path.getsize(self.caminho)
+
+    def abrir(self):
+        """Recupera o diário existente e inicia as threads.
+
+        Uma linha final incompleta (queda no meio de uma escrita) é
+        descartada; linhas corrompidas no meio do arquivo são isoladas sem
+        perder as vendas seguintes. As vendas válidas voltam para a fila de
+        aplicação, menos as que o banco já recusou antes.
+        """
+        pasta = os.path.dirname(self.caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        registros, tamanho_valido, corrompidas = ler_diario(self.caminho)
+        if corrompidas:
+            tamanho_valido = self._isolar_corrompidas(registros, corrompidas)
+        self._fd = os.open(self.caminho, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        if os.fstat(self._fd).st_size != tamanho_valido:
+            os.ftruncate(self._fd, tamanho_valido)
+            os.fsync(self._fd)
+        recusadas = {registro.chave for registro in ler_diario(self.caminho + ".rejeitadas")[0]}
+        self._pendentes.extend(registro for registro in registros if registro.chave not in recusadas)
+        self._parar.clear()
+        for alvo, nome in ((self._loop_fsync, "diario-fsync"), (self._loop_aplicar, "diario-aplicar")):
+            thread = threading.Thread(target=alvo, name=nome, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def registrar(self, itens, cliente=None, data=None):
+        """Acrescenta uma venda ao diário e a coloca na fila do banco.
+
+        ``itens`` é uma sequência de (produto_id, quantidade, preco_unitario),
+        com o preço em centavos. Retorna o RegistroVenda (com a chave gerada).
+        """
+        itens = [(int(produto_id), quantidade, preco) for produto_id, quantidade, preco in itens]
+        if not itens:
+            raise ValueError("A venda não possui itens")
+        if not all(isinstance(preco, int) for _, _, preco in itens):
+            raise TypeError("Preços das vendas devem estar em centavos (int)")
+        registro = _novo_registro(uuid.uuid4().hex, data or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                  cliente, itens)
+        linha = _codificar(registro)
+        with self._lock:
+            if self._fd is None:
+                raise RuntimeError("Diário de vendas está fechado")
+            # O_APPEND + uma única escrita: linhas de vendas diferentes não se misturam
+            os.write(self._fd, linha)
+            self._escritos += 1
+            self._pendentes.append(registro)
+            self._escrita.notify_all()
+        return registro
+
+    def _loop_fsync(self):
+        while not self._parar.is_set():
+            with self._lock:
+                while self._escritos == self._sincronizados and not self._parar.is_set():
+                    self._escrita.wait(0.5)
+            # Janela do lote: as vendas que chegarem agora entram no mesmo fsync
+            self._parar.wait(self.intervalo_fsync)
+            self.sincronizar()
+
+    def sincronizar(self):
+        """Força o fsync de tudo que já foi registrado"""
+        with self._lock:
+            escritos = self._escritos
+            if escritos == self._sincronizados or self._fd is None:
+                return
+            fd = self._fd
+        os.fsync(fd)
+        with self._lock:
+            self._sincronizados = max(self._sincronizados, escritos)
+            self._escrita.notify_all()
+
+    def _aplicar(self, lote):
+        from modules.vendas import gravar_venda
+
+        with db.transacao(imediata=True) as conn:
+            gravadas = [gravar_venda(conn, r.itens, r.cliente, r.data, r.chave) for r in lote]
+        return sum(venda_id is not None for venda_id in gravadas)
+
+    @staticmethod
+    def _definitivo(erro):
+        """Erro que se repete a cada tentativa da mesma venda (e não do banco)"""
+        if isinstance(erro, sqlite3.IntegrityError):
+            return True
+        return not isinstance(erro, (sqlite3.Error, RuntimeError, TimeoutError, OSError))
+
+    def _aplicar_uma_a_uma(self, lote):
+        """Aplica venda por venda; retorna (gravadas, rejeitadas)"""
+        gravadas, rejeitadas = 0, []
+        for registro in lote:
+            try:
+                gravadas += self._aplicar([registro])
+            except Exception as e:
+                if not self._definitivo(e):
+                    raise
+                print(f"Venda {registro.chave} rejeitada pelo banco: {e}")
+                rejeitadas.append(registro)
+        if rejeitadas:
+            with open(self.caminho + ".rejeitadas", "ab") as arquivo:
+                arquivo.write(b"".join(_codificar(registro) for registro in rejeitadas))
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+        return gravadas, rejeitadas
+
+    def _loop_aplicar(self):
+        espera = 0.05
+        while not self._parar.is_set():
+            with self._lock:
+                lote = [self._pendentes[i] for i in range(min(self.tamanho_lote, len(self._pendentes)))]
+                if not lote:
+                    self._escrita.wait(0.5)
+                    continue
+            try:
+                try:
+                    gravadas, rejeitadas = self._aplicar(lote), []
+                except Exception as e:
+                    if not self._definitivo(e):
+                        raise
+                    # Alguma venda do lote nunca vai entrar (produto
+                    # inexistente, venda sem itens): separa venda por venda
+                    gravadas, rejeitadas = self._aplicar_uma_a_uma(lote)
+            except Exception as e:
+                # Banco travado, corrompido ou pool esgotado: tenta de novo
+                # depois. Nenhum erro pode parar a thread, senão as vendas
+                # seguintes só se acumulariam no diário
+                self.falhas += 1
+                self.ultimo_erro = e
+                self._parar.wait(espera)
+                espera = min(espera * 2, self.espera_maxima)
+                continue
+            espera = 0.05
+            with self._lock:
+                for _ in lote:
+                    self._pendentes.popleft()
+                self.aplicadas += gravadas
+                self.rejeitadas += len(rejeitadas)
+                self.repetidas += len(lote) - gravadas - len(rejeitadas)
+                self.ultimo_erro = None
+                self._escrita.notify_all()
+            self._compactar()
+
+    def _compactar(self):
+        """Zera o diário se tudo já estiver no banco e ele tiver crescido"""
+        with self._lock:
+            if self._pendentes or os.fstat(self._fd).st_size < self.limite_bytes:
+                return
+            escritos = self._escritos
+        try:
+            with db.conexao() as conn:
+                ocupado, _, _ = db.executar_checkpoint(conn, "FULL")
+        except sqlite3.Error:
+            return
+        if ocupado:
+            return
+        with self._lock:
+            # Uma venda nova chegou durante o checkpoint: fica para a próxima vez
+            if self._pendentes or self._escritos != escritos:
+                return
+            os.ftruncate(self._fd, 0)
+            os.fsync(self._fd)
+            self._sincronizados = self._escritos
+
+    def pendentes(self):
+        """Vendas registradas que ainda não chegaram ao banco"""
+        with self._lock:
+            return len(self._pendentes)
+
+    def aguardar(self, timeout=None):
+        """Espera todas as vendas chegarem ao banco; False se o tempo acabar"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._pendentes:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._escrita.wait(restante)
+        return True
+
+    def fechar(self):
+        """Sincroniza o arquivo e para as threads (pendentes continuam no diário)"""
+        self._parar.set()
+        with self._lock:
+            self._escrita.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._threads = []
+        self.sincronizar()
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+_diario = None
+_diario_lock = threading.Lock()
+
+
+def obter_diario():
+    """Diário de vendas da aplicação (aberto e reaplicado na primeira chamada)"""
+    global _diario
+    with _diario_lock:
+        if _diario is None:
+            _diario = DiarioVendas().abrir()
+            atexit.register(_diario.fechar)
+    return _diario
@@ -4,14 +4,220 @@ Módulo integrado de gestão de inventário
 """
 
 import customtkinter as ctk
-from tkinter import messagebox, filedialog
+from functools import partial
+from tkinter import ttk, messagebox, filedialog
 import sqlite3
-import re
 from datetime import datetime
-from modules.db import conectar
-from PIL import Image, ImageTk
+from modules.catalogo import obter_indice
+from modules.produtos import (
+    COLUNAS_GRADE, Produto, chave_pagina, contar_produtos,
+    listar_fornecedores, pagina_produtos, salvar_produtos)
+from modules.validacao import (
+    CAMPOS_PRODUTO, preparar_produto, somente_digitos, validar_campo, validar_produto)
+from utils.dinheiro import Dinheiro, formatar_moeda
+from utils.helpers import executar_em_segundo_plano
+from utils.imagens import obter_cache_miniaturas, obter_armazem_imagens
 import os
 
+# Espera após a última tecla antes de validar o campo digitado
+ATRASO_VALIDACAO_MS = 300
+
+
+class GradeProdutos(ctk.CTkFrame):
+    """Grade dos produtos cadastrados com rolagem virtualizada.
+
+    O Treeview nunca guarda mais que ``max_paginas`` páginas de
+    ``tamanho_pagina`` linhas. Rolando perto do fim, a página seguinte é
+    buscada por chave (produtos.pagina_produtos) em segundo plano e a do
+    topo é descartada; rolando para cima acontece o inverso. Desenho e
+    consulta custam o mesmo com 100 ou 100 mil produtos.
+    """
+
+    ROTULOS = {
+        'id': ("Código", 70), 'nome': ("Nome", 260), 'categoria': ("Categoria", 130),
+        'codigo_barras': ("EAN", 130), 'quantidade': ("Qtd", 70),
+        'preco_venda': ("Preço (R$)", 90), 'fornecedor_id': ("Fornecedor", 160),
+    }
+    ORDENS = {"Nome": "nome", "Código": "id", "Quantidade": "quantidade"}
+
+    def __init__(self, parent, tamanho_pagina=100, max_paginas=3, altura=12):
+        super().__init__(parent, fg_color="transparent")
+        self.tamanho_pagina = tamanho_pagina
+        self.max_paginas = max_paginas
+        self.paginas = []            # (linhas, ids dos itens no Treeview), em ordem
+        self.ha_anteriores = False
+        self.ha_seguintes = False
+        self.filtros = {}
+        self.ordem = "nome"
+        self.nomes_fornecedores = {}
+        self._tarefa = None
+        self._tarefa_contagem = None
+
+        self.categoria_var = ctk.StringVar(value="Todas")
+        self.fornecedor_var = ctk.StringVar(value="Todos")
+        self.ordem_var = ctk.StringVar(value="Nome")
+        self.estoque_baixo_var = ctk.BooleanVar(value=False)
+
+        # Filtros
+        barra = ctk.CTkFrame(self, fg_color="transparent")
+        barra.pack(fill="x", pady=(0, 8))
+        self.categoria_combo = ctk.CTkComboBox(
+            barra, variable=self.categoria_var, values=["Todas"], state="readonly",
+            width=160, command=lambda _: self.recarregar())
+        self.categoria_combo.pack(side="left", padx=(0, 8))
+        self.fornecedor_combo = ctk.CTkComboBox(
+            barra, variable=self.fornecedor_var, values=["Todos"], state="readonly",
+            width=200, command=lambda _: self.recarregar())
+        self.fornecedor_combo.pack(side="left", padx=(0, 8))
+        ctk.CTkCheckBox(
+            barra, text="Estoque baixo", variable=self.estoque_baixo_var,
+            command=self.recarregar).pack(side="left", padx=(0, 8))
+        ctk.CTkLabel(barra, text="Ordenar por:").pack(side="left", padx=(8, 4))
+        ctk.CTkComboBox(
+            barra, variable=self.ordem_var, values=list(self.ORDENS), state="readonly",
+            width=120, command=lambda _: self.recarregar()).pack(side="left")
+        self.lbl_total = ctk.CTkLabel(barra, text="")
+        self.lbl_total.pack(side="right")
+
+        # Grade
+        corpo = ctk.CTkFrame(self, fg_color="transparent")
+        corpo.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(corpo, columns=COLUNAS_GRADE, show="headings", height=altura)
+        for coluna in COLUNAS_GRADE:
+            rotulo, largura = self.ROTULOS[coluna]
+            self.tree.heading(coluna, text=rotulo)
+            self.tree.column(coluna, width=largura, anchor="w" if coluna in ("nome", "categoria") else "center")
+        self.tree.tag_configure("baixo", foreground="#dc3545")
+        self.scroll = ttk.Scrollbar(corpo, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._ao_rolar)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scroll.pack(side="right", fill="y")
+
+        # A roda do mouse rola só a grade, não o formulário em volta
+        for evento in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(evento, self._rolar_roda)
+
+    def definir_categorias(self, categorias):
+        self.categoria_combo.configure(values=["Todas"] + list(categorias))
+
+    def definir_fornecedores(self, fornecedores):
+        """Recebe a lista de Fornecedor"""
+        self.nomes_fornecedores = {fornecedor.id: fornecedor.nome for fornecedor in fornecedores}
+        self.fornecedor_combo.configure(
+            values=["Todos"] + [fornecedor.rotulo for fornecedor in fornecedores])
+
+    def _ler_filtros(self):
+        fornecedor_id = None
+        if "ID: " in self.fornecedor_var.get():
+            fornecedor_id = int(self.fornecedor_var.get().split("ID: ")[1].split(")")[0])
+        categoria = self.categoria_var.get()
+        return {
+            'categoria': None if categoria == "Todas" else categoria,
+            'fornecedor_id': fornecedor_id,
+            'estoque_baixo': self.estoque_baixo_var.get(),
+        }
+
+    def _cancelar_tarefas(self):
+        for tarefa in (self._tarefa, self._tarefa_contagem):
+            if tarefa is not None:
+                tarefa.cancelar()
+        self._tarefa = self._tarefa_contagem = None
+
+    def recarregar(self):
+        """Aplica os filtros atuais e volta ao início da lista"""
+        self._cancelar_tarefas()
+        self.filtros = self._ler_filtros()
+        self.ordem = self.ORDENS[self.ordem_var.get()]
+        self.tree.delete(*self.tree.get_children())
+        self.paginas = []
+        self.ha_anteriores = self.ha_seguintes = False
+        self.lbl_total.configure(text="Carregando...")
+        self._buscar("primeira")
+        self._tarefa_contagem = executar_em_segundo_plano(
+            self, partial(contar_produtos, **self.filtros), ao_concluir=self._mostrar_total)
+
+    def _mostrar_total(self, total):
+        self._tarefa_contagem = None
+        self.lbl_total.configure(text=f"{total} produto(s)")
+
+    def _buscar(self, direcao):
+        parametros = dict(self.filtros, limite=self.tamanho_pagina, ordem=self.ordem)
+        if direcao == "seguinte":
+            parametros['apos'] = chave_pagina(self.paginas[-1][0][-1], self.ordem)
+        elif direcao == "anterior":
+            parametros['antes'] = chave_pagina(self.paginas[0][0][0], self.ordem)
+        self._tarefa = executar_em_segundo_plano(
+            self, partial(pagina_produtos, **parametros),
+            ao_concluir=lambda linhas: self._receber(direcao, linhas),
+            ao_falhar=self._falhar)
+
+    def _falhar(self, erro):
+        self._tarefa = None
+        self.lbl_total.configure(text="Erro ao carregar produtos")
+        print(f"Erro ao carregar produtos: {erro}")
+
+    def _formatar(self, produto):
+        return (produto.id, produto.nome, produto.categoria, produto.codigo_barras or "",
+                produto.quantidade, produto.preco_venda.formatar(simbolo=False),
+                self.nomes_fornecedores.get(produto.fornecedor_id, ""))
+
+    def _inserir(self, posicao, produtos):
+        ids = []
+        for deslocamento, produto in enumerate(produtos):
+            tags = ("baixo",) if produto.estoque_baixo else ()
+            indice = "end" if posicao == "end" else posicao + deslocamento
+            ids.append(self.tree.insert("", indice, values=self._formatar(produto), tags=tags))
+        return ids
+
+    def _receber(self, direcao, linhas):
+        """Encaixa a página recebida e descarta a do lado oposto se preciso"""
+        self._tarefa = None
+        completa = len(linhas) == self.tamanho_pagina
+
+        # Posição atual, para manter as mesmas linhas visíveis após a troca
+        total = len(self.tree.get_children())
+        primeiro_visivel = round(self.tree.yview()[0] * total) if total else 0
+        deslocamento = 0
+
+        if direcao == "anterior":
+            self.ha_anteriores = completa
+            if not linhas:
+                return
+            self.paginas.insert(0, (linhas, self._inserir(0, linhas)))
+            deslocamento += len(linhas)
+            if len(self.paginas) > self.max_paginas:
+                self.tree.delete(*self.paginas.pop()[1])
+                self.ha_seguintes = True
+        else:
+            self.ha_seguintes = completa
+            if not linhas:
+                return
+            self.paginas.append((linhas, self._inserir("end", linhas)))
+            if len(self.paginas) > self.max_paginas:
+                removida = self.paginas.pop(0)[1]
+                self.tree.delete(*removida)
+                deslocamento -= len(removida)
+                self.ha_anteriores = True
+
+        if deslocamento:
+            self.tree.yview_moveto((primeiro_visivel + deslocamento) / len(self.tree.get_children()))
+
+    def _ao_rolar(self, primeiro, ultimo):
+        """yscrollcommand do Treeview: atualiza a barra e pede mais linhas"""
+        self.scroll.set(primeiro, ultimo)
+        if self._tarefa is not None or not self.paginas:
+            return
+        if float(ultimo) > 0.9 and self.ha_seguintes:
+            self._buscar("seguinte")
+        elif float(primeiro) < 0.1 and self.ha_anteriores:
+            self._buscar("anterior")
+
+    def _rolar_roda(self, event):
+        passo = -3 if event.num == 4 or event.delta > 0 else 3
+        self.tree.yview_scroll(passo, "units")
+        return "break"
+
+
 class TelaEstoque(ctk.CTkFrame):
     def __init__(self, parent):
         super().__init__(parent)
@@ -52,6 +258,7 @@ class TelaEstoque(ctk.CTkFrame):
         # Carregar dados iniciais
         self.load_categories()
         self.load_suppliers()
+        self.product_grid.recarregar()
         
     def setup_variables(self):
         """Inicializa as variáveis do formulário"""
@@ -78,6 +285,11 @@ class TelaEstoque(ctk.CTkFrame):
         # Imagem
         self.imagem_path = None
         self.current_photo = None  # Referência para a imagem atual
+        self.preview_task = None   # Miniatura sendo gerada em segundo plano
+        
+        # Validação campo a campo: campo -> (entry, label de erro, variável)
+        self.field_feedback = {}
+        self.validation_jobs = {}  # campo -> after() agendado
         
     def create_header(self):
         """Cria o cabeçalho da tela"""
@@ -142,6 +354,25 @@ class TelaEstoque(ctk.CTkFrame):
         # Seção 6: Controles
         self.create_controls_section(sections_container, row=2, column=1)
         
+        # Seção 7: Produtos cadastrados (largura total)
+        self.create_products_section(sections_container, row=3)
+        
+    def create_products_section(self, parent, row):
+        """Cria a grade de produtos cadastrados com filtros"""
+        section_frame = ctk.CTkFrame(parent, fg_color=self.colors['card_bg'], corner_radius=15)
+        section_frame.grid(row=row, column=0, columnspan=2, padx=12, pady=12, sticky="nsew")
+        
+        title = ctk.CTkLabel(
+            section_frame,
+            text="📋 Produtos Cadastrados",
+            font=ctk.CTkFont(size=18, weight="bold"),
+            text_color=self.colors['text_primary']
+        )
+        title.pack(pady=(15, 12))
+        
+        self.product_grid = GradeProdutos(section_frame)
+        self.product_grid.pack(fill="both", expand=True, padx=18, pady=(0, 15))
+        
     def create_basic_info_section(self, parent, row, column):
         """Cria a seção de informações básicas com layout otimizado"""
         section_frame = ctk.CTkFrame(parent, fg_color=self.colors['card_bg'], corner_radius=15)
@@ -161,7 +392,8 @@ class TelaEstoque(ctk.CTkFrame):
             section_frame,
             "Nome do Produto *",
             self.nome_var,
-            placeholder="Digite o nome do produto"
+            placeholder="Digite o nome do produto",
+            campo="nome"
         )
         
         # Descrição com altura reduzida
@@ -217,6 +449,8 @@ class TelaEstoque(ctk.CTkFrame):
         )
         validate_btn.pack(side="right", padx=(10, 0))
         
+        self.add_field_feedback(codigo_frame, self.codigo_entry, self.codigo_barras_var, "codigo_barras")
+        
     def create_stock_section(self, parent, row, column):
         """Cria a seção de estoque com layout otimizado"""
         section_frame = ctk.CTkFrame(parent, fg_color=self.colors['card_bg'], corner_radius=15)
@@ -235,14 +469,16 @@ class TelaEstoque(ctk.CTkFrame):
         self.create_numeric_field(
             section_frame,
             "Quantidade Inicial",
-            self.quantidade_var
+            self.quantidade_var,
+            campo="quantidade"
         )
         
         # Estoque mínimo
         self.create_numeric_field(
             section_frame,
             "Estoque Mínimo",
-            self.estoque_minimo_var
+            self.estoque_minimo_var,
+            campo="estoque_minimo"
         )
         
         # Localização
@@ -271,14 +507,16 @@ class TelaEstoque(ctk.CTkFrame):
         self.preco_custo_entry = self.create_money_field(
             section_frame,
             "Preço de Custo *",
-            self.preco_custo_var
+            self.preco_custo_var,
+            campo="preco_custo"
         )
         
         # Preço de venda
         self.preco_venda_entry = self.create_money_field(
             section_frame,
             "Preço de Venda *",
-            self.preco_venda_var
+            self.preco_venda_var,
+            campo="preco_venda"
         )
         
         # Margem de lucro (calculada) com espaçamento otimizado
@@ -422,7 +660,7 @@ class TelaEstoque(ctk.CTkFrame):
         buttons_frame.pack(fill="both", expand=True, padx=18, pady=15)
         
         # Botão Salvar com altura reduzida
-        save_btn = ctk.CTkButton(
+        self.save_btn = ctk.CTkButton(
             buttons_frame,
             text="💾 Salvar Produto",
             height=45,
@@ -432,7 +670,7 @@ class TelaEstoque(ctk.CTkFrame):
             text_color=self.colors['text_light'],
             command=self.save_product
         )
-        save_btn.pack(fill="x", pady=(0, 8))
+        self.save_btn.pack(fill="x", pady=(0, 8))
         
         # Botão Cancelar com altura reduzida
         cancel_btn = ctk.CTkButton(
@@ -456,9 +694,21 @@ class TelaEstoque(ctk.CTkFrame):
             text_color=self.colors['text_primary'],
             command=self.clear_form
         )
-        clear_btn.pack(fill="x")
+        clear_btn.pack(fill="x", pady=(0, 8))
+        
+        # Importação em lote (planilha do fornecedor)
+        self.import_btn = ctk.CTkButton(
+            buttons_frame,
+            text="📥 Importar Planilha",
+            height=35,
+            fg_color=self.colors['accent'],
+            hover_color=self.colors['primary_hover'],
+            text_color=self.colors['text_light'],
+            command=self.import_products
+        )
+        self.import_btn.pack(fill="x")
         
-    def create_field(self, parent, label_text, variable, placeholder=""):
+    def create_field(self, parent, label_text, variable, placeholder="", campo=None):
         """Cria um campo de entrada padrão com espaçamento otimizado"""
         field_frame = ctk.CTkFrame(parent, fg_color="transparent")
         field_frame.pack(fill="x", padx=18, pady=4)
@@ -483,9 +733,12 @@ class TelaEstoque(ctk.CTkFrame):
         if placeholder:
             entry.insert(0, placeholder)
         
+        if campo:
+            self.add_field_feedback(field_frame, entry, variable, campo)
+        
         return entry
         
-    def create_numeric_field(self, parent, label_text, variable):
+    def create_numeric_field(self, parent, label_text, variable, campo=None):
         """Cria um campo numérico com espaçamento otimizado"""
         field_frame = ctk.CTkFrame(parent, fg_color="transparent")
         field_frame.pack(fill="x", padx=18, pady=4)
@@ -511,9 +764,12 @@ class TelaEstoque(ctk.CTkFrame):
         # Validação numérica
         entry.bind("<KeyRelease>", lambda e: self.validate_numeric(variable))
         
+        if campo:
+            self.add_field_feedback(field_frame, entry, variable, campo)
+        
         return entry
         
-    def create_money_field(self, parent, label_text, variable):
+    def create_money_field(self, parent, label_text, variable, campo=None):
         """Cria um campo monetário com máscara e espaçamento otimizado"""
         field_frame = ctk.CTkFrame(parent, fg_color="transparent")
         field_frame.pack(fill="x", padx=18, pady=4)
@@ -550,8 +806,48 @@ class TelaEstoque(ctk.CTkFrame):
         # Aplicar máscara monetária
         entry.bind("<KeyRelease>", lambda e: self.apply_money_mask(variable))
         
+        if campo:
+            self.add_field_feedback(field_frame, entry, variable, campo)
+        
         return entry
         
+    def add_field_feedback(self, field_frame, entry, variable, campo):
+        """Mostra abaixo do campo o erro de validação, quando o usuário para de digitar"""
+        error_label = ctk.CTkLabel(
+            field_frame,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color=self.colors['danger']
+        )
+        error_label.pack(anchor="w")
+        self.field_feedback[campo] = (entry, error_label, variable)
+        entry.bind("<KeyRelease>", lambda e: self.schedule_field_validation(campo), add="+")
+        
+    def schedule_field_validation(self, campo):
+        """Reagenda a validação do campo a cada tecla (debounce)"""
+        job = self.validation_jobs.pop(campo, None)
+        if job is not None:
+            self.after_cancel(job)
+        self.validation_jobs[campo] = self.after(
+            ATRASO_VALIDACAO_MS, lambda: self.show_field_feedback(campo))
+        
+    def show_field_feedback(self, campo):
+        """Valida um único campo com as regras de validacao e atualiza o aviso"""
+        self.validation_jobs.pop(campo, None)
+        entry, error_label, variable = self.field_feedback[campo]
+        erro = validar_campo(campo, variable.get())
+        entry.configure(border_color=self.colors['danger'] if erro else self.colors['border'])
+        error_label.configure(text=erro or "")
+        
+    def reset_field_feedback(self):
+        """Cancela validações pendentes e apaga os avisos"""
+        for job in self.validation_jobs.values():
+            self.after_cancel(job)
+        self.validation_jobs.clear()
+        for entry, error_label, _ in self.field_feedback.values():
+            entry.configure(border_color=self.colors['border'])
+            error_label.configure(text="")
+        
     def create_combobox(self, parent, label_text, variable, values):
         """Cria um combobox com espaçamento otimizado"""
         field_frame = ctk.CTkFrame(parent, fg_color="transparent")
@@ -597,18 +893,16 @@ class TelaEstoque(ctk.CTkFrame):
             "Outros"
         ]
         self.categoria_combo.configure(values=categories)
+        self.product_grid.definir_categorias(categories)
         
     def load_suppliers(self):
         """Carrega os fornecedores do banco de dados"""
         try:
-            conn = conectar()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nome FROM fornecedores ORDER BY nome")
-            suppliers = cursor.fetchall()
-            conn.close()
+            suppliers = listar_fornecedores()
             
-            supplier_list = [f"{supplier[1]} (ID: {supplier[0]})" for supplier in suppliers]
+            supplier_list = [supplier.rotulo for supplier in suppliers]
             self.fornecedor_combo.configure(values=supplier_list)
+            self.product_grid.definir_fornecedores(suppliers)
             
         except Exception as e:
             print(f"Erro ao carregar fornecedores: {e}")
@@ -617,36 +911,23 @@ class TelaEstoque(ctk.CTkFrame):
         """Valida entrada numérica"""
         value = variable.get()
         # Remove caracteres não numéricos
-        numeric_value = re.sub(r'[^\d]', '', value)
+        numeric_value = somente_digitos(value)
         if value != numeric_value:
             variable.set(numeric_value)
             
     def apply_money_mask(self, variable):
         """Aplica máscara monetária"""
-        value = variable.get().replace(',', '').replace('.', '')
-        # Remove caracteres não numéricos
-        numeric_value = re.sub(r'[^\d]', '', value)
-        
-        if numeric_value:
-            # Converte para formato monetário
-            if len(numeric_value) == 1:
-                formatted = f"0,0{numeric_value}"
-            elif len(numeric_value) == 2:
-                formatted = f"0,{numeric_value}"
-            else:
-                formatted = f"{numeric_value[:-2]},{numeric_value[-2:]}"
+        # Os dígitos digitados são os centavos: '1', '12', '1234' -> 0,01 / 0,12 / 12,34
+        numeric_value = somente_digitos(variable.get())
+        formatted = formatar_moeda(int(numeric_value or 0), simbolo=False)
+        if formatted != variable.get():
             variable.set(formatted)
-        else:
-            variable.set("0,00")
             
     def calculate_margin(self, *args):
         """Calcula a margem de lucro automaticamente"""
         try:
-            custo_str = self.preco_custo_var.get().replace(',', '.')
-            venda_str = self.preco_venda_var.get().replace(',', '.')
-            
-            custo = float(custo_str) if custo_str else 0
-            venda = float(venda_str) if venda_str else 0
+            custo = Dinheiro.de_texto(self.preco_custo_var.get() or "0")
+            venda = Dinheiro.de_texto(self.preco_venda_var.get() or "0")
             
             if custo > 0:
                 margem = ((venda - custo) / custo) * 100
@@ -665,13 +946,14 @@ class TelaEstoque(ctk.CTkFrame):
             messagebox.showwarning("Aviso", "Digite um código de barras para validar.")
             return
             
-        # Validação básica de EAN-13
-        if len(codigo) == 13 and codigo.isdigit():
+        # Mesma regra do cadastro e da importação
+        erro = validar_campo("codigo_barras", codigo)
+        if erro:
+            messagebox.showwarning("Aviso", f"Código de barras inválido. {erro}.")
+        elif len(codigo) == 13:
             messagebox.showinfo("Sucesso", "Código de barras válido!")
-        elif len(codigo) == 8 and codigo.isdigit():
-            messagebox.showinfo("Sucesso", "Código EAN-8 válido!")
         else:
-            messagebox.showwarning("Aviso", "Código de barras inválido. Use EAN-8 (8 dígitos) ou EAN-13 (13 dígitos).")
+            messagebox.showinfo("Sucesso", "Código EAN-8 válido!")
             
     def select_image(self):
         """Seleciona uma imagem para o produto"""
@@ -691,26 +973,45 @@ class TelaEstoque(ctk.CTkFrame):
             
     def update_image_preview(self):
         """Atualiza o preview da imagem"""
-        if self.imagem_path and os.path.exists(self.imagem_path):
-            try:
-                # Carregar e redimensionar imagem
-                image = Image.open(self.imagem_path)
-                image = image.resize((180, 130), Image.Resampling.LANCZOS)
-                
-                # Converter para PhotoImage
-                photo = ImageTk.PhotoImage(image)
-                
-                # Armazenar referência da imagem na instância da classe
-                self.current_photo = photo
-                
-                # Atualizar preview
-                self.image_preview.configure(image=photo, text="")
-                
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao carregar imagem: {e}")
+        # Descartar um preview anterior que ainda esteja sendo gerado
+        if self.preview_task is not None:
+            self.preview_task.cancelar()
+            self.preview_task = None
+            
+        # imagem_path pode ser um arquivo recém-escolhido ou um digest do armazém
+        caminho = obter_armazem_imagens().resolver(self.imagem_path)
+        if caminho and os.path.exists(caminho):
+            # A miniatura vem do cache em disco ou é gerada em segundo plano,
+            # sem decodificar a foto original na thread da interface
+            self.preview_task = executar_em_segundo_plano(
+                self,
+                obter_cache_miniaturas().miniatura,
+                caminho,
+                ao_concluir=self.show_image_preview,
+                ao_falhar=lambda e: messagebox.showerror("Erro", f"Erro ao carregar imagem: {e}")
+            )
+            
+    def show_image_preview(self, image):
+        """Exibe a miniatura já pronta (executado na thread do Tk)"""
+        self.preview_task = None
+        
+        # PIL é importado só quando uma imagem é de fato exibida
+        from PIL import ImageTk
+        
+        # Converter para PhotoImage
+        photo = ImageTk.PhotoImage(image)
+        
+        # Armazenar referência da imagem na instância da classe
+        self.current_photo = photo
+        
+        # Atualizar preview
+        self.image_preview.configure(image=photo, text="")
                 
     def remove_image(self):
         """Remove a imagem selecionada"""
+        if self.preview_task is not None:
+            self.preview_task.cancelar()
+            self.preview_task = None
         self.imagem_path = None
         self.current_photo = None  # Limpar referência da imagem
         self.image_preview.configure(
@@ -718,97 +1019,126 @@ class TelaEstoque(ctk.CTkFrame):
             text="📷\nNenhuma imagem\nselecionada"
         )
         
-    def validate_form(self):
-        """Valida o formulário antes de salvar"""
-        errors = []
-        
-        # Campos obrigatórios
-        if not self.nome_var.get().strip():
-            errors.append("Nome do produto é obrigatório")
-            
-        if not self.categoria_var.get():
-            errors.append("Categoria é obrigatória")
-            
-        # Validar preços
-        try:
-            custo = float(self.preco_custo_var.get().replace(',', '.'))
-            if custo <= 0:
-                errors.append("Preço de custo deve ser maior que zero")
-        except ValueError:
-            errors.append("Preço de custo inválido")
-            
-        try:
-            venda = float(self.preco_venda_var.get().replace(',', '.'))
-            if venda <= 0:
-                errors.append("Preço de venda deve ser maior que zero")
-        except ValueError:
-            errors.append("Preço de venda inválido")
-            
-        # Validar código de barras se preenchido
-        codigo = self.codigo_barras_var.get().strip()
-        if codigo and not (len(codigo) in [8, 13] and codigo.isdigit()):
-            errors.append("Código de barras deve ter 8 ou 13 dígitos")
+    def get_form_data(self):
+        """Lê os campos do formulário em um dicionário campo -> texto"""
+        fornecedor_id = None
+        fornecedor_text = self.fornecedor_var.get()
+        if "ID: " in fornecedor_text:
+            fornecedor_id = fornecedor_text.split("ID: ")[1].split(")")[0]
             
-        return errors
+        return {
+            'nome': self.nome_var.get(),
+            'descricao': self.descricao_entry.get("1.0", "end-1c"),
+            'categoria': self.categoria_var.get(),
+            'codigo_barras': self.codigo_barras_var.get(),
+            'quantidade': self.quantidade_var.get(),
+            'estoque_minimo': self.estoque_minimo_var.get(),
+            'localizacao': self.localizacao_var.get(),
+            'preco_custo': self.preco_custo_var.get(),
+            'preco_venda': self.preco_venda_var.get(),
+            'margem_lucro': self.margem_lucro_var.get(),
+            'fornecedor_id': fornecedor_id,
+        }
+        
+    def validate_form(self):
+        """Valida o formulário antes de salvar (mesmas regras da importação)"""
+        return validar_produto(self.get_form_data())
         
     def save_product(self):
-        """Salva o produto no banco de dados"""
+        """Valida o formulário e grava o produto em segundo plano"""
         # Validar formulário
-        errors = self.validate_form()
+        linha, errors = preparar_produto(self.get_form_data())
         if errors:
+            for campo in self.field_feedback:
+                self.show_field_feedback(campo)
             messagebox.showerror("Erro de Validação", "\n".join(errors))
             return
             
-        try:
-            conn = conectar()
-            cursor = conn.cursor()
-            
-            # Extrair ID do fornecedor
-            fornecedor_id = None
-            if self.fornecedor_var.get():
-                fornecedor_text = self.fornecedor_var.get()
-                if "ID: " in fornecedor_text:
-                    fornecedor_id = int(fornecedor_text.split("ID: ")[1].split(")")[0])
-            
-            # Preparar dados
-            dados = (
-                self.nome_var.get().strip(),
-                self.descricao_entry.get("1.0", "end-1c"),
-                self.categoria_var.get(),
-                self.codigo_barras_var.get().strip() or None,
-                int(self.quantidade_var.get() or 0),
-                int(self.estoque_minimo_var.get() or 0),
-                self.localizacao_var.get().strip(),
-                float(self.preco_custo_var.get().replace(',', '.')),
-                float(self.preco_venda_var.get().replace(',', '.')),
-                float(self.margem_lucro_var.get().replace('%', '').replace(',', '.')),
-                fornecedor_id,
-                self.imagem_path
-            )
-            
-            # Inserir no banco
-            cursor.execute("""
-                INSERT INTO produtos (
-                    nome, descricao, categoria, codigo_barras, quantidade,
-                    estoque_minimo, localizacao, preco_custo, preco_venda,
-                    margem_lucro, fornecedor_id, imagem_path
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, dados)
-            
-            conn.commit()
-            conn.close()
-            
-            messagebox.showinfo("Sucesso", "Produto cadastrado com sucesso!")
-            self.clear_form()
-            
-        except sqlite3.IntegrityError as e:
-            if "codigo_barras" in str(e):
+        # Importar a foto (decodificar, reduzir, gerar WebP) e gravar no
+        # banco fica fora da thread do Tk, como o preview
+        self.save_btn.configure(state="disabled", text="⏳ Salvando...")
+        executar_em_segundo_plano(
+            self,
+            self.gravar_produto,
+            linha,
+            self.imagem_path,
+            ao_concluir=self.finish_save,
+            ao_falhar=self.fail_save
+        )
+        
+    @staticmethod
+    def gravar_produto(linha, imagem):
+        """Importa a imagem e grava o produto (executado fora da thread do Tk)"""
+        # A foto é copiada (reduzida) para o armazém da aplicação e o
+        # produto guarda apenas o digest, não o caminho escolhido
+        armazem = obter_armazem_imagens()
+        if imagem and not armazem.eh_digest(imagem):
+            imagem = armazem.importar(imagem)
+        
+        # Preparar dados
+        produto = Produto(**dict(zip(CAMPOS_PRODUTO, linha)), imagem_path=imagem)
+        
+        # Inserir no banco
+        salvar_produtos([produto])
+        return produto
+        
+    def finish_save(self, produto):
+        """Conclui o cadastro na thread do Tk"""
+        self.save_btn.configure(state="normal", text="💾 Salvar Produto")
+        
+        # Atualiza o índice do caixa apenas com o produto novo
+        obter_indice().invalidar(produto.id)
+        
+        messagebox.showinfo("Sucesso", "Produto cadastrado com sucesso!")
+        self.clear_form()
+        self.product_grid.recarregar()
+        
+    def fail_save(self, erro):
+        self.save_btn.configure(state="normal", text="💾 Salvar Produto")
+        if isinstance(erro, sqlite3.IntegrityError):
+            if "codigo_barras" in str(erro):
                 messagebox.showerror("Erro", "Código de barras já existe no sistema!")
             else:
-                messagebox.showerror("Erro", f"Erro de integridade: {e}")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao salvar produto: {e}")
+                messagebox.showerror("Erro", f"Erro de integridade: {erro}")
+        else:
+            messagebox.showerror("Erro", f"Erro ao salvar produto: {erro}")
+            
+    def import_products(self):
+        """Importa produtos de um CSV/XLSX em segundo plano"""
+        file_path = filedialog.askopenfilename(
+            title="Importar Produtos",
+            filetypes=[
+                ("Planilhas", "*.csv *.xlsx"),
+                ("CSV", "*.csv"),
+                ("Excel", "*.xlsx"),
+            ]
+        )
+        if not file_path:
+            return
             
+        from modules.importacao import importar_produtos
+        
+        self.import_btn.configure(state="disabled", text="⏳ Importando...")
+        executar_em_segundo_plano(
+            self,
+            importar_produtos,
+            file_path,
+            ao_concluir=self.finish_import,
+            ao_falhar=self.fail_import
+        )
+        
+    def finish_import(self, resultado):
+        """Mostra o relatório da importação"""
+        from modules.importacao import formatar_relatorio
+        
+        self.import_btn.configure(state="normal", text="📥 Importar Planilha")
+        self.product_grid.recarregar()
+        messagebox.showinfo("Importação Concluída", formatar_relatorio(resultado))
+        
+    def fail_import(self, erro):
+        self.import_btn.configure(state="normal", text="📥 Importar Planilha")
+        messagebox.showerror("Erro", f"Erro ao importar produtos: {erro}")
+        
     def clear_form(self):
         """Limpa todos os campos do formulário"""
         # Limpar variáveis
@@ -830,6 +1160,9 @@ class TelaEstoque(ctk.CTkFrame):
         # Remover imagem
         self.remove_image()
         
+        # Apagar avisos de validação
+        self.reset_field_feedback()
+        
     def show_help(self):
         """Mostra ajuda sobre o cadastro de produtos"""
         help_text = """
@@ -0,0 +1,88 @@
+# Alertas de estoque baixo (quantidade abaixo do estoque mínimo de cada produto)
+import threading
+from collections import namedtuple
+from modules import db
+from modules.produtos import pagina_produtos
+
+# baixo = 1 quando o produto entrou no estoque baixo, 0 quando saiu
+EventoEstoque = namedtuple("EventoEstoque", "id produto_id baixo quantidade estoque_minimo momento")
+MudancaEstoque = namedtuple("MudancaEstoque", "total eventos")
+
+
+def contar_estoque_baixo():
+    """Quantidade de produtos em alerta (contador mantido por gatilhos)"""
+    with db.conexao() as conn:
+        linha = conn.execute("SELECT valor FROM contadores WHERE nome = 'estoque_baixo'").fetchone()
+    return linha[0] if linha else 0
+
+
+def listar_estoque_baixo(limite=100, apos=None):
+    """Produtos em alerta por nome, lidos do índice parcial"""
+    return pagina_produtos(limite=limite, apos=apos, estoque_baixo=True)
+
+
+class MonitorEstoqueBaixo:
+    """Publica as mudanças no conjunto de produtos com estoque baixo.
+
+    Os gatilhos da tabela produtos registram em ``eventos_estoque`` cada
+    produto que entra ou sai do alerta (venda em qualquer caixa, entrada de
+    mercadoria, mínimo alterado). ``verificar()`` lê só os eventos depois
+    do último visto e pode rodar fora da thread do Tk; ``publicar()``
+    entrega a mudança aos assinantes e deve ser chamado onde os callbacks
+    podem rodar (no dashboard, na thread da interface).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ultimo_id = None
+        self._assinantes = []
+
+    def assinar(self, callback):
+        """Registra ``callback(mudanca)``; retorna a função que cancela o registro"""
+        self._assinantes.append(callback)
+
+        def cancelar():
+            if callback in self._assinantes:
+                self._assinantes.remove(callback)
+        return cancelar
+
+    def verificar(self):
+        """Retorna uma MudancaEstoque com os eventos novos, ou None.
+
+        A primeira chamada só marca a posição atual: o valor inicial do
+        card vem do contador, não do histórico de eventos.
+        """
+        with self._lock:
+            with db.conexao() as conn:
+                if self._ultimo_id is None:
+                    self._ultimo_id = conn.execute(
+                        "SELECT COALESCE(MAX(id), 0) FROM eventos_estoque").fetchone()[0]
+                    return None
+                eventos = [EventoEstoque(*linha) for linha in conn.execute("""
+                    SELECT id, produto_id, baixo, quantidade, estoque_minimo, momento
+                    FROM eventos_estoque WHERE id > ? ORDER BY id
+                """, (self._ultimo_id,))]
+                if not eventos:
+                    return None
+                total = conn.execute(
+                    "SELECT valor FROM contadores WHERE nome = 'estoque_baixo'").fetchone()[0]
+            self._ultimo_id = eventos[-1].id
+        return MudancaEstoque(total, eventos)
+
+    def publicar(self, mudanca):
+        """Entrega a mudança a todos os assinantes"""
+        if mudanca is None:
+            return
+        for callback in list(self._assinantes):
+            try:
+                callback(mudanca)
+            except Exception as e:
+                print(f"Erro ao publicar alerta de estoque: {e}")
+
+
+_monitor = MonitorEstoqueBaixo()
+
+
+def obter_monitor():
+    """Retorna o monitor de estoque baixo compartilhado pela aplicação"""
+    return _monitor
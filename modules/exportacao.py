@@ -0,0 +1,256 @@
+# Exportação de produtos e vendas para CSV / JSON Lines
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from collections import namedtuple
+from modules import db
+
+ResultadoExportacao = namedtuple("ResultadoExportacao", "linhas ultimo_id segundos caminho")
+
+# Tabela -> (consulta base, coluna de id para ordenação/retomada, coluna de data)
+CONSULTAS = {
+    "produtos": ("SELECT p.* FROM produtos p", "p.id", "p.data_cadastro"),
+    "vendas": ("SELECT v.* FROM vendas v", "v.id", "v.data"),
+    "venda_itens": (
+        "SELECT vi.* FROM venda_itens vi JOIN vendas v ON v.id = vi.venda_id",
+        "vi.id", "v.data"),
+}
+
+# Tabela -> consulta dos ids extremos de um período. Com eles a exportação
+# lê só o trecho da tabela entre o primeiro e o último id do período, em vez
+# de percorrê-la do id da retomada até o fim. Vendas saem pelo índice de data
+# (idx_vendas_data) e itens pelo de itens por venda (idx_venda_itens_venda)
+_SQL_LIMITES = {
+    "vendas": "SELECT MIN(id), MAX(id) FROM vendas v WHERE {condicoes}",
+    "venda_itens": "SELECT MIN(id), MAX(id) FROM venda_itens WHERE venda_id BETWEEN ? AND ?",
+}
+
+TAMANHO_BLOCO = 5000
+
+# Colunas guardadas em centavos no banco; nos arquivos saem em reais (12.5),
+# o mesmo formato de antes da migração 12
+COLUNAS_DINHEIRO = {"preco_custo", "preco_venda", "total", "preco_unitario", "subtotal"}
+
+
+def _filtro_periodo(coluna_data, inicio, fim):
+    """Condições e parâmetros do período (o dia ``fim`` é incluído)"""
+    condicoes, parametros = [], []
+    if inicio:
+        condicoes.append(f"{coluna_data} >= ?")
+        parametros.append(str(inicio))
+    if fim:
+        condicoes.append(f"{coluna_data} < DATE(?, '+1 day')")
+        parametros.append(str(fim))
+    return condicoes, parametros
+
+
+def montar_consulta(tabela, inicio=None, fim=None, apos_id=0, ate_id=None):
+    """Monta o SELECT filtrado e ordenado pelo id (chave da retomada).
+
+    ``inicio`` e ``fim`` são datas 'AAAA-MM-DD' (o dia ``fim`` é incluído).
+    ``ate_id`` limita o id por cima (ver limites_periodo).
+    """
+    if tabela not in CONSULTAS:
+        raise ValueError(f"Tabela não exportável: {tabela}")
+    base, coluna_id, coluna_data = CONSULTAS[tabela]
+    condicoes, parametros = [f"{coluna_id} > ?"], [apos_id]
+    if ate_id is not None:
+        condicoes.append(f"{coluna_id} <= ?")
+        parametros.append(ate_id)
+    periodo, parametros_periodo = _filtro_periodo(coluna_data, inicio, fim)
+    condicoes += periodo
+    parametros += parametros_periodo
+    return f"{base} WHERE {' AND '.join(condicoes)} ORDER BY {coluna_id}", parametros
+
+
+def limites_periodo(conn, tabela, inicio=None, fim=None):
+    """Primeiro e último id de ``tabela`` no período, pelos índices.
+
+    Retorna (0, 0) se o período não tiver vendas, ou None se não houver
+    período ou a tabela não tiver índice de data (produtos).
+    """
+    if not (inicio or fim) or tabela not in _SQL_LIMITES:
+        return None
+    condicoes, parametros = _filtro_periodo("v.data", inicio, fim)
+    primeiro, ultimo = conn.execute(
+        _SQL_LIMITES["vendas"].format(condicoes=" AND ".join(condicoes)), parametros).fetchone()
+    if primeiro is None:
+        return 0, 0
+    if tabela == "venda_itens":
+        primeiro, ultimo = conn.execute(_SQL_LIMITES[tabela], (primeiro, ultimo)).fetchone()
+        if primeiro is None:
+            return 0, 0
+    return primeiro, ultimo
+
+
+def consulta_exportacao(conn, tabela, inicio=None, fim=None, apos_id=0):
+    """SELECT usado por exportar: com período, limitado aos ids dele"""
+    limites = limites_periodo(conn, tabela, inicio, fim)
+    if not limites:
+        return montar_consulta(tabela, inicio, fim, apos_id)
+    primeiro, ultimo = limites
+    return montar_consulta(tabela, inicio, fim, max(apos_id, primeiro - 1), ultimo)
+
+
+def ler_em_blocos(cursor, tamanho=TAMANHO_BLOCO):
+    """Gera listas de até ``tamanho`` linhas com fetchmany.
+
+    O SQLite entrega as linhas conforme o cursor avança, então apenas um
+    bloco existe em memória por vez, qualquer que seja o tamanho da tabela.
+    """
+    while True:
+        bloco = cursor.fetchmany(tamanho)
+        if not bloco:
+            return
+        yield bloco
+
+
+def _em_reais(bloco, posicoes):
+    """Troca os centavos das colunas em ``posicoes`` por reais"""
+    convertido = []
+    for linha in bloco:
+        linha = list(linha)
+        for posicao in posicoes:
+            if linha[posicao] is not None:
+                linha[posicao] = linha[posicao] / 100
+        convertido.append(linha)
+    return convertido
+
+
+def _codificar_csv(colunas, bloco, cabecalho):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=";", lineterminator="\n")
+    if cabecalho:
+        escritor.writerow(colunas)
+    escritor.writerows(bloco)
+    return buffer.getvalue()
+
+
+def _codificar_jsonl(colunas, bloco, cabecalho):
+    return "".join(
+        json.dumps(dict(zip(colunas, linha)), ensure_ascii=False, default=str) + "\n"
+        for linha in bloco)
+
+
+CODIFICADORES = {"csv": _codificar_csv, "jsonl": _codificar_jsonl}
+
+
+def _detectar_formato(caminho):
+    nome = caminho[:-3] if caminho.endswith(".gz") else caminho
+    return "jsonl" if nome.endswith((".jsonl", ".json")) else "csv"
+
+
+def _caminho_progresso(caminho):
+    return caminho + ".progresso"
+
+
+def _ler_progresso(caminho, filtros):
+    """Retorna (apos_id, linhas, bytes) de uma exportação interrompida.
+
+    ``filtros`` é o dicionário com tabela, período, formato e compressão:
+    se a exportação interrompida usou outros, ela recomeça do zero em vez de
+    misturar no mesmo arquivo linhas de filtros (ou formatos) diferentes.
+    """
+    try:
+        with open(_caminho_progresso(caminho), encoding="utf-8") as arquivo:
+            progresso = json.load(arquivo)
+    except (OSError, ValueError):
+        return 0, 0, 0
+    if any(progresso.get(chave) != valor for chave, valor in filtros.items()):
+        return 0, 0, 0
+    return progresso["apos_id"], progresso["linhas"], progresso["bytes"]
+
+
+def _gravar_progresso(caminho, filtros, apos_id, linhas, tamanho):
+    temporario = _caminho_progresso(caminho) + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(dict(filtros, apos_id=apos_id, linhas=linhas, bytes=tamanho), arquivo)
+    os.replace(temporario, _caminho_progresso(caminho))
+
+
+def exportar(tabela, caminho, formato=None, inicio=None, fim=None, comprimir=None,
+             retomar=False, tamanho_bloco=TAMANHO_BLOCO, ao_progredir=None):
+    """Exporta ``tabela`` (produtos, vendas ou venda_itens) para ``caminho``.
+
+    O formato (csv ou jsonl) e a compressão gzip são deduzidos da extensão
+    ('vendas.csv.gz', 'itens.jsonl') quando não informados. As linhas saem
+    em ordem de id, em blocos de ``tamanho_bloco`` lidos com fetchmany.
+    Preços e totais (COLUNAS_DINHEIRO) saem em reais, não em centavos.
+
+    Com período, vendas e itens são lidos só entre o primeiro e o último id
+    do período (limites_periodo), e não da tabela inteira.
+
+    Após cada bloco gravado, um arquivo ``<caminho>.progresso`` guarda o
+    último id, o tamanho do arquivo e os filtros usados. Com
+    ``retomar=True`` uma exportação interrompida com os mesmos filtros
+    continua de onde parou: o arquivo é truncado no último bloco completo
+    e a consulta recomeça depois daquele id. Com gzip, cada
+    bloco é um membro gzip independente, então o arquivo truncado continua
+    válido. O arquivo de progresso é apagado quando a exportação termina.
+
+    ``ao_progredir(linhas, ultimo_id)`` é chamado após cada bloco.
+    Retorna um ResultadoExportacao.
+    """
+    formato = formato or _detectar_formato(caminho)
+    if formato not in CODIFICADORES:
+        raise ValueError(f"Formato desconhecido: {formato}")
+    codificar = CODIFICADORES[formato]
+    if comprimir is None:
+        comprimir = caminho.endswith(".gz")
+
+    filtros = {"tabela": tabela, "inicio": inicio and str(inicio), "fim": fim and str(fim),
+               "formato": formato, "comprimir": comprimir}
+    apos_id, linhas, tamanho = _ler_progresso(caminho, filtros) if retomar else (0, 0, 0)
+    inicio_tempo = time.perf_counter()
+
+    with db.conexao() as conn, open(caminho, "r+b" if tamanho else "wb") as saida:
+        # Descarta o que foi escrito depois do último bloco registrado
+        saida.truncate(tamanho)
+        saida.seek(tamanho)
+        sql, parametros = consulta_exportacao(conn, tabela, inicio, fim, apos_id)
+        cursor = conn.execute(sql, parametros)
+        colunas = [descricao[0] for descricao in cursor.description]
+        dinheiro = [i for i, coluna in enumerate(colunas) if coluna in COLUNAS_DINHEIRO]
+        if tamanho == 0 and formato == "csv":
+            # Arquivo vazio ainda precisa do cabeçalho
+            dados = codificar(colunas, [], True).encode("utf-8")
+            saida.write(gzip.compress(dados) if comprimir else dados)
+            tamanho = saida.tell()
+
+        for bloco in ler_em_blocos(cursor, tamanho_bloco):
+            dados = codificar(colunas, _em_reais(bloco, dinheiro), False).encode("utf-8")
+            saida.write(gzip.compress(dados, compresslevel=6) if comprimir else dados)
+            saida.flush()
+            tamanho = saida.tell()
+            linhas += len(bloco)
+            apos_id = bloco[-1][0]
+            _gravar_progresso(caminho, filtros, apos_id, linhas, tamanho)
+            if ao_progredir:
+                ao_progredir(linhas, apos_id)
+
+    try:
+        os.remove(_caminho_progresso(caminho))
+    except FileNotFoundError:
+        pass
+    return ResultadoExportacao(linhas, apos_id, time.perf_counter() - inicio_tempo, caminho)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Exporta produtos e vendas do PDV")
+    parser.add_argument("tabela", choices=sorted(CONSULTAS))
+    parser.add_argument("arquivo", help="destino (.csv, .jsonl, com .gz para comprimir)")
+    parser.add_argument("--inicio", help="data inicial AAAA-MM-DD")
+    parser.add_argument("--fim", help="data final AAAA-MM-DD (incluída)")
+    parser.add_argument("--retomar", action="store_true", help="continua uma exportação interrompida")
+    args = parser.parse_args()
+
+    db.criar_tabelas()
+    resultado = exportar(
+        args.tabela, args.arquivo, inicio=args.inicio, fim=args.fim, retomar=args.retomar,
+        ao_progredir=lambda linhas, _: print(f"\r{linhas} linhas", end="", flush=True))
+    print(f"\n{resultado.linhas} linhas exportadas em {resultado.segundos:.1f} s para {resultado.caminho}")
@@ -0,0 +1,260 @@
+# Importação em lote de produtos a partir de planilhas CSV/XLSX
+import csv
+import os
+import sqlite3
+import time
+import unicodedata
+from collections import namedtuple
+from itertools import chain
+from modules import db, catalogo
+from modules.validacao import CAMPOS_PRODUTO, preparar_lote
+
+ResultadoImportacao = namedtuple(
+    "ResultadoImportacao",
+    "lidas gravadas rejeitadas segundos linhas_por_segundo arquivo_rejeitados")
+
+# Nomes de coluna aceitos nas planilhas (já normalizados) -> campo de produtos
+APELIDOS_COLUNAS = {
+    "produto": "nome",
+    "descricao": "descricao",
+    "ean": "codigo_barras",
+    "gtin": "codigo_barras",
+    "codigo": "codigo_barras",
+    "estoque": "quantidade",
+    "qtd": "quantidade",
+    "minimo": "estoque_minimo",
+    "custo": "preco_custo",
+    "preco": "preco_venda",
+    "venda": "preco_venda",
+    "margem": "margem_lucro",
+    "fornecedor": "fornecedor_id",
+}
+
+TAMANHO_LOTE = 1000
+
+_FORNECEDOR = CAMPOS_PRODUTO.index("fornecedor_id")
+
+
+def _normalizar_coluna(nome):
+    """'Preço de Venda' -> 'preco_de_venda'"""
+    texto = unicodedata.normalize("NFKD", str(nome or "")).encode("ascii", "ignore").decode()
+    return "_".join(texto.lower().split())
+
+
+def mapear_colunas(cabecalho):
+    """Lista, para cada coluna do arquivo, o campo de produtos (ou None)"""
+    campos = []
+    for nome in cabecalho:
+        chave = _normalizar_coluna(nome)
+        chave = chave.replace("_de_", "_")
+        campo = chave if chave in CAMPOS_PRODUTO else APELIDOS_COLUNAS.get(chave)
+        campos.append(campo)
+    return campos
+
+
+def _ler_csv(caminho):
+    """Gera as linhas do CSV; o delimitador (; ou ,) é detectado na amostra"""
+    with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+        amostra = arquivo.read(8192)
+        arquivo.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=";,\t")
+        except csv.Error:
+            dialeto = csv.excel
+        yield from csv.reader(arquivo, dialeto)
+
+
+def _valor_celula(valor):
+    """Células numéricas inteiras (códigos EAN, quantidades) viram int"""
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def _ler_xlsx(caminho):
+    """Gera as linhas da primeira planilha sem carregar o arquivo inteiro"""
+    # openpyxl só é necessário para quem importa XLSX
+    from openpyxl import load_workbook
+
+    pasta = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        for linha in pasta.active.iter_rows(values_only=True):
+            yield [_valor_celula(valor) for valor in linha]
+    finally:
+        pasta.close()
+
+
+def ler_linhas(caminho):
+    """Escolhe o leitor pela extensão do arquivo"""
+    if os.path.splitext(caminho)[1].lower() in (".xlsx", ".xlsm"):
+        return _ler_xlsx(caminho)
+    return _ler_csv(caminho)
+
+
+def _sql_upsert(campos_presentes):
+    """INSERT que atualiza o produto existente com o mesmo código de barras.
+
+    Só as colunas que existem no arquivo são sobrescritas: uma planilha de
+    preços sem coluna de estoque não zera a quantidade dos produtos. A
+    margem sempre é atualizada, pois os preços são colunas obrigatórias.
+    """
+    colunas = ", ".join(CAMPOS_PRODUTO)
+    marcadores = ", ".join("?" for _ in CAMPOS_PRODUTO)
+    atribuicoes = ", ".join(
+        f"{campo} = excluded.{campo}" for campo in CAMPOS_PRODUTO
+        if campo in campos_presentes or campo == "margem_lucro")
+    return f"""
+        INSERT INTO produtos ({colunas}) VALUES ({marcadores})
+        ON CONFLICT (codigo_barras) DO UPDATE SET {atribuicoes}
+    """
+
+
+def importar_produtos(caminho, arquivo_rejeitados=None, tamanho_lote=TAMANHO_LOTE,
+                      ao_progredir=None):
+    """Importa os produtos de um CSV ou XLSX para a tabela produtos.
+
+    O arquivo é lido em blocos de ``tamanho_lote`` linhas, e cada bloco passa
+    pelas mesmas regras do formulário, validadas coluna a coluna
+    (validacao.preparar_lote). As válidas são gravadas em lotes de
+    ``tamanho_lote`` com ``executemany``, uma transação por lote, e um
+    código de barras já cadastrado atualiza o produto em vez de duplicá-lo.
+    As inválidas vão para ``arquivo_rejeitados`` (CSV com o número da linha e
+    os erros), criado apenas se houver rejeições; também vão para lá as
+    linhas com fornecedor não cadastrado e, se o banco recusar um lote
+    (restrição violada), as linhas recusadas quando o lote é regravado linha
+    a linha. Uma linha ruim nunca interrompe a importação. A memória usada não
+    depende do tamanho do arquivo: só um bloco fica em memória por vez.
+
+    ``ao_progredir(lidas, gravadas, rejeitadas)`` é chamado após cada lote.
+    Retorna um ResultadoImportacao.
+    """
+    if arquivo_rejeitados is None:
+        arquivo_rejeitados = os.path.splitext(caminho)[0] + ".rejeitados.csv"
+
+    inicio = time.perf_counter()
+    linhas = ler_linhas(caminho)
+    cabecalho = next(linhas, None)
+    if cabecalho is None:
+        raise ValueError("O arquivo está vazio")
+    campos = mapear_colunas(cabecalho)
+    presentes = {campo for campo in campos if campo}
+    faltando = {"nome", "categoria", "preco_custo", "preco_venda"} - presentes
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(sorted(faltando))}")
+    sql = _sql_upsert(presentes)
+
+    with db.conexao() as conn:
+        fornecedores = {linha[0] for linha in conn.execute("SELECT id FROM fornecedores")}
+
+    lidas = gravadas = rejeitadas = 0
+    lote, bloco, numeros = [], [], []   # lote: (linha pronta, número, valores do arquivo)
+    saida_rejeitados = escritor = None
+
+    def rejeitar(numero, erros, valores):
+        nonlocal rejeitadas, saida_rejeitados, escritor
+        rejeitadas += 1
+        if escritor is None:
+            saida_rejeitados = open(arquivo_rejeitados, "w", newline="", encoding="utf-8")
+            escritor = csv.writer(saida_rejeitados, delimiter=";")
+            escritor.writerow(chain(["linha", "erros"], cabecalho))
+        escritor.writerow(chain([numero, "; ".join(erros)], valores))
+
+    def gravar_linha_a_linha(conn, parte):
+        """Grava o que o banco aceitar; as linhas recusadas vão para os rejeitados"""
+        aceitas = 0
+        for linha, numero, valores in parte:
+            conn.execute("SAVEPOINT linha")
+            try:
+                conn.execute(sql, linha)
+                aceitas += 1
+            except sqlite3.IntegrityError as e:
+                conn.execute("ROLLBACK TO linha")
+                rejeitar(numero, [f"Recusada pelo banco: {e}"], valores)
+            conn.execute("RELEASE linha")
+        return aceitas
+
+    def gravar_lote():
+        nonlocal gravadas
+        parte = lote[:tamanho_lote]
+        try:
+            with db.transacao(imediata=True) as conn:
+                conn.executemany(sql, [linha for linha, _, _ in parte])
+            gravadas += len(parte)
+        except sqlite3.IntegrityError:
+            with db.transacao(imediata=True) as conn:
+                gravadas += gravar_linha_a_linha(conn, parte)
+        del lote[:tamanho_lote]
+        if ao_progredir:
+            ao_progredir(lidas, gravadas, rejeitadas)
+
+    def validar_bloco():
+        validas, invalidas = preparar_lote(campos, bloco)
+        for indice, erros in invalidas:
+            rejeitar(numeros[indice], erros, bloco[indice])
+        recusadas = {indice for indice, _ in invalidas}
+        indices = (indice for indice in range(len(bloco)) if indice not in recusadas)
+        for indice, linha in zip(indices, validas):
+            if linha[_FORNECEDOR] is not None and linha[_FORNECEDOR] not in fornecedores:
+                rejeitar(numeros[indice], ["Fornecedor não cadastrado"], bloco[indice])
+            else:
+                lote.append((linha, numeros[indice], bloco[indice]))
+        bloco.clear()
+        numeros.clear()
+
+    try:
+        for numero, valores in enumerate(linhas, start=2):
+            if not any(str(valor).strip() for valor in valores):
+                continue  # linha em branco
+            lidas += 1
+            bloco.append(valores)
+            numeros.append(numero)
+            if len(bloco) >= tamanho_lote:
+                validar_bloco()
+                if len(lote) >= tamanho_lote:
+                    gravar_lote()
+        validar_bloco()
+        while lote:
+            gravar_lote()
+    finally:
+        if saida_rejeitados is not None:
+            saida_rejeitados.close()
+        if hasattr(linhas, "close"):
+            linhas.close()
+
+    # Produtos novos ou alterados: o índice do caixa é recarregado na próxima leitura
+    catalogo.obter_indice().invalidar()
+
+    segundos = time.perf_counter() - inicio
+    return ResultadoImportacao(
+        lidas, gravadas, rejeitadas, segundos,
+        lidas / segundos if segundos > 0 else 0.0,
+        arquivo_rejeitados if rejeitadas else None)
+
+
+def formatar_relatorio(resultado):
+    """Resumo legível da importação"""
+    velocidade = f"{resultado.linhas_por_segundo:,.0f}".replace(",", ".")
+    texto = (f"{resultado.lidas} linhas lidas, {resultado.gravadas} gravadas, "
+             f"{resultado.rejeitadas} rejeitadas em {resultado.segundos:.1f} s "
+             f"({velocidade} linhas/s)")
+    if resultado.arquivo_rejeitados:
+        texto += f"\nRejeitadas salvas em: {resultado.arquivo_rejeitados}"
+    return texto
+
+
+if __name__ == "__main__":
+    # Uso: python -m modules.importacao catalogo.csv [rejeitados.csv]
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Uso: python -m modules.importacao <arquivo.csv|arquivo.xlsx> [rejeitados.csv]")
+        sys.exit(2)
+    db.criar_tabelas()
+    resultado = importar_produtos(
+        sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None,
+        ao_progredir=lambda lidas, gravadas, rejeitadas: print(
+            f"\r{lidas} lidas, {gravadas} gravadas, {rejeitadas} rejeitadas", end="", flush=True))
+    print()
+    print(formatar_relatorio(resultado))
@@ -1,7 +1,6 @@
 import customtkinter as ctk
 from tkinter import messagebox
 from modules import db
-from ui.dashbord import TelaDashboard
 
 
 class TelaLogin(ctk.CTk):
@@ -35,15 +34,16 @@ class TelaLogin(ctk.CTk):
             messagebox.showerror("Erro", "Por favor, preencha todos os campos!")
             return
 
-        conn = db.conectar()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM usuarios WHERE nome=? AND senha=?", (usuario, senha))
-        resultado = cursor.fetchone()
-        conn.close()
+        with db.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT * FROM usuarios WHERE nome=? AND senha=?", (usuario, senha))
+            resultado = cursor.fetchone()
 
         if resultado:
             # Redirecionamento para o dashboard com o usuário logado
+            # (importado aqui para a janela de login abrir sem esperar por ele)
+            from ui.dashbord import TelaDashboard
             self.destroy()
             app = TelaDashboard(usuario_logado=usuario)
             app.mainloop()
@@ -1 +1,232 @@
-# CRUD de produtos
\ No newline at end of file
+# CRUD de produtos, fornecedores e vendas (camada de acesso a dados)
+import json
+from dataclasses import astuple, dataclass, fields
+from modules import db
+from utils.dinheiro import Dinheiro
+
+
+@dataclass(slots=True)
+class Produto:
+    """Linha da tabela produtos (``id`` é None até o produto ser gravado)"""
+    nome: str
+    categoria: str
+    preco_custo: Dinheiro
+    preco_venda: Dinheiro
+    descricao: str = ""
+    codigo_barras: str = None
+    quantidade: int = 0
+    estoque_minimo: int = 0
+    localizacao: str = ""
+    margem_lucro: float = None
+    fornecedor_id: int = None
+    imagem_path: str = None
+    ativo: int = 1
+    id: int = None
+
+    def __post_init__(self):
+        # O banco devolve centavos como int
+        self.preco_custo = Dinheiro(self.preco_custo)
+        self.preco_venda = Dinheiro(self.preco_venda)
+
+    @property
+    def estoque_baixo(self):
+        """Produto ativo abaixo do próprio estoque mínimo"""
+        return bool(self.ativo) and (self.quantidade or 0) < (self.estoque_minimo or 0)
+
+
+@dataclass(slots=True)
+class Fornecedor:
+    """Linha da tabela fornecedores"""
+    nome: str
+    contato: str = None
+    telefone: str = None
+    email: str = None
+    endereco: str = None
+    informacoes_adicionais: str = None
+    id: int = None
+
+    @property
+    def rotulo(self):
+        """Texto usado nos combos: 'Nome (ID: 3)'"""
+        return f"{self.nome} (ID: {self.id})"
+
+
+@dataclass(slots=True)
+class Venda:
+    """Cabeçalho de uma venda"""
+    data: str
+    total: Dinheiro
+    cliente: str = None
+    id: int = None
+
+    def __post_init__(self):
+        self.total = Dinheiro(self.total)
+
+
+def _colunas(registro):
+    return tuple(campo.name for campo in fields(registro))
+
+
+# Os comandos são montados uma única vez: texto idêntico a cada chamada faz
+# o SQLite reaproveitar o comando já preparado no cache de cada conexão do
+# pool (db.TAMANHO_CACHE_COMANDOS), sem compilar o SQL de novo
+COLUNAS_PRODUTO = _colunas(Produto)
+COLUNAS_FORNECEDOR = _colunas(Fornecedor)
+COLUNAS_VENDA = _colunas(Venda)
+
+_SELECT_PRODUTOS = f"SELECT {', '.join(COLUNAS_PRODUTO)} FROM produtos"
+
+# Lista de ids em um único parâmetro JSON: o mesmo comando preparado serve
+# para 1 ou 10 mil ids, ao contrário de "IN (?, ?, ...)" com tamanho variável
+_SQL_PRODUTOS_POR_ID = f"{_SELECT_PRODUTOS} WHERE id IN (SELECT value FROM json_each(?))"
+_SQL_VENDAS_POR_ID = (f"SELECT {', '.join(COLUNAS_VENDA)} FROM vendas "
+                      "WHERE id IN (SELECT value FROM json_each(?))")
+_SQL_FORNECEDORES = f"SELECT {', '.join(COLUNAS_FORNECEDOR)} FROM fornecedores ORDER BY nome"
+
+_CAMPOS_GRAVACAO = COLUNAS_PRODUTO[:-1]  # todas menos id
+_SQL_UPSERT_PRODUTO = f"""
+    INSERT INTO produtos (id, {', '.join(_CAMPOS_GRAVACAO)})
+    VALUES (?, {', '.join('?' for _ in _CAMPOS_GRAVACAO)})
+    ON CONFLICT (id) DO UPDATE SET {', '.join(f'{campo} = excluded.{campo}' for campo in _CAMPOS_GRAVACAO)}
+"""
+_SQL_INSERIR_PRODUTO = f"""
+    INSERT INTO produtos ({', '.join(_CAMPOS_GRAVACAO)})
+    VALUES ({', '.join('?' for _ in _CAMPOS_GRAVACAO)})
+"""
+
+
+def obter_produtos(ids):
+    """Busca vários produtos de uma vez; retorna {id: Produto}"""
+    with db.conexao() as conn:
+        linhas = conn.execute(_SQL_PRODUTOS_POR_ID, (json.dumps(list(ids)),)).fetchall()
+    return {produto.id: produto for produto in (Produto(*linha) for linha in linhas)}
+
+
+def salvar_produtos(produtos):
+    """Insere ou atualiza vários produtos em uma única transação.
+
+    Produtos sem ``id`` são inseridos e recebem o id gerado; os demais são
+    atualizados. Retorna a lista de ids na mesma ordem.
+    """
+    return db.escrever(_gravar_produtos, produtos)
+
+
+def _gravar_produtos(conn, produtos):
+    """Um executemany para os produtos com id (upsert) e outro para os novos.
+
+    Roda no escritor (transação IMMEDIATE): nenhuma outra conexão insere
+    produtos ao mesmo tempo, e o AUTOINCREMENT dá aos novos ids
+    consecutivos, terminando em last_insert_rowid().
+    """
+    existentes = [produto for produto in produtos if produto.id is not None]
+    novos = [produto for produto in produtos if produto.id is None]
+    if existentes:
+        conn.executemany(_SQL_UPSERT_PRODUTO, (
+            (valores[-1],) + valores[:-1] for valores in map(astuple, existentes)))
+    if novos:
+        conn.executemany(_SQL_INSERIR_PRODUTO, (astuple(produto)[:-1] for produto in novos))
+        ultimo = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        for produto_id, produto in enumerate(novos, start=ultimo - len(novos) + 1):
+            produto.id = produto_id
+    return [produto.id for produto in produtos]
+
+
+def listar_fornecedores():
+    """Todos os fornecedores, em ordem alfabética"""
+    with db.conexao() as conn:
+        return [Fornecedor(*linha) for linha in conn.execute(_SQL_FORNECEDORES)]
+
+
+def obter_vendas(ids):
+    """Busca vários cabeçalhos de venda de uma vez; retorna {id: Venda}"""
+    with db.conexao() as conn:
+        linhas = conn.execute(_SQL_VENDAS_POR_ID, (json.dumps(list(ids)),)).fetchall()
+    return {venda.id: venda for venda in (Venda(*linha) for linha in linhas)}
+
+
+# Colunas exibidas na grade de produtos do estoque
+COLUNAS_GRADE = ("id", "nome", "categoria", "codigo_barras", "quantidade", "preco_venda", "fornecedor_id")
+
+# Ordenações aceitas pela grade; todas têm índice (migrações 7 e 8)
+ORDENACOES = ("nome", "id", "quantidade")
+
+# Junto com "ativo = 1" (sempre presente nos filtros) casa com o índice
+# parcial idx_produtos_estoque_baixo
+CONDICAO_ESTOQUE_BAIXO = "quantidade < estoque_minimo"
+
+
+def _filtros(categoria=None, fornecedor_id=None, estoque_baixo=False):
+    condicoes, parametros = ["ativo = 1"], []
+    if categoria:
+        condicoes.append("categoria = ?")
+        parametros.append(categoria)
+    if fornecedor_id is not None:
+        condicoes.append("fornecedor_id = ?")
+        parametros.append(fornecedor_id)
+    if estoque_baixo:
+        condicoes.append(CONDICAO_ESTOQUE_BAIXO)
+    return condicoes, parametros
+
+
+def chave_pagina(produto, ordem="nome"):
+    """Chave (valor da ordenação, id) de um produto da grade"""
+    return (getattr(produto, ordem), produto.id)
+
+
+def consulta_pagina(limite=100, apos=None, antes=None, ordem="nome", categoria=None,
+                    fornecedor_id=None, estoque_baixo=False):
+    """Monta (sql, parametros, invertida) de uma página da grade"""
+    if ordem not in ORDENACOES:
+        raise ValueError(f"Ordenação inválida: {ordem}")
+    condicoes, parametros = _filtros(categoria, fornecedor_id, estoque_baixo)
+
+    chave = "id" if ordem == "id" else f"({ordem}, id)"
+    direcao = "ASC"
+    if apos is not None:
+        condicoes.append(f"{chave} > {'?' if ordem == 'id' else '(?, ?)'}")
+        parametros.extend(apos[1:] if ordem == "id" else apos)
+    elif antes is not None:
+        condicoes.append(f"{chave} < {'?' if ordem == 'id' else '(?, ?)'}")
+        parametros.extend(antes[1:] if ordem == "id" else antes)
+        direcao = "DESC"
+    ordenacao = "id" if ordem == "id" else f"{ordem} {direcao}, id"
+
+    sql = f"""
+        {_SELECT_PRODUTOS}
+        WHERE {" AND ".join(condicoes)}
+        ORDER BY {ordenacao} {direcao}
+        LIMIT ?
+    """
+    return sql, parametros + [limite], direcao == "DESC"
+
+
+def pagina_produtos(limite=100, apos=None, antes=None, ordem="nome", categoria=None,
+                    fornecedor_id=None, estoque_baixo=False):
+    """Retorna uma página (lista de Produto) da grade por paginação de chave.
+
+    ``apos`` / ``antes`` são chaves (ver chave_pagina) da última ou da
+    primeira linha já exibida: a consulta continua a partir dela com
+    ``(ordem, id) > (?, ?)`` em vez de OFFSET, então buscar a página 1000
+    custa o mesmo que buscar a primeira. Com ``antes``, a página anterior é
+    lida em ordem inversa e devolvida já na ordem normal.
+    """
+    sql, parametros, invertida = consulta_pagina(
+        limite, apos, antes, ordem, categoria, fornecedor_id, estoque_baixo)
+    with db.conexao() as conn:
+        produtos = [Produto(*linha) for linha in conn.execute(sql, parametros)]
+    if invertida:
+        produtos.reverse()
+    return produtos
+
+
+def consulta_contagem(categoria=None, fornecedor_id=None, estoque_baixo=False):
+    """Monta (sql, parametros) da contagem de produtos da grade"""
+    condicoes, parametros = _filtros(categoria, fornecedor_id, estoque_baixo)
+    return f"SELECT COUNT(*) FROM produtos WHERE {' AND '.join(condicoes)}", parametros
+
+
+def contar_produtos(categoria=None, fornecedor_id=None, estoque_baixo=False):
+    """Quantidade de produtos que atendem aos filtros da grade"""
+    sql, parametros = consulta_contagem(categoria, fornecedor_id, estoque_baixo)
+    with db.conexao() as conn:
+        return conn.execute(sql, parametros).fetchone()[0]
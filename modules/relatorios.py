@@ -1 +1,527 @@
-# Geração de Relatorio
\ No newline at end of file
+# Geração de Relatorios de vendas (receita por período, ticket médio, produtos, categorias e margem)
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, timedelta
+from functools import partial
+from tkinter import messagebox, ttk
+import customtkinter as ctk
+import numpy as np
+from modules import db
+from modules.exportacao import ler_em_blocos
+from utils.dinheiro import formatar_moeda
+from utils.helpers import executar_em_segundo_plano
+
+TAMANHO_BLOCO = 50000
+SEM_CADASTRO = "Sem cadastro"
+PERIODOS = ("dia", "semana", "mes")
+EPOCA = date(1970, 1, 1)
+
+# Colunas lidas de cada tabela. O dia vem pronto do SQLite como número de
+# dias desde 1970-01-01, então nenhuma data é convertida em Python. Valores
+# em centavos (int64): todos os relatórios retornam centavos inteiros
+_TIPO_VENDA = np.dtype([("dia", "i4"), ("total", "i8")])
+_TIPO_ITEM = np.dtype([("produto_id", "i8"), ("quantidade", "i8"), ("subtotal", "i8")])
+
+_SQL_VENDAS = """
+    SELECT CAST(julianday(v.data) - 2440587.5 AS INTEGER), v.total FROM vendas v
+    WHERE julianday(v.data) IS NOT NULL
+"""
+_SQL_ITENS = "SELECT vi.produto_id, vi.quantidade, vi.subtotal FROM venda_itens vi"
+_SQL_ITENS_PERIODO = f"{_SQL_ITENS} JOIN vendas v ON v.id = vi.venda_id WHERE 1"
+_SQL_PRODUTOS = "SELECT id, nome, categoria, preco_custo FROM produtos"
+
+# vendas e itens: arrays estruturados (_TIPO_VENDA / _TIPO_ITEM);
+# custos: custo de cada item (quantidade x preço de custo do cadastro);
+# categoria_por_produto / custo_por_produto: indexados pelo id do produto
+DadosVendas = namedtuple(
+    "DadosVendas", "vendas itens custos nomes categorias categoria_por_produto custo_por_produto")
+
+TabelaProdutos = namedtuple("TabelaProdutos", "nomes categorias categoria_por_produto custo_por_produto")
+
+LinhaPeriodo = namedtuple("LinhaPeriodo", "inicio receita vendas")
+LinhaProduto = namedtuple("LinhaProduto", "produto_id nome quantidade receita lucro")
+LinhaCategoria = namedtuple("LinhaCategoria", "categoria receita participacao lucro")
+Margem = namedtuple("Margem", "receita custo lucro percentual")
+Relatorio = namedtuple("Relatorio", "periodo receitas vendas ticket_medio margem produtos categorias")
+
+
+def consultas_periodo(inicio=None, fim=None):
+    """Monta (sql_vendas, sql_itens, parametros) filtrados por data.
+
+    ``inicio`` e ``fim`` são datas 'AAAA-MM-DD' (o dia ``fim`` é incluído),
+    como na exportação; o filtro usa idx_vendas_data e os itens chegam
+    pela venda (idx_venda_itens_venda).
+    """
+    condicoes, parametros = [], []
+    if inicio:
+        condicoes.append("v.data >= ?")
+        parametros.append(str(inicio))
+    if fim:
+        condicoes.append("v.data < DATE(?, '+1 day')")
+        parametros.append(str(fim))
+    if not condicoes:
+        return _SQL_VENDAS, _SQL_ITENS, parametros
+    filtro = "".join(f" AND {condicao}" for condicao in condicoes)
+    return _SQL_VENDAS + filtro, _SQL_ITENS_PERIODO + filtro, parametros
+
+
+def _ler_array(conn, sql, parametros, tipo, tamanho_bloco):
+    """Lê o resultado em blocos de fetchmany direto para um array estruturado"""
+    blocos = [np.array(bloco, dtype=tipo)
+              for bloco in ler_em_blocos(conn.execute(sql, parametros), tamanho_bloco)]
+    return np.concatenate(blocos) if blocos else np.empty(0, dtype=tipo)
+
+
+def _ler_vendas(conn, inicio=None, fim=None, tamanho_bloco=TAMANHO_BLOCO):
+    """Retorna os arrays (vendas, itens) do período"""
+    sql_vendas, sql_itens, parametros = consultas_periodo(inicio, fim)
+    return (_ler_array(conn, sql_vendas, parametros, _TIPO_VENDA, tamanho_bloco),
+            _ler_array(conn, sql_itens, parametros, _TIPO_ITEM, tamanho_bloco))
+
+
+def _ler_produtos(conn):
+    """Tabelas de consulta indexadas pelo id: produto -> categoria e custo"""
+    produtos = conn.execute(_SQL_PRODUTOS).fetchall()
+    maior_id = max((p[0] for p in produtos), default=0)
+    categorias = sorted({p[2] or SEM_CADASTRO for p in produtos} | {SEM_CADASTRO})
+    codigos = {categoria: codigo for codigo, categoria in enumerate(categorias)}
+    categoria_por_produto = np.full(maior_id + 1, codigos[SEM_CADASTRO], dtype=np.int64)
+    custo_por_produto = np.zeros(maior_id + 1, dtype=np.int64)
+    nomes = {}
+    for produto_id, nome, categoria, preco_custo in produtos:
+        categoria_por_produto[produto_id] = codigos[categoria or SEM_CADASTRO]
+        custo_por_produto[produto_id] = preco_custo or 0
+        nomes[produto_id] = nome
+    return TabelaProdutos(nomes, categorias, categoria_por_produto, custo_por_produto)
+
+
+def _montar_dados(vendas, itens, produtos):
+    categoria_por_produto, custo_por_produto = produtos.categoria_por_produto, produtos.custo_por_produto
+    faltando = (int(itens["produto_id"].max()) + 1 if len(itens) else 0) - len(custo_por_produto)
+    if faltando > 0:
+        # Itens de produtos que não estão mais no cadastro
+        categoria_por_produto = np.concatenate([
+            categoria_por_produto,
+            np.full(faltando, produtos.categorias.index(SEM_CADASTRO), dtype=np.int64)])
+        custo_por_produto = np.concatenate([custo_por_produto, np.zeros(faltando, dtype=np.int64)])
+    custos = itens["quantidade"] * custo_por_produto[itens["produto_id"]]
+    return DadosVendas(vendas, itens, custos, produtos.nomes, produtos.categorias,
+                       categoria_por_produto, custo_por_produto)
+
+
+def carregar_vendas(inicio=None, fim=None, tamanho_bloco=TAMANHO_BLOCO):
+    """Carrega vendas e itens do período em arrays NumPy (DadosVendas).
+
+    Todos os relatórios abaixo trabalham sobre o resultado sem voltar ao
+    banco, então trocar o agrupamento ou o tamanho do ranking não relê
+    nada. O custo de cada item usa o preço de custo atual do cadastro
+    (venda_itens não guarda o custo da época); itens cujo produto não está
+    mais no cadastro (bancos antigos, sem chave estrangeira) entram como
+    "Sem cadastro", com custo zero.
+    """
+    with db.conexao() as conn:
+        vendas, itens = _ler_vendas(conn, inicio, fim, tamanho_bloco)
+        produtos = _ler_produtos(conn)
+    return _montar_dados(vendas, itens, produtos)
+
+
+def _chaves_periodo(dias, periodo):
+    """Número do dia, da semana (começando na segunda) ou do mês desde 1970"""
+    if periodo == "dia":
+        return dias
+    if periodo == "semana":
+        # 1970-01-01 foi uma quinta: +3 faz as semanas começarem na segunda
+        return (dias + 3) // 7
+    if periodo == "mes":
+        return dias.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    raise ValueError(f"Período inválido: {periodo}")
+
+
+def _inicio_periodo(chave, periodo):
+    if periodo == "dia":
+        return EPOCA + timedelta(days=chave)
+    if periodo == "semana":
+        return EPOCA + timedelta(days=chave * 7 - 3)
+    return date(1970 + chave // 12, chave % 12 + 1, 1)
+
+
+def receita_por_periodo(dados, periodo="dia"):
+    """Receita e número de vendas por dia, semana ou mês (lista de LinhaPeriodo).
+
+    Os dias são contíguos, então as vendas são somadas por dia com um
+    np.bincount sobre (dia - primeiro dia), sem ordenar nada; semanas e
+    meses agrupam depois só esses totais diários (alguns milhares). Os
+    pesos do bincount são float64, exatos para centavos inteiros até 2**53.
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f"Período inválido: {periodo}")
+    vendas = dados.vendas
+    if not len(vendas):
+        return []
+    primeiro = int(vendas["dia"].min())
+    indices = vendas["dia"] - primeiro
+    receitas = np.bincount(indices, weights=vendas["total"])
+    contagens = np.bincount(indices)
+    if periodo != "dia":
+        chaves = _chaves_periodo(np.arange(primeiro, primeiro + len(contagens)), periodo)
+        base = int(chaves[0])
+        receitas = np.bincount(chaves - base, weights=receitas)
+        contagens = np.bincount(chaves - base, weights=contagens).astype(np.int64)
+        primeiro = base
+    return [LinhaPeriodo(_inicio_periodo(primeiro + int(i), periodo), int(receitas[i]), int(contagens[i]))
+            for i in np.flatnonzero(contagens)]
+
+
+def ticket_medio(dados):
+    """Valor médio por venda (centavos, arredondado)"""
+    return int(round(float(dados.vendas["total"].mean()))) if len(dados.vendas) else 0
+
+
+def _percentual(lucro, custo):
+    # Mesma conta da margem_lucro do cadastro: lucro sobre o custo
+    return lucro / custo * 100 if custo else 0.0
+
+
+def margem(dados):
+    """Receita, custo e lucro dos itens vendidos (Margem)"""
+    receita = int(dados.itens["subtotal"].sum())
+    custo = int(dados.custos.sum())
+    lucro = receita - custo
+    return Margem(receita, custo, lucro, round(_percentual(lucro, custo), 2))
+
+
+def top_produtos(dados, n=10, criterio="receita"):
+    """Os ``n`` produtos que mais venderam por receita ou por quantidade"""
+    if criterio not in ("receita", "quantidade"):
+        raise ValueError(f"Critério inválido: {criterio}")
+    itens = dados.itens
+    if not len(itens) or n <= 0:
+        return []
+    ids = itens["produto_id"]
+    receitas = np.bincount(ids, weights=itens["subtotal"])
+    quantidades = np.bincount(ids, weights=itens["quantidade"])
+    custos = np.bincount(ids, weights=dados.custos)
+    valores = receitas if criterio == "receita" else quantidades
+
+    # argpartition separa os n maiores em O(produtos); só eles são ordenados
+    n = min(n, int(np.count_nonzero(quantidades)))
+    topo = np.argpartition(-valores, n - 1)[:n]
+    topo = topo[np.argsort(-valores[topo], kind="stable")]
+    return [LinhaProduto(int(i), dados.nomes.get(int(i), SEM_CADASTRO), int(quantidades[i]),
+                         int(receitas[i]), int(receitas[i] - custos[i]))
+            for i in topo]
+
+
+def mix_categorias(dados):
+    """Receita, participação (%) e lucro por categoria, da maior para a menor"""
+    itens = dados.itens
+    if not len(itens):
+        return []
+    codigos = dados.categoria_por_produto[itens["produto_id"]]
+    total = len(dados.categorias)
+    receitas = np.bincount(codigos, weights=itens["subtotal"], minlength=total)
+    custos = np.bincount(codigos, weights=dados.custos, minlength=total)
+    soma = receitas.sum()
+    return [LinhaCategoria(dados.categorias[i], int(receitas[i]),
+                           float(receitas[i] / soma * 100) if soma else 0.0,
+                           int(receitas[i] - custos[i]))
+            for i in np.argsort(-receitas, kind="stable") if receitas[i]]
+
+
+# Relatórios avulsos sobre um DadosVendas (usados pelo benchmark)
+RELATORIOS = {
+    "receita por dia": partial(receita_por_periodo, periodo="dia"),
+    "receita por semana": partial(receita_por_periodo, periodo="semana"),
+    "receita por mês": partial(receita_por_periodo, periodo="mes"),
+    "ticket médio": ticket_medio,
+    "top produtos": top_produtos,
+    "categorias": mix_categorias,
+    "margem": margem,
+}
+
+
+def gerar_relatorio(dados, periodo="dia", n_produtos=10):
+    """Calcula todos os relatórios da tela de uma vez (Relatorio)"""
+    return Relatorio(periodo, receita_por_periodo(dados, periodo), len(dados.vendas),
+                     ticket_medio(dados), margem(dados), top_produtos(dados, n_produtos),
+                     mix_categorias(dados))
+
+
+# Versões mantidas por gatilhos (db: migração 10)
+_SQL_VERSOES_MESES = """
+    SELECT substr(dia, 1, 7), MAX(versao) FROM vendas_resumo_diario
+    WHERE dia >= ? AND dia <= ? GROUP BY 1
+"""
+_SQL_VERSAO_PRODUTOS = "SELECT valor FROM contadores WHERE nome = 'versao_produtos'"
+_SQL_DIAS_COM_VENDAS = """
+    SELECT (SELECT MIN(dia) FROM vendas_resumo_diario), (SELECT MAX(dia) FROM vendas_resumo_diario)
+"""
+
+EstatisticasCache = namedtuple(
+    "EstatisticasCache", "acertos falhas taxa_acerto blocos_lidos blocos_reaproveitados entradas bytes")
+
+
+def _meses(inicio, fim):
+    """Divide [inicio, fim] em intervalos dentro de um mesmo mês"""
+    atual = inicio
+    while atual <= fim:
+        proximo = date(atual.year + atual.month // 12, atual.month % 12 + 1, 1)
+        yield atual, min(fim, proximo - timedelta(days=1))
+        atual = proximo
+
+
+def _tamanho(valor):
+    """Bytes aproximados de uma entrada do cache (arrays pelo nbytes)"""
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, (tuple, list)):
+        return 64 + sum(_tamanho(item) for item in valor)
+    if isinstance(valor, dict):
+        return 64 + 100 * len(valor)
+    return 64
+
+
+class CacheRelatorios:
+    """Memoização dos relatórios, válida enquanto as vendas não mudarem.
+
+    Os gatilhos da migração 10 gravam em cada dia de vendas_resumo_diario
+    a versão da última alteração naquele dia; a versão de um mês é a maior
+    entre os seus dias. O cache guarda, num único LRU limitado por
+    ``limite_bytes``:
+
+    - os arrays de cada mês do período, com a versão do mês. Um mês
+      encerrado só é relido do banco se chegar uma venda retroativa para
+      ele; com vendas novas, só o mês corrente é relido.
+    - os relatórios prontos, pela chave parâmetros + versões dos meses +
+      versão do cadastro de produtos (gatilhos das migrações 10 e 13:
+      produto cadastrado, apagado ou com nome, categoria ou custo
+      alterado). Reabrir "hoje" ou "este mês" sem vendas novas só lê as
+      versões.
+
+    As versões são lidas antes dos dados: se uma venda entrar no meio, o
+    mês fica guardado com a versão anterior e é relido na próxima vez.
+    """
+
+    def __init__(self, limite_bytes=256 * 1024 * 1024):
+        self.limite_bytes = limite_bytes
+        self._entradas = OrderedDict()  # chave -> (valor, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.blocos_lidos = 0
+        self.blocos_reaproveitados = 0
+
+    def _obter(self, chave):
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return None
+        self._entradas.move_to_end(chave)
+        return entrada[0]
+
+    def _guardar(self, chave, valor):
+        if chave in self._entradas:
+            self._bytes -= self._entradas.pop(chave)[1]
+        tamanho = _tamanho(valor)
+        self._entradas[chave] = (valor, tamanho)
+        self._bytes += tamanho
+        # A entrada recém-guardada nunca é descartada
+        while self._bytes > self.limite_bytes and len(self._entradas) > 1:
+            _, (_, liberado) = self._entradas.popitem(last=False)
+            self._bytes -= liberado
+
+    def _versionado(self, chave, versao, carregar):
+        """Valor guardado em ``chave`` se ainda estiver na ``versao``, senão recarrega"""
+        guardado = self._obter(chave)
+        if guardado is not None and guardado[0] == versao:
+            return guardado[1], True
+        valor = carregar()
+        self._guardar(chave, (versao, valor))
+        return valor, False
+
+    def relatorio(self, inicio=None, fim=None, periodo="dia", n_produtos=10):
+        """Mesmo resultado de gerar_relatorio(carregar_vendas(inicio, fim), ...).
+
+        Sem ``inicio`` / ``fim`` usa o primeiro / último dia com vendas.
+        """
+        with self._lock, db.conexao() as conn:
+            primeiro, ultimo = conn.execute(_SQL_DIAS_COM_VENDAS).fetchone()
+            inicio = date.fromisoformat(str(inicio or primeiro or date.today()))
+            fim = date.fromisoformat(str(fim or ultimo or date.today()))
+            versoes = dict(conn.execute(_SQL_VERSOES_MESES, (inicio.isoformat(), fim.isoformat())))
+            versao_produtos = conn.execute(_SQL_VERSAO_PRODUTOS).fetchone()[0]
+            meses = [(a, b, versoes.get(a.strftime("%Y-%m"), 0)) for a, b in _meses(inicio, fim)]
+
+            chave = ("relatorio", periodo, n_produtos, versao_produtos, tuple(meses))
+            resultado = self._obter(chave)
+            if resultado is not None:
+                self.acertos += 1
+                return resultado
+            self.falhas += 1
+
+            partes = []
+            for a, b, versao in meses:
+                arrays, reaproveitado = self._versionado(
+                    ("mes", a, b), versao, partial(_ler_vendas, conn, a, b))
+                if reaproveitado:
+                    self.blocos_reaproveitados += 1
+                else:
+                    self.blocos_lidos += 1
+                partes.append(arrays)
+            produtos, _ = self._versionado(("produtos",), versao_produtos, partial(_ler_produtos, conn))
+
+        vendas = np.concatenate([parte[0] for parte in partes]) if partes else np.empty(0, _TIPO_VENDA)
+        itens = np.concatenate([parte[1] for parte in partes]) if partes else np.empty(0, _TIPO_ITEM)
+        resultado = gerar_relatorio(_montar_dados(vendas, itens, produtos), periodo, n_produtos)
+        with self._lock:
+            self._guardar(chave, resultado)
+        return resultado
+
+    def estatisticas(self):
+        """Acertos / falhas dos relatórios, reuso dos meses e ocupação (EstatisticasCache)"""
+        with self._lock:
+            total = self.acertos + self.falhas
+            return EstatisticasCache(
+                self.acertos, self.falhas, self.acertos / total if total else 0.0,
+                self.blocos_lidos, self.blocos_reaproveitados, len(self._entradas), self._bytes)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+
+_cache = CacheRelatorios()
+
+
+def obter_cache():
+    """Retorna o cache de relatórios compartilhado pela aplicação"""
+    return _cache
+
+
+class TelaRelatorios(ctk.CTkFrame):
+    """Tela de relatórios de vendas do dashboard.
+
+    Os relatórios são calculados em segundo plano pelo cache compartilhado
+    (obter_cache): reabrir o mesmo período ou trocar o agrupamento
+    reaproveita os meses já carregados.
+    """
+
+    AGRUPAMENTOS = {"Dia": "dia", "Semana": "semana", "Mês": "mes"}
+
+    def __init__(self, parent):
+        super().__init__(parent, fg_color="transparent")
+        self._tarefa = None
+
+        hoje = date.today()
+        self.inicio_var = ctk.StringVar(value=(hoje - timedelta(days=30)).isoformat())
+        self.fim_var = ctk.StringVar(value=hoje.isoformat())
+        self.agrupamento_var = ctk.StringVar(value="Dia")
+
+        # Filtros
+        barra = ctk.CTkFrame(self, fg_color="transparent")
+        barra.pack(fill="x", pady=(0, 10))
+        ctk.CTkLabel(barra, text="De:").pack(side="left", padx=(0, 4))
+        ctk.CTkEntry(barra, textvariable=self.inicio_var, width=110).pack(side="left", padx=(0, 8))
+        ctk.CTkLabel(barra, text="Até:").pack(side="left", padx=(0, 4))
+        ctk.CTkEntry(barra, textvariable=self.fim_var, width=110).pack(side="left", padx=(0, 8))
+        ctk.CTkLabel(barra, text="Agrupar por:").pack(side="left", padx=(8, 4))
+        ctk.CTkComboBox(
+            barra, variable=self.agrupamento_var, values=list(self.AGRUPAMENTOS), state="readonly",
+            width=110, command=lambda _: self.gerar()).pack(side="left", padx=(0, 8))
+        self.btn_gerar = ctk.CTkButton(barra, text="📈 Gerar", width=100, command=self.gerar)
+        self.btn_gerar.pack(side="left", padx=(0, 8))
+        ctk.CTkButton(barra, text="Hoje", width=70,
+                      command=lambda: self.definir_periodo(hoje, hoje)).pack(side="left", padx=(0, 8))
+        ctk.CTkButton(barra, text="Este mês", width=90,
+                      command=lambda: self.definir_periodo(hoje.replace(day=1), hoje)).pack(side="left")
+        self.lbl_status = ctk.CTkLabel(barra, text="")
+        self.lbl_status.pack(side="right")
+
+        # Resumo
+        resumo = ctk.CTkFrame(self)
+        resumo.pack(fill="x", pady=(0, 10))
+        self.lbl_resumo = {}
+        for coluna, (chave, titulo) in enumerate((
+                ("receita", "Receita"), ("vendas", "Vendas"),
+                ("ticket", "Ticket médio"), ("lucro", "Lucro (margem)"))):
+            resumo.grid_columnconfigure(coluna, weight=1)
+            ctk.CTkLabel(resumo, text=titulo).grid(row=0, column=coluna, pady=(10, 0))
+            self.lbl_resumo[chave] = ctk.CTkLabel(
+                resumo, text="-", font=ctk.CTkFont(size=20, weight="bold"))
+            self.lbl_resumo[chave].grid(row=1, column=coluna, pady=(0, 10))
+
+        # Tabelas
+        tabelas = ctk.CTkFrame(self, fg_color="transparent")
+        tabelas.pack(fill="both", expand=True)
+        for coluna in range(3):
+            tabelas.grid_columnconfigure(coluna, weight=1)
+        tabelas.grid_rowconfigure(0, weight=1)
+        self.tree_periodos = self._criar_tabela(tabelas, 0, (("inicio", "Período", 100), ("receita", "Receita", 110), ("vendas", "Vendas", 70)))
+        self.tree_produtos = self._criar_tabela(tabelas, 1, (("nome", "Produto", 180), ("quantidade", "Qtd", 60), ("receita", "Receita", 110)))
+        self.tree_categorias = self._criar_tabela(tabelas, 2, (("categoria", "Categoria", 140), ("receita", "Receita", 110), ("participacao", "%", 60)))
+
+    def _criar_tabela(self, parent, coluna, colunas):
+        tree = ttk.Treeview(parent, columns=[c[0] for c in colunas], show="headings", height=15)
+        for nome, rotulo, largura in colunas:
+            tree.heading(nome, text=rotulo)
+            tree.column(nome, width=largura, anchor="w" if largura > 100 else "center")
+        tree.grid(row=0, column=coluna, sticky="nsew", padx=5)
+        return tree
+
+    def definir_periodo(self, inicio, fim):
+        self.inicio_var.set(inicio.isoformat())
+        self.fim_var.set(fim.isoformat())
+        self.gerar()
+
+    def gerar(self):
+        """Calcula os relatórios do período em segundo plano e os exibe"""
+        try:
+            inicio = datetime.strptime(self.inicio_var.get().strip(), "%Y-%m-%d").date()
+            fim = datetime.strptime(self.fim_var.get().strip(), "%Y-%m-%d").date()
+        except ValueError:
+            messagebox.showerror("Erro", "Informe as datas no formato AAAA-MM-DD")
+            return
+        if self._tarefa is not None:
+            self._tarefa.cancelar()
+        self.btn_gerar.configure(state="disabled")
+        self.lbl_status.configure(text="Carregando vendas...")
+        self._tarefa = executar_em_segundo_plano(
+            self, partial(obter_cache().relatorio, inicio, fim, self.AGRUPAMENTOS[self.agrupamento_var.get()]),
+            ao_concluir=self._receber, ao_falhar=self._falhar)
+
+    def _receber(self, relatorio):
+        self._tarefa = None
+        self.btn_gerar.configure(state="normal")
+        self.lbl_status.configure(text=f"{relatorio.vendas} vendas no período")
+        self.exibir(relatorio)
+
+    def _falhar(self, erro):
+        self._tarefa = None
+        self.btn_gerar.configure(state="normal")
+        self.lbl_status.configure(text="")
+        messagebox.showerror("Erro", f"Erro ao gerar relatórios: {erro}")
+
+    def exibir(self, relatorio):
+        self.lbl_resumo["receita"].configure(text=formatar_moeda(relatorio.margem.receita))
+        self.lbl_resumo["vendas"].configure(text=str(relatorio.vendas))
+        self.lbl_resumo["ticket"].configure(text=formatar_moeda(relatorio.ticket_medio))
+        self.lbl_resumo["lucro"].configure(
+            text=f"{formatar_moeda(relatorio.margem.lucro)} ({relatorio.margem.percentual:.1f}%)")
+
+        formato_data = {"dia": "%d/%m/%Y", "semana": "%d/%m/%Y", "mes": "%m/%Y"}[relatorio.periodo]
+        self._preencher(self.tree_periodos, [
+            (linha.inicio.strftime(formato_data), formatar_moeda(linha.receita), linha.vendas)
+            for linha in relatorio.receitas])
+        self._preencher(self.tree_produtos, [
+            (linha.nome, linha.quantidade, formatar_moeda(linha.receita))
+            for linha in relatorio.produtos])
+        self._preencher(self.tree_categorias, [
+            (linha.categoria, formatar_moeda(linha.receita), f"{linha.participacao:.1f}")
+            for linha in relatorio.categorias])
+
+    @staticmethod
+    def _preencher(tree, linhas):
+        tree.delete(*tree.get_children())
+        for linha in linhas:
+            tree.insert("", "end", values=linha)
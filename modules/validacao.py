@@ -0,0 +1,252 @@
+# Regras de validação de produtos (usadas pelo formulário e pela importação)
+import re
+from collections import namedtuple
+from utils.dinheiro import Dinheiro
+
+# Colunas gravadas em produtos, na ordem de LinhaProduto
+CAMPOS_PRODUTO = (
+    "nome", "descricao", "categoria", "codigo_barras", "quantidade",
+    "estoque_minimo", "localizacao", "preco_custo", "preco_venda",
+    "margem_lucro", "fornecedor_id",
+)
+
+# Regra de um campo: ``tipo`` escolhe o validador (texto, dinheiro, codigo,
+# inteiro, decimal); ``padrao`` é o valor de um inteiro vazio; as mensagens
+# são as mostradas ao usuário
+Campo = namedtuple("Campo", "nome tipo obrigatorio padrao erro_vazio erro_invalido erro_minimo",
+                   defaults=(False, None, None, None, None))
+
+# Esquema do produto. A ordem dos campos é a ordem das mensagens de erro
+ESQUEMA_PRODUTO = (
+    Campo("nome", "texto", obrigatorio=True, erro_vazio="Nome do produto é obrigatório"),
+    Campo("categoria", "texto", obrigatorio=True, erro_vazio="Categoria é obrigatória"),
+    Campo("preco_custo", "dinheiro", erro_invalido="Preço de custo inválido",
+          erro_minimo="Preço de custo deve ser maior que zero"),
+    Campo("preco_venda", "dinheiro", erro_invalido="Preço de venda inválido",
+          erro_minimo="Preço de venda deve ser maior que zero"),
+    Campo("codigo_barras", "codigo", erro_invalido="Código de barras deve ter 8 ou 13 dígitos"),
+    Campo("quantidade", "inteiro", padrao=0, erro_invalido="Quantidade inválida"),
+    Campo("estoque_minimo", "inteiro", padrao=0, erro_invalido="Estoque mínimo inválido"),
+    Campo("fornecedor_id", "inteiro", erro_invalido="Fornecedor inválido"),
+    Campo("descricao", "texto"),
+    Campo("localizacao", "texto"),
+    # Margem inválida ou ausente não é erro: é calculada pelos preços
+    Campo("margem_lucro", "decimal"),
+)
+
+# Formatos mais comuns, convertidos sem passar por Decimal/float
+# ('1.234,56', 'R$ 3,00', '12'); o resto vai para Dinheiro.de_texto
+_DINHEIRO = re.compile(r"(?:R\$\s*)?(-?)(?:([0-9]{1,3}(?:\.[0-9]{3})+|[0-9]+),([0-9]{2})|([0-9]+))")
+_INTEIRO = re.compile(r"-?[0-9]+")
+_NAO_DIGITOS = re.compile(r"[^0-9]")
+
+
+def converter_decimal(valor):
+    """Converte '12,50', '1.234,56', '12.5', 'R$ 3,00' ou '35%' em float.
+
+    Levanta ValueError se o texto não for um número.
+    """
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    texto = str(valor).strip().replace("R$", "").replace("%", "").strip()
+    if "," in texto:
+        # Formato brasileiro: ponto separa milhar, vírgula separa decimais
+        texto = texto.replace(".", "").replace(",", ".")
+    return float(texto)
+
+
+def converter_inteiro(valor, padrao=0):
+    """Converte quantidades ('10', '10,0', 10.0) em int; vazio vira ``padrao``"""
+    if valor is None or str(valor).strip() == "":
+        return padrao
+    numero = converter_decimal(valor)
+    if numero != int(numero):
+        raise ValueError(f"{valor!r} não é inteiro")
+    return int(numero)
+
+
+def somente_digitos(texto):
+    """Remove tudo que não for dígito (máscaras do formulário)"""
+    return texto if texto.isdigit() else _NAO_DIGITOS.sub("", texto)
+
+
+def _texto(valor):
+    return "" if valor is None else str(valor).strip()
+
+
+# Compiladores: recebem um Campo e devolvem a função valor -> (normalizado, erro).
+# O segundo item diz se o resultado depende só do valor e pode ser
+# reaproveitado para valores repetidos de uma coluna (ver preparar_lote)
+
+def _compilar_texto(campo):
+    if not campo.obrigatorio:
+        return lambda valor: (_texto(valor), None)
+    erro_vazio = campo.erro_vazio
+
+    def validar(valor):
+        texto = _texto(valor)
+        return texto, None if texto else erro_vazio
+    return validar
+
+
+def _compilar_codigo(campo):
+    erro = campo.erro_invalido
+
+    def validar(valor):
+        codigo = _texto(valor)
+        if not codigo:
+            return None, None
+        if len(codigo) in (8, 13) and codigo.isdigit():
+            return codigo, None
+        return codigo, erro
+    return validar
+
+
+def _compilar_dinheiro(campo):
+    erro_invalido, erro_minimo = campo.erro_invalido, campo.erro_minimo
+    casar = _DINHEIRO.fullmatch
+
+    def validar(valor):
+        try:
+            encontrado = casar(valor.strip()) if isinstance(valor, str) else None
+            if encontrado:
+                sinal, reais, centavos, inteiro = encontrado.groups()
+                if inteiro:
+                    centavos = int(inteiro) * 100
+                else:
+                    centavos = int(reais.replace(".", "")) * 100 + int(centavos)
+                preco = Dinheiro(-centavos if sinal else centavos)
+            else:
+                preco = Dinheiro.de_texto(valor)
+        except (TypeError, ValueError):
+            return None, erro_invalido
+        return preco, None if preco > 0 else erro_minimo
+    return validar
+
+
+def _compilar_inteiro(campo):
+    padrao, erro = campo.padrao, campo.erro_invalido
+    casar = _INTEIRO.fullmatch
+
+    def validar(valor):
+        if isinstance(valor, str) and casar(valor.strip()):
+            return int(valor), None
+        try:
+            return converter_inteiro(valor, padrao), None
+        except (TypeError, ValueError):
+            return None, erro
+    return validar
+
+
+def _compilar_decimal(campo):
+    def validar(valor):
+        try:
+            return converter_decimal(valor), None
+        except (TypeError, ValueError):
+            return None, campo.erro_invalido
+    return validar
+
+
+COMPILADORES = {
+    "texto": (_compilar_texto, False),
+    "codigo": (_compilar_codigo, False),
+    "dinheiro": (_compilar_dinheiro, True),
+    "inteiro": (_compilar_inteiro, True),
+    "decimal": (_compilar_decimal, True),
+}
+
+
+def compilar_esquema(esquema):
+    """Tupla de (nome, validar, reaproveitavel) na ordem do esquema"""
+    validadores = []
+    for campo in esquema:
+        compilar, reaproveitavel = COMPILADORES[campo.tipo]
+        validadores.append((campo.nome, compilar(campo), reaproveitavel))
+    return tuple(validadores)
+
+
+_VALIDADORES = compilar_esquema(ESQUEMA_PRODUTO)
+_POR_NOME = {nome: validar for nome, validar, _ in _VALIDADORES}
+_ORDEM_LINHA = tuple(CAMPOS_PRODUTO.index(nome) for nome, _, _ in _VALIDADORES)
+_MARGEM = CAMPOS_PRODUTO.index("margem_lucro")
+_CUSTO = CAMPOS_PRODUTO.index("preco_custo")
+_VENDA = CAMPOS_PRODUTO.index("preco_venda")
+_TIPOS_TEXTO = {str, type(None)}
+
+
+def _calcular_margem(linha):
+    """Margem informada tem prioridade; senão é calculada como no formulário"""
+    if linha[_MARGEM] is not None:
+        return linha
+    custo, venda = linha[_CUSTO], linha[_VENDA]
+    margem = round((venda - custo) / custo * 100, 2)
+    return linha[:_MARGEM] + (margem,) + linha[_MARGEM + 1:]
+
+
+def validar_campo(nome, valor):
+    """Mensagem de erro de um único campo, ou None (validação campo a campo do formulário)"""
+    return _POR_NOME[nome](valor)[1]
+
+
+def preparar_produto(dados):
+    """Valida e normaliza um produto vindo do formulário ou de um arquivo.
+
+    ``dados`` é um dicionário campo -> valor (texto ou número; preços em
+    reais). Não acessa banco nem interface. Retorna (linha, erros): ``linha``
+    é a tupla na ordem de CAMPOS_PRODUTO pronta para o INSERT (preços em
+    centavos), ou None se houver erros.
+    """
+    linha = [None] * len(CAMPOS_PRODUTO)
+    erros = []
+    for (nome, validar, _), posicao in zip(_VALIDADORES, _ORDEM_LINHA):
+        linha[posicao], erro = validar(dados.get(nome))
+        if erro:
+            erros.append(erro)
+    if erros:
+        return None, erros
+    return _calcular_margem(tuple(linha)), []
+
+
+def validar_produto(dados):
+    """Retorna a lista de erros de validação do produto (vazia se válido)"""
+    return preparar_produto(dados)[1]
+
+
+def preparar_lote(campos, linhas):
+    """Mesmas regras de preparar_produto aplicadas a um lote inteiro, por coluna.
+
+    ``campos`` é o campo de cada coluna (None para colunas ignoradas) e
+    ``linhas`` uma lista de sequências de valores. Cada coluna é validada
+    de uma vez, e os textos repetidos de preços e quantidades (muito comuns
+    em planilhas) são convertidos uma única vez. Retorna (validas,
+    rejeitadas): as tuplas prontas para o INSERT, na ordem do lote, e uma
+    lista de (índice da linha, erros).
+    """
+    posicoes = {campo: i for i, campo in enumerate(campos) if campo}
+    total = len(linhas)
+    colunas = [None] * len(CAMPOS_PRODUTO)
+    erros_por_linha = {}
+    for (nome, validar, reaproveitavel), posicao in zip(_VALIDADORES, _ORDEM_LINHA):
+        i = posicoes.get(nome)
+        if i is None:
+            valor, erro = validar(None)
+            colunas[posicao] = [valor] * total
+            erros = [erro] * total
+        else:
+            valores = [linha[i] if i < len(linha) else None for linha in linhas]
+            # Só textos: 1, 1.0 e True são a mesma chave num dicionário
+            if reaproveitavel and set(map(type, valores)) <= _TIPOS_TEXTO:
+                unicos = {valor: validar(valor) for valor in set(valores)}
+                resultados = list(map(unicos.__getitem__, valores))
+            else:
+                resultados = list(map(validar, valores))
+            colunas[posicao] = [valor for valor, _ in resultados]
+            erros = [erro for _, erro in resultados]
+        if any(erros):
+            for indice, erro in enumerate(erros):
+                if erro:
+                    erros_por_linha.setdefault(indice, []).append(erro)
+
+    validas = [_calcular_margem(linha) for indice, linha in enumerate(zip(*colunas))
+               if indice not in erros_por_linha]
+    return validas, sorted(erros_por_linha.items())
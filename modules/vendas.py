@@ -1,7 +1,166 @@
 # Funções de Venda
+import sqlite3
 import customtkinter as ctk
+import tkinter as tk
 from tkinter import ttk, messagebox
-from modules import db
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from modules import db, catalogo
+from modules.diario_vendas import obter_diario
+from utils.helpers import executar_em_segundo_plano
+from utils.dinheiro import Dinheiro
+from utils.impressora import Cupom, ItemCupom, obter_fila
+
+# A chave (opcional) identifica a venda no diário (modules.diario_vendas):
+# gravar a mesma venda de novo não faz nada e não retorna id
+_SQL_INSERIR_VENDA = """
+    INSERT INTO vendas (data, total, cliente, chave) VALUES (?, ?, ?, ?)
+    ON CONFLICT (chave) DO NOTHING
+    RETURNING id
+"""
+
+_SQL_INSERIR_ITENS = """
+    INSERT INTO venda_itens (venda_id, produto_id, quantidade, preco_unitario, subtotal)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# Um único UPDATE para todos os produtos da venda (agrupa linhas repetidas
+# do mesmo produto via SUM)
+_SQL_BAIXAR_ESTOQUE = """
+    UPDATE produtos
+    SET quantidade = quantidade - (
+        SELECT SUM(vi.quantidade) FROM venda_itens vi
+        WHERE vi.venda_id = ? AND vi.produto_id = produtos.id
+    )
+    WHERE id IN (SELECT produto_id FROM venda_itens WHERE venda_id = ?)
+"""
+
+
+def gravar_venda(conn, itens, cliente=None, data=None, chave=None):
+    """Grava uma venda dentro de uma transação já aberta.
+
+    ``itens`` é uma sequência de (produto_id, quantidade, preco_unitario),
+    com o preço em centavos (int ou Dinheiro). Insere o cabeçalho em
+    ``vendas``, todos os itens com um único ``executemany`` e baixa o
+    estoque com um UPDATE baseado em conjunto. Retorna o id da venda, ou
+    None se a ``chave`` já estava gravada.
+    """
+    linhas = [
+        (produto_id, quantidade, preco, quantidade * preco)
+        for produto_id, quantidade, preco in itens
+    ]
+    if not linhas:
+        raise ValueError("A venda não possui itens")
+    if not all(isinstance(linha[2], int) for linha in linhas):
+        raise TypeError("Preços das vendas devem estar em centavos (int)")
+
+    total = sum(linha[3] for linha in linhas)
+    data = data or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    inserida = conn.execute(_SQL_INSERIR_VENDA, (data, total, cliente, chave)).fetchone()
+    if inserida is None:
+        return None
+    venda_id = inserida[0]
+    conn.executemany(_SQL_INSERIR_ITENS, [(venda_id,) + linha for linha in linhas])
+    conn.execute(_SQL_BAIXAR_ESTOQUE, (venda_id, venda_id))
+    return venda_id
+
+
+def registrar_venda(itens, cliente=None, data=None, chave=None):
+    """Grava uma venda completa e espera o commit (ver gravar_venda)"""
+    # Pelo escritor em grupo (db.EscritorBanco): vendas de vários caixas que
+    # chegam juntas dividem a mesma transação IMMEDIATE e o mesmo fsync, e a
+    # baixa relativa (quantidade - vendido) continua serializada
+    return db.escrever(gravar_venda, itens, cliente, data, chave)
+
+
+class BuscaProdutos(ctk.CTkFrame):
+    """Campo de busca incremental de produtos com lista de sugestões.
+
+    A cada tecla agenda uma busca após ``atraso_ms`` (debounce); a consulta
+    roda em uma thread de trabalho (utils.helpers.TarefaSegundoPlano) e a
+    busca anterior é cancelada, então respostas superadas são descartadas.
+    """
+
+    # Uma única thread basta: buscas novas tornam as antigas obsoletas
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="busca-produtos")
+
+    def __init__(self, parent, ao_selecionar, limite=15, atraso_ms=150):
+        super().__init__(parent, fg_color="transparent")
+        self.ao_selecionar = ao_selecionar
+        self.limite = limite
+        self.atraso_ms = atraso_ms
+        self.resultados = []
+        self._agendamento = None
+        self._tarefa = None
+
+        self.entry = ctk.CTkEntry(self, placeholder_text="Buscar produto (nome, descrição ou categoria)")
+        self.entry.pack(fill="x")
+        self.entry.bind("<KeyRelease>", self._ao_digitar)
+        self.entry.bind("<Return>", lambda e: self.selecionar())
+        self.entry.bind("<Down>", lambda e: self._mover_selecao(1))
+        self.entry.bind("<Up>", lambda e: self._mover_selecao(-1))
+
+        self.lista = tk.Listbox(
+            self, height=6, activestyle="none", exportselection=False,
+            bg="#343a40", fg="#ffffff", selectbackground="#1f538d",
+            selectforeground="#ffffff", highlightthickness=0, borderwidth=0)
+        self.lista.bind("<Double-Button-1>", lambda e: self.selecionar())
+
+    def _ao_digitar(self, event):
+        if event.keysym in ("Return", "Up", "Down"):
+            return
+        # Debounce: só consulta quando o operador para de digitar
+        if self._agendamento is not None:
+            self.after_cancel(self._agendamento)
+        self._agendamento = self.after(self.atraso_ms, self._disparar_busca)
+
+    def _disparar_busca(self):
+        self._agendamento = None
+        # Resultado de uma busca anterior ainda em andamento já não interessa
+        if self._tarefa is not None:
+            self._tarefa.cancelar()
+            self._tarefa = None
+        texto = self.entry.get().strip()
+        if len(texto) < 2:
+            self._mostrar([])
+            return
+        self._tarefa = executar_em_segundo_plano(
+            self, catalogo.buscar_produtos, texto, self.limite,
+            ao_concluir=self._mostrar, executor=self._executor)
+
+    def _mostrar(self, resultados):
+        self._tarefa = None
+        self.resultados = resultados
+        self.lista.delete(0, "end")
+        for item in resultados:
+            self.lista.insert("end", f"{item.nome}  -  {Dinheiro(item.preco_venda)}")
+        if resultados:
+            self.lista.selection_set(0)
+            self.lista.pack(fill="x", pady=(2, 0))
+        else:
+            self.lista.pack_forget()
+
+    def _mover_selecao(self, passo):
+        if not self.resultados:
+            return
+        atual = self.lista.curselection()
+        indice = min(max((atual[0] if atual else -1) + passo, 0), len(self.resultados) - 1)
+        self.lista.selection_clear(0, "end")
+        self.lista.selection_set(indice)
+        self.lista.see(indice)
+
+    def selecionar(self):
+        """Entrega o item destacado ao callback e limpa a busca"""
+        atual = self.lista.curselection()
+        if not atual:
+            return
+        item = self.resultados[atual[0]]
+        self.entry.delete(0, "end")
+        if self._tarefa is not None:
+            self._tarefa.cancelar()
+        self._mostrar([])
+        self.ao_selecionar(item)
 
 
 class TelaVendas(ctk.CTk):
@@ -11,22 +170,27 @@ class TelaVendas(ctk.CTk):
         self.geometry("700x500")
         ctk.set_appearance_mode("dark")
 
-        self.produtos = self.carregar_produtos()
-        self.total = 0.0
+        self.indice = catalogo.obter_indice()
+        self.itens = []
+        self.nomes = []
+        self.total = Dinheiro(0)
 
         # --- Layout ---
         frame_top = ctk.CTkFrame(self)
         frame_top.pack(pady=10, fill="x")
 
-        self.produto_var = ctk.StringVar(value=list(self.produtos.keys())[
-                                         0] if self.produtos else "")
-        self.combo_produto = ctk.CTkComboBox(frame_top, values=list(
-            self.produtos.keys()), variable=self.produto_var)
-        self.combo_produto.pack(side="left", padx=10)
+        # Leitura do scanner: o leitor "digita" o código e envia Enter
+        self.entry_codigo = ctk.CTkEntry(frame_top, placeholder_text="Código de barras")
+        self.entry_codigo.pack(side="left", padx=10)
+        self.entry_codigo.bind("<Return>", lambda e: self.adicionar_por_codigo())
+
+        # Busca incremental no lugar da lista com todos os produtos
+        self.busca_produto = BuscaProdutos(frame_top, ao_selecionar=self.lancar_item)
+        self.busca_produto.pack(side="left", padx=10, fill="x", expand=True)
 
         self.btn_add = ctk.CTkButton(
-            frame_top, text="Adicionar", command=self.adicionar_produto)
-        self.btn_add.pack(side="left")
+            frame_top, text="Adicionar", command=self.busca_produto.selecionar)
+        self.btn_add.pack(side="left", anchor="n", padx=(0, 10))
 
         self.tree = ttk.Treeview(self, columns=(
             "produto", "preco"), show="headings", height=15)
@@ -35,45 +199,78 @@ class TelaVendas(ctk.CTk):
         self.tree.pack(pady=10, fill="both", expand=True)
 
         self.lbl_total = ctk.CTkLabel(
-            self, text="Total: R$ 0.00", font=("Arial", 16, "bold"))
+            self, text=f"Total: {self.total}", font=("Arial", 16, "bold"))
         self.lbl_total.pack(pady=10)
 
         self.btn_finalizar = ctk.CTkButton(
             self, text="Finalizar Venda", command=self.finalizar_venda)
         self.btn_finalizar.pack(pady=5)
 
-    def carregar_produtos(self):
-        conn = db.conectar()
-        cursor = conn.cursor()
-        cursor.execute("SELECT nome, preco FROM produtos")
-        produtos = {nome: preco for nome, preco in cursor.fetchall()}
-        conn.close()
-        return produtos
-
-    def adicionar_produto(self):
-        produto = self.produto_var.get()
-        preco = self.produtos.get(produto, 0.0)
+    def lancar_item(self, item):
+        """Adiciona um ItemCatalogo ao carrinho"""
+        preco = Dinheiro(item.preco_venda)
+        self.itens.append((item.id, 1, preco))
+        self.nomes.append(item.nome)
+        self.tree.insert("", "end", values=(item.nome, preco.formatar(simbolo=False)))
+        self.total += preco
+        self.lbl_total.configure(text=f"Total: {self.total}")
 
-        if produto:
-            self.tree.insert("", "end", values=(produto, f"{preco:.2f}"))
-            self.total += preco
-            self.lbl_total.configure(text=f"Total: R$ {self.total:.2f}")
+    def adicionar_por_codigo(self):
+        codigo = self.entry_codigo.get().strip()
+        if not codigo:
+            return
+        item = self.indice.por_codigo(codigo)
+        if item:
+            self.lancar_item(item)
+            self.entry_codigo.delete(0, "end")
+        else:
+            # Código desconhecido: destaca o campo por alguns instantes
+            borda_padrao = ctk.ThemeManager.theme["CTkEntry"]["border_color"]
+            self.entry_codigo.configure(border_color="#dc3545")
+            self.after(800, lambda: self.entry_codigo.configure(border_color=borda_padrao))
 
     def finalizar_venda(self):
-        if self.total == 0:
+        if not self.itens:
             messagebox.showwarning("Aviso", "Nenhum produto adicionado.")
             return
 
-        from datetime import datetime
-        conn = db.conectar()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO vendas (data, total) VALUES (?, ?)",
-                       (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), self.total))
-        conn.commit()
-        conn.close()
+        # A venda vai para o diário local e chega ao banco em segundo plano:
+        # o caixa não espera por um banco travado (backup, relatório longo)
+        try:
+            identificador = obter_diario().registrar(self.itens).chave[:8].upper()
+        except (OSError, RuntimeError, ValueError, TypeError) as e:
+            # Disco cheio, diário fechado ou itens inválidos: tenta direto no
+            # banco. Se também falhar, o carrinho fica como está
+            print(f"Erro ao gravar o diário de vendas: {e}")
+            try:
+                identificador = registrar_venda(self.itens)
+            except (sqlite3.Error, RuntimeError, TimeoutError, ValueError, TypeError) as e:
+                messagebox.showerror("Erro", f"Erro ao registrar a venda: {e}")
+                return
+        self.imprimir_cupom(identificador)
 
         messagebox.showinfo("Venda Finalizada",
-                            f"Venda registrada!\nTotal: R$ {self.total:.2f}")
+                            f"Venda registrada!\nTotal: {self.total}")
         self.tree.delete(*self.tree.get_children())
-        self.total = 0.0
-        self.lbl_total.configure(text="Total: R$ 0.00")
\ No newline at end of file
+        self.itens = []
+        self.nomes = []
+        self.total = Dinheiro(0)
+        self.lbl_total.configure(text=f"Total: {self.total}")
+
+    def imprimir_cupom(self, venda_id):
+        """Coloca o cupom na fila de impressão; não espera a impressora.
+
+        ``venda_id`` é o código impresso: o início da chave do diário (ou o
+        id da venda, se ela foi gravada direto no banco).
+        """
+        fila = obter_fila()
+        if fila is None:
+            return
+        itens = [ItemCupom(nome, quantidade, preco, quantidade * preco)
+                 for nome, (_, quantidade, preco) in zip(self.nomes, self.itens)]
+        try:
+            fila.enfileirar(Cupom(venda_id, datetime.now().strftime("%d/%m/%Y %H:%M"),
+                                  itens, self.total))
+        except OSError as e:
+            # A venda já está gravada: sem cupom, mas sem travar o caixa
+            print(f"Erro ao enfileirar cupom da venda {venda_id}: {e}")
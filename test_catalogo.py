@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Teste do índice de produtos em memória usado pelo caixa
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tempfile
+from modules import db
+from modules.catalogo import IndiceProdutos, buscar_produtos, obter_indice
+
+
+def inserir_produto(nome, codigo, preco):
+    with db.transacao() as conn:
+        cursor = conn.execute(
+            "INSERT INTO produtos (nome, categoria, codigo_barras, preco_custo, preco_venda) VALUES (?, 'Outros', ?, ?, ?)",
+            (nome, codigo, preco, preco))
+    return cursor.lastrowid
+
+
+def test_indice_produtos():
+    """Testa carga preguiçosa, contadores e invalidação do índice"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            leite = inserir_produto("Leite", "7891000100103", 549)
+
+            indice = IndiceProdutos()
+            assert indice.estatisticas()['cargas'] == 0, "Carga deveria ser preguiçosa"
+
+            item = indice.por_codigo("7891000100103")
+            assert item.nome == "Leite" and item.preco_venda == 549
+            assert indice.por_nome("Leite").id == leite
+            assert indice.por_codigo("0000000000000") is None
+
+            stats = indice.estatisticas()
+            assert (stats['acertos'], stats['faltas'], stats['cargas']) == (2, 1, 1)
+
+            # Código desconhecido lido de novo não volta ao banco
+            consultas = stats['consultas_banco']
+            for _ in range(5):
+                assert indice.por_codigo("0000000000000") is None
+            assert indice.estatisticas()['consultas_banco'] == consultas
+            assert indice.estatisticas()['ausentes'] == 1
+
+            # Produto cadastrado depois da carga é encontrado por consulta pontual,
+            # mesmo que o código já tenha sido lido antes (invalidar limpa as ausências)
+            assert indice.por_codigo("7891000200209") is None
+            pao = inserir_produto("Pao", "7891000200209", 75)
+            assert indice.por_codigo("7891000200209") is None
+            indice.invalidar(pao)
+            assert indice.estatisticas()['ausentes'] == 0
+            assert indice.por_codigo("7891000200209").nome == "Pao"
+            assert "Pao" in indice.nomes()
+
+            # Alteração de um produto: invalidar(id) troca somente aquela entrada
+            with db.transacao() as conn:
+                conn.execute("UPDATE produtos SET nome = 'Leite Integral', preco_venda = 599 WHERE id = ?", (leite,))
+            indice.invalidar(leite)
+            assert indice.por_nome("Leite") is None
+            assert indice.por_codigo("7891000100103").preco_venda == 599
+            assert indice.estatisticas()['cargas'] == 1
+
+            indice.invalidar()
+            assert indice.por_nome("Leite Integral").id == leite
+            assert indice.estatisticas()['cargas'] == 2
+        finally:
+            db.fechar_pool()
+
+
+def test_busca_produtos():
+    """Testa a busca por prefixo (FTS5) e sua sincronia com a tabela produtos"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            arroz = inserir_produto("Arroz Integral 5kg", None, 2490)
+            inserir_produto("Feijão Preto 1kg", None, 890)
+            inserir_produto("Açúcar Refinado", None, 450)
+
+            # Prefixo, acentos e ordem das palavras não importam
+            assert [i.nome for i in buscar_produtos("arr")] == ["Arroz Integral 5kg"]
+            assert [i.nome for i in buscar_produtos("feijao")] == ["Feijão Preto 1kg"]
+            assert [i.nome for i in buscar_produtos("int arr")] == ["Arroz Integral 5kg"]
+            assert [i.nome for i in buscar_produtos("acucar")] == ["Açúcar Refinado"]
+            # Busca por categoria
+            assert len(buscar_produtos("outros")) == 3
+            # Palavra errada: cai na busca tolerante (qualquer termo)
+            assert [i.nome for i in buscar_produtos("arroz xpto")] == ["Arroz Integral 5kg"]
+            # Erros de digitação: corrigidos pelas palavras dos nomes cadastrados
+            obter_indice().invalidar()
+            assert [i.nome for i in buscar_produtos("aroz")] == ["Arroz Integral 5kg"]
+            assert [i.nome for i in buscar_produtos("feijso prteo")] == ["Feijão Preto 1kg"]
+            assert [i.nome for i in buscar_produtos("açucra")] == ["Açúcar Refinado"]
+            assert buscar_produtos("xyzw") == []
+            assert buscar_produtos("") == []
+
+            # Gatilhos mantêm o índice atualizado e produtos inativos somem
+            with db.transacao() as conn:
+                conn.execute("UPDATE produtos SET nome = 'Arroz Parboilizado' WHERE id = ?", (arroz,))
+            assert [i.nome for i in buscar_produtos("parb")] == ["Arroz Parboilizado"]
+            assert buscar_produtos("integral") == []
+            with db.transacao() as conn:
+                conn.execute("UPDATE produtos SET ativo = 0 WHERE id = ?", (arroz,))
+            assert buscar_produtos("arroz") == []
+
+            # Muitos inativos casando antes dele não escondem o produto ativo
+            with db.transacao() as conn:
+                conn.executemany(
+                    "INSERT INTO produtos (nome, categoria, preco_custo, preco_venda, ativo) VALUES (?, 'Outros', 100, 100, 0)",
+                    [(f"Arroz Antigo {i}",) for i in range(400)])
+            inserir_produto("Arroz Agulhinha", None, 1990)
+            assert [i.nome for i in buscar_produtos("arroz")] == ["Arroz Agulhinha"]
+        finally:
+            db.fechar_pool()
+
+
+if __name__ == "__main__":
+    test_indice_produtos()
+    test_busca_produtos()
+    print("Todos os testes passaram!")
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Teste da camada de banco de dados (pool de conexões, migrações e índices)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite3
+import tempfile
+import threading
+from modules import db
+
+
+def test_pool_conexoes():
+    """Testa reuso, concorrência e contadores do pool de conexões"""
+    with tempfile.TemporaryDirectory() as pasta:
+        pool = db.PoolConexoes(os.path.join(pasta, "teste.sqlite3"), tamanho=2)
+
+        # A mesma conexão deve ser reaproveitada entre empréstimos
+        with pool.conexao() as conn:
+            primeira = conn
+            conn.execute("CREATE TABLE itens (valor INTEGER)")
+        with pool.conexao() as conn:
+            assert conn is primeira, "Conexão não foi reaproveitada"
+
+        # Transação sem commit deve ser desfeita na devolução
+        with pool.conexao() as conn:
+            conn.execute("INSERT INTO itens VALUES (1)")
+        with pool.conexao() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM itens").fetchone()[0] == 0
+
+        # transacao() faz commit ao final do bloco
+        with pool.transacao() as conn:
+            conn.execute("INSERT INTO itens VALUES (2)")
+
+        # Várias threads disputando duas conexões
+        def inserir():
+            for _ in range(20):
+                with pool.transacao() as conn:
+                    conn.execute("INSERT INTO itens VALUES (3)")
+
+        threads = [threading.Thread(target=inserir) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        with pool.conexao() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM itens").fetchone()[0]
+        assert total == 121, f"Esperado 121 registros, obtido {total}"
+
+        stats = pool.estatisticas()
+        assert stats['conexoes_abertas'] <= 2
+        assert stats['checkouts'] >= 125
+
+        # Conexão fechada por fora é substituída no próximo empréstimo
+        with pool.conexao() as conn:
+            conn.close()
+        with pool.conexao() as conn:
+            conn.execute("SELECT 1")
+        assert pool.estatisticas()['conexoes_descartadas'] >= 1
+
+        pool.fechar()
+
+
+def test_perfil_pragma():
+    """Testa se criar_tabelas aplica o perfil de desempenho (WAL)"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"), perfil="desempenho")
+        try:
+            db.criar_tabelas()
+            with db.conexao() as conn:
+                assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+                # synchronous NORMAL = 1, temp_store MEMORY = 2
+                assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+                assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+                conn.execute("INSERT INTO vendas (data, total) VALUES ('2025-01-01', 10)")
+                conn.commit()
+                ocupado, _, _ = db.executar_checkpoint(conn, "TRUNCATE")
+                assert ocupado == 0
+        finally:
+            db.fechar_pool()
+
+
+def test_escritor_banco():
+    """Testa commit em grupo, resultados por trabalho e erro isolado no lote"""
+    with tempfile.TemporaryDirectory() as pasta:
+        pool = db.PoolConexoes(os.path.join(pasta, "teste.sqlite3"), tamanho=2)
+        with pool.transacao() as conn:
+            conn.execute("CREATE TABLE itens (valor INTEGER NOT NULL)")
+        escritor = db.EscritorBanco(pool, latencia=0.02, tamanho_lote=50).iniciar()
+
+        def inserir(conn, valor):
+            return conn.execute("INSERT INTO itens VALUES (?) RETURNING rowid", (valor,)).fetchone()[0]
+
+        # Várias threads enviando ao mesmo tempo dividem as transações
+        ids = []
+
+        def caixa():
+            ids.extend(escritor.executar(inserir, 1) for _ in range(25))
+
+        threads = [threading.Thread(target=caixa) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(ids) == list(range(1, 201))
+        stats = escritor.estatisticas()
+        assert stats['trabalhos'] == 200 and stats['lotes'] < 200, stats
+        assert stats['maior_lote'] <= 50
+
+        # O erro de um trabalho desfaz só ele; os outros do lote são gravados
+        futuros = [escritor.enviar(inserir, valor) for valor in (2, None, 3)]
+        assert futuros[0].result() and futuros[2].result()
+        try:
+            futuros[1].result()
+            assert False, "Valor nulo deveria ser recusado"
+        except sqlite3.IntegrityError:
+            pass
+        with pool.conexao() as conn:
+            assert conn.execute("SELECT COUNT(*), SUM(valor) FROM itens").fetchone() == (202, 205)
+
+        escritor.parar()
+        try:
+            escritor.enviar(inserir, 4)
+            assert False, "Escritor encerrado deveria recusar trabalhos"
+        except RuntimeError:
+            pass
+        pool.fechar()
+
+
+def test_escritor_banco_travado():
+    """Testa que banco travado no início do lote vira erro, e não espera sem fim"""
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "teste.sqlite3")
+        db.configurar_banco(caminho, tamanho_pool=1)
+        try:
+            with db.transacao() as conn:
+                conn.execute("CREATE TABLE itens (valor INTEGER NOT NULL)")
+                # O pool tem uma conexão só: é a mesma que o escritor vai usar
+                conn.execute("PRAGMA busy_timeout = 100")
+            trava = sqlite3.connect(caminho, isolation_level=None)
+            trava.execute("BEGIN EXCLUSIVE")
+            erros = []
+
+            def caixa():
+                try:
+                    db.escrever(lambda conn: conn.execute("INSERT INTO itens VALUES (1)"))
+                except sqlite3.OperationalError as e:
+                    erros.append(e)
+
+            t = threading.Thread(target=caixa, daemon=True)
+            t.start()
+            t.join(5)
+            assert not t.is_alive(), "escrever() ficou esperando com o banco travado"
+            assert len(erros) == 1 and "locked" in str(erros[0]), erros
+            trava.rollback()
+            trava.close()
+
+            # Destravado, o escritor continua gravando
+            db.escrever(lambda conn: conn.execute("INSERT INTO itens VALUES (2)"))
+            with db.conexao() as conn:
+                assert conn.execute("SELECT COUNT(*) FROM itens").fetchone()[0] == 1
+        finally:
+            db.fechar_pool()
+
+
+def test_migracoes():
+    """Testa migração de banco novo, de banco antigo e abertura de banco atual"""
+    with tempfile.TemporaryDirectory() as pasta:
+        # Banco novo: todas as migrações são aplicadas
+        conn = db.conectar(os.path.join(pasta, "novo.sqlite3"))
+        assert db.migrar(conn) == list(range(1, db.VERSAO_ESQUEMA + 1))
+        assert db.versao_esquema(conn) == db.VERSAO_ESQUEMA
+        # Banco atual: nenhuma migração roda
+        assert db.migrar(conn) == []
+        conn.close()
+
+        # Banco antigo com produtos (id, nome, preco) e sem user_version
+        conn = db.conectar(os.path.join(pasta, "antigo.sqlite3"))
+        conn.execute("CREATE TABLE produtos (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL, preco REAL NOT NULL)")
+        conn.execute("CREATE TABLE vendas (id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL, total REAL NOT NULL)")
+        conn.execute("INSERT INTO produtos (nome, preco) VALUES ('Cafe', 12.5)")
+        conn.commit()
+        db.migrar(conn)
+        produto = conn.execute(
+            "SELECT nome, categoria, preco_venda FROM produtos").fetchone()
+        assert produto == ('Cafe', 'Outros', 1250), produto
+        assert 'cliente' in db._colunas(conn, 'vendas')
+        conn.close()
+
+        # Banco da versão 11, com preços e totais em reais (REAL)
+        conn = db.conectar(os.path.join(pasta, "reais.sqlite3"))
+        for versao, migracao in enumerate(db.MIGRACOES[:11], start=1):
+            migracao(conn)
+            conn.execute(f"PRAGMA user_version = {versao}")
+        conn.execute("""
+            INSERT INTO produtos (nome, categoria, quantidade, preco_custo, preco_venda)
+            VALUES ('Bala', 'Doces', 10, 0.07, 0.1)
+        """)
+        for _ in range(3):
+            venda_id = conn.execute(
+                "INSERT INTO vendas (data, total) VALUES ('2025-03-10 10:00:00', 0.1)").lastrowid
+            conn.execute(
+                "INSERT INTO venda_itens (venda_id, produto_id, quantidade, preco_unitario, subtotal) VALUES (?, 1, 1, 0.1, 0.1)",
+                (venda_id,))
+        conn.execute("DELETE FROM vendas WHERE id = 3")
+        conn.commit()
+        assert conn.execute("SELECT total FROM vendas_resumo_diario").fetchone()[0] != 0.2  # soma em float
+
+        assert db.migrar(conn) == [12, 13]
+        assert conn.execute("SELECT preco_custo, preco_venda, typeof(preco_venda) FROM produtos").fetchone() == (7, 10, 'integer')
+        assert conn.execute("SELECT SUM(total) FROM vendas").fetchone()[0] == 20
+        assert conn.execute("SELECT DISTINCT preco_unitario, subtotal FROM venda_itens").fetchall() == [(10, 10)]
+        assert conn.execute("SELECT total, quantidade FROM vendas_resumo_diario").fetchone() == (20, 2)
+        assert conn.execute("SELECT valor FROM contadores WHERE nome = 'produtos'").fetchone()[0] == 1
+        # Índices, gatilhos, busca e chaves estrangeiras continuam valendo
+        assert conn.execute("SELECT rowid FROM produtos_busca WHERE produtos_busca MATCH 'bal*'").fetchall() == [(1,)]
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+        venda_id = conn.execute("INSERT INTO vendas (data, total) VALUES ('2025-03-10 11:00:00', 10)").lastrowid
+        assert venda_id == 4  # AUTOINCREMENT não reaproveita o id apagado
+        assert conn.execute("SELECT total, quantidade FROM vendas_resumo_diario").fetchone() == (30, 3)
+        try:
+            conn.execute("INSERT INTO venda_itens (venda_id, produto_id, quantidade, preco_unitario, subtotal) VALUES (?, 99, 1, 1, 1)",
+                         (venda_id,))
+            assert False, "Produto inexistente deveria violar a chave estrangeira"
+        except sqlite3.IntegrityError:
+            pass
+        conn.close()
+
+        # Tabela que ficou vazia antes da migração 12 também mantém a sequência
+        conn = db.conectar(os.path.join(pasta, "vazio.sqlite3"))
+        for versao, migracao in enumerate(db.MIGRACOES[:11], start=1):
+            migracao(conn)
+            conn.execute(f"PRAGMA user_version = {versao}")
+        for _ in range(5):
+            conn.execute("INSERT INTO vendas (data, total) VALUES ('2025-03-10 10:00:00', 1.0)")
+        conn.execute("DELETE FROM vendas")
+        conn.commit()
+        assert db.migrar(conn) == [12, 13]
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_sequence WHERE name = 'vendas'").fetchone()[0] == 1
+        assert conn.execute("INSERT INTO vendas (data, total) VALUES ('2025-03-11 10:00:00', 100)").lastrowid == 6
+        conn.close()
+
+
+def test_planos_consultas():
+    """Nenhuma consulta conhecida pode varrer uma tabela inteira sem permissão"""
+    from check_indices import Consulta, analisar, problemas
+    from modules.exportacao import montar_consulta
+
+    with tempfile.TemporaryDirectory() as pasta:
+        conn = db.conectar(os.path.join(pasta, "teste.sqlite3"))
+        db.migrar(conn)
+        falhas = problemas(analisar(conn))
+        assert not falhas, [(f.consulta.nome, f.varreduras) for f in falhas]
+
+        # Exportação por data sem o limite superior do id: "rowid>?" lê do
+        # limite até o fim da tabela, mesmo sendo uma busca pela chave
+        for tabela in ("vendas", "venda_itens"):
+            sql, parametros = montar_consulta(tabela, "2024-06-01", "2024-06-30")
+            aberta = Consulta(f"exportação aberta: {tabela}", sql, parametros, False)
+            assert problemas(analisar(conn, [aberta])), tabela
+
+        # Sem os índices, a verificação precisa acusar a regressão
+        conn.execute("DROP INDEX idx_usuarios_nome")
+        conn.execute("DROP INDEX idx_produtos_categoria")
+        conn.close()
+        # Conexão nova: o EXPLAIN já preparado no cache da anterior não é
+        # recompilado após a mudança de esquema e mostraria o plano antigo
+        conn = db.conectar(os.path.join(pasta, "teste.sqlite3"))
+        nomes = {f.consulta.nome for f in problemas(analisar(conn))}
+        assert "login" in nomes, nomes
+        conn.close()
+
+
+if __name__ == "__main__":
+    test_pool_conexoes()
+    test_perfil_pragma()
+    test_escritor_banco()
+    test_escritor_banco_travado()
+    test_migracoes()
+    test_planos_consultas()
+    print("Todos os testes passaram!")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Teste do diário de vendas: aplicação em lote, banco travado, reaplicação
+idempotente e recuperação de uma escrita interrompida ou de linhas
+corrompidas no meio do arquivo
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite3
+import tempfile
+import time
+import uuid
+from modules import db
+from modules.diario_vendas import DiarioVendas, _codificar, _novo_registro, ler_diario
+
+
+def contar(conn, sql):
+    return conn.execute(sql).fetchone()[0]
+
+
+def test_diario_vendas():
+    """Testa que o caixa não espera o banco e que nada é perdido ou duplicado"""
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_banco = os.path.join(pasta, "teste.sqlite3")
+        caminho_diario = os.path.join(pasta, "diario.log")
+        db.configurar_banco(caminho_banco)
+        try:
+            db.criar_tabelas()
+            with db.transacao() as conn:
+                conn.execute("""
+                    INSERT INTO produtos (id, nome, categoria, quantidade, preco_custo, preco_venda)
+                    VALUES (1, 'Cafe', 'Outros', 1000, 1000, 1500)
+                """)
+
+            diario = DiarioVendas(caminho_diario, tamanho_lote=50).abrir()
+            for _ in range(100):
+                diario.registrar([(1, 2, 1500)], cliente="Ana")
+            assert diario.aguardar(timeout=5)
+            with db.conexao() as conn:
+                assert contar(conn, "SELECT COUNT(*) FROM vendas WHERE chave IS NOT NULL") == 100
+                assert contar(conn, "SELECT quantidade FROM produtos WHERE id = 1") == 800
+
+            # Banco travado por outro processo: o caixa continua registrando
+            bloqueio = sqlite3.connect(caminho_banco, isolation_level=None)
+            bloqueio.execute("BEGIN EXCLUSIVE")
+            inicio = time.perf_counter()
+            for _ in range(20):
+                diario.registrar([(1, 1, 1500)])
+            assert time.perf_counter() - inicio < 0.5
+            time.sleep(0.2)
+            assert diario.pendentes() == 20
+            bloqueio.rollback()
+            bloqueio.close()
+            assert diario.aguardar(timeout=10)
+
+            # Venda que o banco recusa (produto inexistente) não trava a fila
+            diario.registrar([(999, 1, 100)])
+            diario.registrar([(1, 1, 1500)])
+            assert diario.aguardar(timeout=5)
+            assert diario.rejeitadas == 1
+            assert [r.itens for r in ler_diario(caminho_diario + ".rejeitadas")[0]] == [[(999, 1, 100)]]
+            diario.fechar()
+
+            registros, tamanho, corrompidas = ler_diario(caminho_diario)
+            assert len(registros) == 122 and tamanho == os.path.getsize(caminho_diario)
+            assert corrompidas == []
+
+            # Queda no meio de uma escrita: a linha incompleta é descartada e
+            # reabrir o diário reaplica tudo sem duplicar vendas (nem rejeitadas)
+            with open(caminho_diario, "ab") as arquivo:
+                arquivo.write(b'0badc0de {"chave": "incomp')
+            reaberto = DiarioVendas(caminho_diario).abrir()
+            assert reaberto.aguardar(timeout=5)
+            assert os.path.getsize(caminho_diario) == tamanho
+            assert (reaberto.aplicadas, reaberto.repetidas, reaberto.rejeitadas) == (0, 121, 0)
+            with db.conexao() as conn:
+                assert contar(conn, "SELECT COUNT(*) FROM vendas") == 121
+                assert contar(conn, "SELECT quantidade FROM produtos WHERE id = 1") == 1000 - 200 - 21
+            reaberto.fechar()
+
+            # Linhas corrompidas no meio do arquivo (bit trocado, escrita
+            # parcial seguida de outra venda) não levam as vendas seguintes:
+            # são isoladas e o resto é aplicado
+            novas = [_codificar(_novo_registro(uuid.uuid4().hex, "2024-01-02 10:00:00", None, [(1, 1, 1500)]))
+                     for _ in range(3)]
+            with open(caminho_diario, "rb") as arquivo:
+                linhas = arquivo.readlines()
+            conteudo = (linhas[:10] + [linhas[10].replace(b'"itens"', b'"itenz"')] + linhas[11:20]
+                        + [linhas[20][:30] + novas[0]] + linhas[21:] + novas[1:])
+            with open(caminho_diario, "wb") as arquivo:
+                arquivo.write(b"".join(conteudo))
+            reaberto = DiarioVendas(caminho_diario).abrir()
+            assert reaberto.aguardar(timeout=5)
+            assert reaberto.corrompidas == 2
+            assert (reaberto.aplicadas, reaberto.repetidas, reaberto.rejeitadas) == (3, 119, 0)
+            with db.conexao() as conn:
+                assert contar(conn, "SELECT COUNT(*) FROM vendas") == 124
+                assert contar(conn, "SELECT quantidade FROM produtos WHERE id = 1") == 1000 - 200 - 21 - 3
+            reaberto.fechar()
+            with open(caminho_diario + ".corrompidas", "rb") as arquivo:
+                assert arquivo.read() == linhas[10].replace(b'"itens"', b'"itenz"') + linhas[20][:30] + b"\n"
+            # O diário foi regravado sem elas: abrir de novo não as isola outra vez
+            registros, tamanho, corrompidas = ler_diario(caminho_diario)
+            assert len(registros) == 123 and corrompidas == []
+
+            # Uma linha íntegra que gravar_venda recusa (venda sem itens) vai
+            # para as rejeitadas sem parar a aplicação das vendas seguintes
+            with open(caminho_diario, "ab") as arquivo:
+                arquivo.write(_codificar(_novo_registro(uuid.uuid4().hex, "2024-01-02 11:00:00", None, [])))
+            reaberto = DiarioVendas(caminho_diario).abrir()
+            reaberto.registrar([(1, 1, 1500)])
+            assert reaberto.aguardar(timeout=5)
+            assert (reaberto.aplicadas, reaberto.rejeitadas) == (1, 1)
+            assert [r.itens for r in ler_diario(caminho_diario + ".rejeitadas")[0]] == [[(999, 1, 100)], []]
+            reaberto.fechar()
+            try:
+                reaberto.registrar([(1, 1, 1500)])
+                assert False, "Diário fechado deveria recusar vendas"
+            except RuntimeError:
+                pass
+            with db.conexao() as conn:
+                assert contar(conn, "SELECT COUNT(*) FROM vendas") == 125
+
+            # Com tudo no banco, o diário é zerado ao passar do limite
+            compactado = DiarioVendas(caminho_diario, limite_bytes=1).abrir()
+            compactado.registrar([(1, 1, 1500)])
+            assert compactado.aguardar(timeout=5)
+            for _ in range(100):
+                if os.path.getsize(caminho_diario) == 0:
+                    break
+                time.sleep(0.01)
+            assert os.path.getsize(caminho_diario) == 0
+            compactado.fechar()
+        finally:
+            db.fechar_pool()
+
+
+if __name__ == "__main__":
+    test_diario_vendas()
+    print("Todos os testes passaram!")
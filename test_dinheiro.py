@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Teste do tipo Dinheiro (centavos inteiros) e do formatador de moeda
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite3
+from utils.dinheiro import Dinheiro, formatar_moeda
+
+
+def test_conversao_e_formatacao():
+    """Testa leitura de valores digitados/importados e o formato brasileiro"""
+    assert Dinheiro.de_texto("1.234,56") == 123456
+    assert Dinheiro.de_texto("R$ 3,00") == Dinheiro.de_texto("3") == 300
+    assert Dinheiro.de_texto("12.5") == Dinheiro.de_reais(12.5) == 1250
+    assert Dinheiro.de_reais(0.29) == 29  # 0.29 * 100 = 28.999... em float
+    assert Dinheiro.de_reais("0.005") == 1  # meio centavo arredonda para cima
+    for invalido in ("abc", "", None, "1,2,3"):
+        try:
+            Dinheiro.de_texto(invalido)
+            assert False, f"{invalido!r} deveria ser recusado"
+        except ValueError:
+            pass
+    try:
+        Dinheiro(12.5)
+        assert False, "float não é centavos"
+    except TypeError:
+        pass
+
+    assert formatar_moeda(0) == "R$ 0,00"
+    assert formatar_moeda(123456789) == "R$ 1.234.567,89"
+    assert formatar_moeda(-5, simbolo=False) == "-0,05"
+    assert str(Dinheiro(1250)) == f"{Dinheiro(1250)}" == "R$ 12,50"
+    assert f"{Dinheiro(1250):>6d}" == "  1250"
+
+
+def test_aritmetica():
+    """Testa que as operações de um carrinho continuam exatas e em Dinheiro"""
+    preco = Dinheiro.de_texto("0,10")
+    total = sum([preco] * 3)
+    assert total == 30 and isinstance(total, Dinheiro)  # 0.1 * 3 em float: 0.30000000000000004
+    assert isinstance(preco * 3, Dinheiro) and 3 * preco == total
+    assert isinstance(total - preco, Dinheiro) and total - preco == 20
+    assert -preco == -10 and abs(-preco) == preco
+    assert total.reais == 0.3
+
+    # Vai para o SQLite como INTEGER e SUM continua inteiro
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE vendas (total INTEGER NOT NULL)")
+    conn.executemany("INSERT INTO vendas VALUES (?)", [(preco,)] * 1000)
+    assert conn.execute("SELECT typeof(total), SUM(total) FROM vendas").fetchone() == ("integer", 10000)
+    conn.close()
+
+
+if __name__ == "__main__":
+    test_conversao_e_formatacao()
+    test_aritmetica()
+    print("Todos os testes passaram!")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Teste do estoque baixo por produto (estoque_minimo) e dos alertas publicados
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tempfile
+from modules import db
+from modules.estoque_baixo import MonitorEstoqueBaixo, contar_estoque_baixo, listar_estoque_baixo
+from modules.vendas import registrar_venda
+
+
+def test_estoque_baixo():
+    """Testa contador, listagem pelo índice parcial e eventos de entrada/saída"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            with db.transacao() as conn:
+                conn.executemany("""
+                    INSERT INTO produtos (nome, categoria, quantidade, estoque_minimo, preco_custo, preco_venda)
+                    VALUES (?, 'Outros', ?, ?, 1, 2)
+                """, [("Arroz", 20, 5), ("Feijao", 4, 5), ("Sal", 0, 0), ("Oleo", 6, 6)])
+                ids = dict(conn.execute("SELECT nome, id FROM produtos"))
+
+            # Abaixo do próprio mínimo: só Feijao (Sal tem mínimo 0, Oleo está no mínimo)
+            assert contar_estoque_baixo() == 1
+            assert [p.nome for p in listar_estoque_baixo()] == ["Feijao"]
+
+            monitor = MonitorEstoqueBaixo()
+            recebidas = []
+            cancelar = monitor.assinar(recebidas.append)
+            assert monitor.verificar() is None  # primeira chamada só marca a posição
+
+            # Venda em um caixa derruba Arroz e Oleo; reposição tira Feijao do alerta
+            registrar_venda([(ids["Arroz"], 16, 200), (ids["Oleo"], 1, 200)])
+            with db.transacao() as conn:
+                conn.execute("UPDATE produtos SET quantidade = 30 WHERE id = ?", (ids["Feijao"],))
+                conn.execute("UPDATE produtos SET estoque_minimo = 2 WHERE id = ?", (ids["Sal"],))
+
+            mudanca = monitor.verificar()
+            monitor.publicar(mudanca)
+            assert recebidas == [mudanca]
+            assert mudanca.total == contar_estoque_baixo() == 3
+            assert [(e.produto_id, e.baixo) for e in mudanca.eventos] == [
+                (ids["Arroz"], 1), (ids["Oleo"], 1), (ids["Feijao"], 0), (ids["Sal"], 1)]
+            assert [p.nome for p in listar_estoque_baixo()] == ["Arroz", "Oleo", "Sal"]
+            assert monitor.verificar() is None
+
+            # Produto inativado ou apagado sai do alerta
+            with db.transacao() as conn:
+                conn.execute("UPDATE produtos SET ativo = 0 WHERE id = ?", (ids["Arroz"],))
+                conn.execute("DELETE FROM produtos WHERE id = ?", (ids["Sal"],))
+            cancelar()
+            monitor.publicar(monitor.verificar())
+            assert len(recebidas) == 1
+            assert contar_estoque_baixo() == 1
+
+            with db.conexao() as conn:
+                plano = conn.execute("""
+                    EXPLAIN QUERY PLAN SELECT COUNT(*) FROM produtos
+                    WHERE ativo = 1 AND quantidade < estoque_minimo
+                """).fetchall()
+            assert "idx_produtos_estoque_baixo" in plano[0][3], plano
+        finally:
+            db.fechar_pool()
+
+
+if __name__ == "__main__":
+    test_estoque_baixo()
+    print("Todos os testes passaram!")
@@ -40,6 +40,7 @@ def test_estoque_functionality():
         # Verificar se os métodos principais existem
         print("✅ Testando existência dos métodos principais...")
         assert hasattr(estoque, 'save_product'), "Método save_product não encontrado"
+        assert hasattr(estoque, 'gravar_produto'), "Método gravar_produto não encontrado"
         assert hasattr(estoque, 'validate_form'), "Método validate_form não encontrado"
         assert hasattr(estoque, 'calculate_margin'), "Método calculate_margin não encontrado"
         
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Teste da exportação de vendas (filtros, limites do período, gzip e retomada)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import csv
+import gzip
+import json
+import tempfile
+from modules import db
+from modules.exportacao import exportar, limites_periodo
+from modules.vendas import registrar_venda
+
+
+class Interrompida(Exception):
+    pass
+
+
+def test_exportar_vendas():
+    """Testa filtro por data, CSV gzip, JSON Lines e retomada após falha"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            with db.transacao() as conn:
+                produto = conn.execute(
+                    "INSERT INTO produtos (nome, categoria, quantidade, preco_custo, preco_venda) VALUES ('Café', 'Outros', 10000, 500, 1000)"
+                ).lastrowid
+            for dia in range(1, 31):
+                for hora in range(10):
+                    registrar_venda([(produto, 1, 1000), (produto, 2, 1000)],
+                                    data=f"2024-06-{dia:02d} {hora + 8:02d}:00:00")
+
+            # Junho de 10 a 19: 10 dias x 10 vendas
+            destino = os.path.join(pasta, "vendas.csv.gz")
+            resultado = exportar("vendas", destino, inicio="2024-06-10", fim="2024-06-19", tamanho_bloco=30)
+            with gzip.open(destino, "rt", encoding="utf-8") as arquivo:
+                linhas = list(csv.reader(arquivo, delimiter=";"))
+            assert linhas[0][:3] == ["id", "data", "total"], linhas[0]
+            assert len(linhas) == 101 and resultado.linhas == 100
+            assert linhas[1][1] == "2024-06-10 08:00:00" and linhas[-1][1] == "2024-06-19 17:00:00"
+            # Banco em centavos, arquivo em reais
+            assert linhas[1][2] == "30.0"
+            assert not os.path.exists(destino + ".progresso")
+
+            # O período é lido só entre o primeiro e o último id dele
+            with db.conexao() as conn:
+                assert limites_periodo(conn, "vendas", "2024-06-10", "2024-06-19") == (91, 190)
+                assert limites_periodo(conn, "venda_itens", "2024-06-10", "2024-06-19") == (181, 380)
+                assert limites_periodo(conn, "vendas", "2025-01-01") == (0, 0)
+                assert limites_periodo(conn, "vendas") is None
+            assert exportar("venda_itens", os.path.join(pasta, "vazio.csv"), inicio="2025-01-01").linhas == 0
+
+            # Retomar com outro período recomeça, em vez de juntar os dois no arquivo
+            destino = os.path.join(pasta, "periodo.csv")
+
+            def parar(linhas, ultimo_id):
+                raise Interrompida()
+
+            try:
+                exportar("vendas", destino, inicio="2024-06-10", fim="2024-06-19",
+                         tamanho_bloco=30, ao_progredir=parar)
+                assert False, "a exportação deveria ter sido interrompida"
+            except Interrompida:
+                pass
+            resultado = exportar("vendas", destino, inicio="2024-06-01", fim="2024-06-05", retomar=True)
+            with open(destino, encoding="utf-8") as arquivo:
+                linhas = list(csv.reader(arquivo, delimiter=";"))
+            assert resultado.linhas == 50 and len(linhas) == 51
+            assert linhas[1][1] == "2024-06-01 08:00:00" and linhas[-1][1] == "2024-06-05 17:00:00"
+
+            # Exportação interrompida no terceiro bloco e retomada depois
+            destino = os.path.join(pasta, "itens.jsonl.gz")
+            blocos = []
+
+            def interromper(linhas, ultimo_id):
+                blocos.append(ultimo_id)
+                if len(blocos) == 3:
+                    raise Interrompida()
+
+            try:
+                exportar("venda_itens", destino, tamanho_bloco=100, ao_progredir=interromper)
+                assert False, "a exportação deveria ter sido interrompida"
+            except Interrompida:
+                pass
+            assert os.path.exists(destino + ".progresso")
+
+            resultado = exportar("venda_itens", destino, tamanho_bloco=100, retomar=True)
+            assert resultado.linhas == 600
+            with gzip.open(destino, "rt", encoding="utf-8") as arquivo:
+                itens = [json.loads(linha) for linha in arquivo]
+            assert [item["id"] for item in itens] == list(range(1, 601))
+            assert itens[0]["subtotal"] == 10.0 and itens[1]["quantidade"] == 2
+            assert itens[1]["preco_unitario"] == 10.0 and itens[1]["subtotal"] == 20.0
+        finally:
+            db.fechar_pool()
+
+
+if __name__ == "__main__":
+    test_exportar_vendas()
+    print("Todos os testes passaram!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Testes do cache de miniaturas e do armazém de imagens dos produtos
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tempfile
+import time
+from PIL import Image
+from modules import db
+from utils.imagens import CacheMiniaturas, ArmazemImagens
+
+
+def criar_foto(caminho, cor, tamanho=(3000, 2000)):
+    Image.new("RGB", tamanho, cor).save(caminho, "JPEG", quality=90)
+
+
+def test_cache_miniaturas():
+    """Testa geração, reaproveitamento, invalidação por mtime e limite do cache"""
+    with tempfile.TemporaryDirectory() as pasta:
+        foto = os.path.join(pasta, "foto.jpg")
+        criar_foto(foto, (200, 30, 30))
+        cache = CacheMiniaturas(pasta=os.path.join(pasta, "miniaturas"))
+
+        miniatura = cache.miniatura(foto)
+        assert miniatura.width <= 180 and miniatura.height <= 130
+        # Proporção preservada (3:2)
+        assert miniatura.size == (180, 120), miniatura.size
+
+        cache.miniatura(foto)
+        assert cache.estatisticas() == {'acertos': 1, 'faltas': 1, 'removidas': 0}
+
+        # Foto substituída (mtime/tamanho diferentes) gera nova miniatura
+        criar_foto(foto, (30, 200, 30), tamanho=(1200, 1600))
+        os.utime(foto, (1, 1))
+        assert cache.miniatura(foto).size == (97, 130)
+        assert cache.estatisticas()['faltas'] == 2
+
+        # Limite de tamanho estourado: as miniaturas antigas são apagadas
+        cache.limite_bytes = 1
+        cache.aplicar_limite()
+        restantes = os.listdir(cache.pasta)
+        assert restantes == [], restantes
+        assert cache.estatisticas()['removidas'] == 2
+
+
+def test_armazem_imagens():
+    """Testa deduplicação por digest, redução, resolução e coleta de lixo"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            armazem = ArmazemImagens(pasta=os.path.join(pasta, "imagens"))
+
+            foto = os.path.join(pasta, "foto.jpg")
+            criar_foto(foto, (200, 30, 30))
+            copia = os.path.join(pasta, "copia.jpg")
+            with open(foto, "rb") as origem, open(copia, "wb") as destino:
+                destino.write(origem.read())
+
+            # A mesma foto importada duas vezes (de lugares diferentes) vira um arquivo
+            digest = armazem.importar(foto)
+            assert armazem.importar(copia) == digest
+            assert armazem.eh_digest(digest)
+            assert len(list(armazem.digests_armazenados())) == 1
+
+            with Image.open(armazem.resolver(digest)) as armazenada:
+                assert armazenada.format == "WEBP"
+                assert armazenada.size == (1024, 683), armazenada.size
+            assert armazem.resolver("/fotos/antiga.jpg") == "/fotos/antiga.jpg"
+            assert armazem.resolver(None) is None
+
+            # Cadastro antigo com caminho absoluto é convertido para digest
+            outra = os.path.join(pasta, "outra.jpg")
+            criar_foto(outra, (30, 30, 200), tamanho=(400, 300))
+            with db.transacao() as conn:
+                conn.executemany(
+                    "INSERT INTO produtos (nome, categoria, preco_custo, preco_venda, imagem_path) VALUES (?, 'Outros', 1, 2, ?)",
+                    [("A", digest), ("B", digest), ("C", outra), ("D", "/nao/existe.jpg")])
+            with db.conexao() as conn:
+                assert armazem.converter_caminhos_antigos(conn) == 1
+                caminhos = dict(conn.execute("SELECT nome, imagem_path FROM produtos"))
+            assert armazem.eh_digest(caminhos["C"]) and caminhos["D"] == "/nao/existe.jpg"
+
+            # Imagem órfã só é apagada depois do período de carência
+            orfa = os.path.join(pasta, "orfa.png")
+            Image.new("RGB", (50, 50), (0, 0, 0)).save(orfa)
+            digest_orfa = armazem.importar(orfa)
+            with db.conexao() as conn:
+                assert armazem.coletar_lixo(conn) == 0
+                antigo = time.time() - 7200
+                os.utime(armazem.caminho(digest_orfa), (antigo, antigo))
+                os.utime(armazem.caminho(digest), (antigo, antigo))
+                assert armazem.coletar_lixo(conn) == 1
+            restantes = {d for d, _, _ in armazem.digests_armazenados()}
+            assert restantes == {digest, caminhos["C"]}
+        finally:
+            db.fechar_pool()
+
+
+if __name__ == "__main__":
+    test_cache_miniaturas()
+    test_armazem_imagens()
+    print("Todos os testes passaram!")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Teste da importação em lote de produtos (CSV) e das regras de validação
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import csv
+import tempfile
+from modules import db
+from modules.importacao import importar_produtos
+from modules.validacao import preparar_lote, preparar_produto, validar_campo, validar_produto
+
+
+def test_validar_produto():
+    """Testa as regras compartilhadas com o formulário de estoque"""
+    linha, erros = preparar_produto({
+        'nome': ' Arroz ', 'categoria': 'Alimentação', 'codigo_barras': '7891000100103',
+        'quantidade': '10', 'preco_custo': '1.234,50', 'preco_venda': 'R$ 1.500,00',
+    })
+    assert erros == []
+    assert linha[0] == 'Arroz' and linha[4] == 10
+    assert linha[7] == 123450 and linha[8] == 150000
+    assert linha[9] == round((1500 - 1234.5) / 1234.5 * 100, 2)
+
+    erros = validar_produto({'nome': '', 'preco_custo': '0,00', 'preco_venda': 'abc',
+                             'codigo_barras': '123', 'quantidade': '2,5'})
+    assert erros == [
+        "Nome do produto é obrigatório",
+        "Categoria é obrigatória",
+        "Preço de custo deve ser maior que zero",
+        "Preço de venda inválido",
+        "Código de barras deve ter 8 ou 13 dígitos",
+        "Quantidade inválida",
+    ], erros
+
+
+def test_validar_lote():
+    """Testa o modo em lote e a validação campo a campo contra preparar_produto"""
+    campos = ["preco_venda", None, "nome", "categoria", "quantidade", "preco_custo", "margem_lucro"]
+    linhas = [
+        ["1,50", "x", "Arroz", "Alimentação", "10", "1,00", ""],
+        ["1,50", "x", "Feijão", "Alimentação", "2,5", "1,00", "35%"],
+        ["R$ 1.500,00", "x", "Café", "Bebidas", " 7 ", "1.234,50", "12,5"],
+        [True, "x", "", "Outros", 3, 1, None],
+        ["2.5", "x", "Açúcar", "Alimentação", "", "1"],
+    ]
+    validas, rejeitadas = preparar_lote(campos, linhas)
+    esperadas = [preparar_produto({campo: valor for campo, valor in zip(campos, linha) if campo})
+                 for linha in linhas]
+    assert validas == [linha for linha, erros in esperadas if not erros]
+    assert rejeitadas == [(i, erros) for i, (_, erros) in enumerate(esperadas) if erros]
+    assert [i for i, _ in rejeitadas] == [1, 3] and len(validas) == 3
+    assert validas[2][4] == 0 and validas[2][7:10] == (100, 250, 150.0)
+
+    assert validar_campo("codigo_barras", "7891000100103") is None
+    assert validar_campo("codigo_barras", "123") == "Código de barras deve ter 8 ou 13 dígitos"
+    assert validar_campo("preco_custo", "0,00") == "Preço de custo deve ser maior que zero"
+    assert validar_campo("nome", "  ") == "Nome do produto é obrigatório"
+
+
+def test_importar_csv():
+    """Testa lotes, rejeitados e upsert pelo código de barras"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            with db.transacao() as conn:
+                conn.execute("""
+                    INSERT INTO produtos (nome, categoria, codigo_barras, quantidade, preco_custo, preco_venda)
+                    VALUES ('Antigo', 'Outros', '7890000000001', 42, 1, 2)
+                """)
+
+            arquivo = os.path.join(pasta, "catalogo.csv")
+            with open(arquivo, "w", newline="", encoding="utf-8") as saida:
+                escritor = csv.writer(saida, delimiter=";")
+                escritor.writerow(["Nome", "Categoria", "Código de Barras", "Preço de Custo", "Preço de Venda", "Coluna extra"])
+                for i in range(2, 2502):
+                    escritor.writerow([f"Produto {i}", "Outros", f"{7890000000000 + i}", "1,00", "1,50", "x"])
+                escritor.writerow(["Atualizado", "Limpeza", "7890000000001", "3,00", "4,50", ""])
+                escritor.writerow(["", "Outros", "", "1,00", "2,00", ""])
+                escritor.writerow(["Sem preço", "Outros", "", "", "2,00", ""])
+                escritor.writerow([])
+
+            progresso = []
+            resultado = importar_produtos(
+                arquivo, tamanho_lote=1000,
+                ao_progredir=lambda *args: progresso.append(args))
+
+            assert (resultado.lidas, resultado.gravadas, resultado.rejeitadas) == (2503, 2501, 2)
+            assert resultado.linhas_por_segundo > 0
+            assert [gravadas for _, gravadas, _ in progresso] == [1000, 2000, 2501]
+
+            with db.conexao() as conn:
+                assert conn.execute("SELECT COUNT(*) FROM produtos").fetchone()[0] == 2501
+                # Upsert: atualiza preços e nome, mas mantém o estoque (coluna ausente)
+                antigo = conn.execute("""
+                    SELECT nome, categoria, quantidade, preco_venda, margem_lucro
+                    FROM produtos WHERE codigo_barras = '7890000000001'
+                """).fetchone()
+            assert antigo == ('Atualizado', 'Limpeza', 42, 450, 50.0), antigo
+
+            with open(resultado.arquivo_rejeitados, encoding="utf-8") as rejeitados:
+                linhas = list(csv.reader(rejeitados, delimiter=";"))
+            assert linhas[0][:3] == ["linha", "erros", "Nome"]
+            assert [linha[0] for linha in linhas[1:]] == ["2503", "2504"]
+            assert "Preço de custo inválido" in linhas[2][1]
+        finally:
+            db.fechar_pool()
+
+
+def test_importar_linhas_recusadas():
+    """Fornecedor inexistente ou linha recusada pelo banco não interrompem a importação"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            with db.transacao() as conn:
+                fornecedor = conn.execute(
+                    "INSERT INTO fornecedores (nome) VALUES ('Atacado')").lastrowid
+                # Simula uma restrição que só o banco conhece
+                conn.execute("""
+                    CREATE TRIGGER proibido BEFORE INSERT ON produtos WHEN new.nome = 'Proibido'
+                    BEGIN SELECT RAISE(ABORT, 'produto proibido'); END
+                """)
+
+            arquivo = os.path.join(pasta, "catalogo.csv")
+            with open(arquivo, "w", newline="", encoding="utf-8") as saida:
+                escritor = csv.writer(saida, delimiter=";")
+                escritor.writerow(["Nome", "Categoria", "Custo", "Venda", "Fornecedor"])
+                for i in range(2, 12):
+                    escritor.writerow([f"Produto {i}", "Outros", "1,00", "2,00", fornecedor])
+                escritor.writerow(["Sem fornecedor", "Outros", "1,00", "2,00", "99"])
+                escritor.writerow(["Proibido", "Outros", "1,00", "2,00", ""])
+                escritor.writerow(["Último", "Outros", "1,00", "2,00", ""])
+
+            resultado = importar_produtos(arquivo, tamanho_lote=5)
+            assert (resultado.lidas, resultado.gravadas, resultado.rejeitadas) == (13, 11, 2)
+            with db.conexao() as conn:
+                nomes = {linha[0] for linha in conn.execute("SELECT nome FROM produtos")}
+            assert "Último" in nomes and "Proibido" not in nomes and len(nomes) == 11
+
+            with open(resultado.arquivo_rejeitados, encoding="utf-8") as rejeitados:
+                linhas = list(csv.reader(rejeitados, delimiter=";"))[1:]
+            assert [(linha[0], linha[2]) for linha in linhas] == [("12", "Sem fornecedor"), ("13", "Proibido")]
+            assert linhas[0][1] == "Fornecedor não cadastrado"
+            assert "produto proibido" in linhas[1][1]
+        finally:
+            db.fechar_pool()
+
+
+if __name__ == "__main__":
+    test_validar_produto()
+    test_validar_lote()
+    test_importar_csv()
+    test_importar_linhas_recusadas()
+    print("Todos os testes passaram!")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Teste da fila de impressão de cupons (ESC/POS) com impressora simulada
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tempfile
+import time
+from utils.impressora import (
+    CORTAR, EXTENSAO_FALHA, INICIALIZAR, Cupom, FilaImpressao, ImpressoraSimulada, ItemCupom,
+    renderizar_cupom)
+
+
+def cupom(venda_id):
+    return Cupom(venda_id, "10/03/2025 09:00", [
+        ItemCupom("Café torrado 500g", 2, 1500, 3000),
+        ItemCupom("Açúcar", 1, 450, 450),
+    ], 3450, cliente="Ana")
+
+
+def test_renderizar_cupom():
+    """Testa os comandos e o texto codificado em PC850"""
+    dados = renderizar_cupom(cupom(7))
+    assert dados.startswith(INICIALIZAR) and dados.endswith(CORTAR)
+    texto = dados.decode("cp850")
+    assert "Venda 7" in texto and "Cliente: Ana" in texto and "Café torrado 500g" in texto
+    linha_total = next(linha for linha in texto.splitlines() if "TOTAL R$" in linha)
+    assert linha_total.endswith("34,50")
+    assert "  2 x 15,00" in texto
+
+
+def test_fila_impressao():
+    """Testa enfileirar sem bloquear, ordem, novas tentativas e retomada"""
+    with tempfile.TemporaryDirectory() as pasta:
+        saida = os.path.join(pasta, "impressora.bin")
+        fila_pasta = os.path.join(pasta, "fila")
+
+        # Impressora lenta que falha nas duas primeiras tentativas
+        impressora = ImpressoraSimulada(saida, segundos_por_cupom=0.05, falhas=2)
+        fila = FilaImpressao(impressora, fila_pasta, espera_inicial=0.01).iniciar()
+        inicio = time.perf_counter()
+        for venda_id in range(1, 6):
+            fila.enfileirar(cupom(venda_id))
+        assert time.perf_counter() - inicio < 0.05  # não esperou a impressora
+        assert fila.aguardar(timeout=5)
+        fila.parar()
+        assert (fila.impressos, fila.falhas, impressora.tentativas) == (5, 2, 7)
+        with open(saida, "rb") as arquivo:
+            impresso = arquivo.read()
+        assert impresso == b"".join(renderizar_cupom(cupom(i)) for i in range(1, 6))
+
+        # Impressora desligada: os trabalhos ficam na pasta até o próximo início
+        os.remove(saida)
+        desligada = ImpressoraSimulada(saida, falhas=10 ** 6)
+        fila = FilaImpressao(desligada, fila_pasta, espera_inicial=0.01).iniciar()
+        for venda_id in (8, 9):
+            fila.enfileirar(cupom(venda_id))
+        time.sleep(0.05)
+        fila.parar()
+        assert fila.pendentes() == 2 and fila.impressos == 0 and not os.path.exists(saida)
+
+        reiniciada = FilaImpressao(ImpressoraSimulada(saida), fila_pasta).iniciar()
+        assert reiniciada.aguardar(timeout=5)
+        reiniciada.parar()
+        with open(saida, "rb") as arquivo:
+            assert arquivo.read() == renderizar_cupom(cupom(8)) + renderizar_cupom(cupom(9))
+        assert os.listdir(fila_pasta) == []
+
+
+class ImpressoraComDefeito(ImpressoraSimulada):
+    """Recusa com ValueError um cupom específico (erro que não passa tentando de novo)"""
+
+    def __init__(self, caminho, recusado):
+        super().__init__(caminho)
+        self.recusado = recusado
+
+    def enviar(self, dados):
+        if dados == self.recusado:
+            raise ValueError("Comando ESC/POS não suportado")
+        super().enviar(dados)
+
+
+def test_erro_permanente():
+    """Testa que um trabalho com erro permanente não para a fila"""
+    with tempfile.TemporaryDirectory() as pasta:
+        saida = os.path.join(pasta, "impressora.bin")
+        fila_pasta = os.path.join(pasta, "fila")
+        impressora = ImpressoraComDefeito(saida, renderizar_cupom(cupom(2)))
+        fila = FilaImpressao(impressora, fila_pasta, espera_inicial=0.01).iniciar()
+        for venda_id in (1, 2, 3):
+            fila.enfileirar(cupom(venda_id))
+        assert fila.aguardar(timeout=5)
+        fila.parar()
+        assert (fila.impressos, fila.descartados) == (2, 1)
+        with open(saida, "rb") as arquivo:
+            assert arquivo.read() == renderizar_cupom(cupom(1)) + renderizar_cupom(cupom(3))
+        falhos = [nome for nome in os.listdir(fila_pasta) if nome.endswith(EXTENSAO_FALHA)]
+        assert len(falhos) == 1 and fila.pendentes() == 0
+
+
+if __name__ == "__main__":
+    test_renderizar_cupom()
+    test_fila_impressao()
+    test_erro_permanente()
+    print("Todos os testes passaram!")
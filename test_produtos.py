@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Testes do repositório de produtos e da paginação da grade do estoque
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tempfile
+from modules import db
+from modules.produtos import (
+    Produto, chave_pagina, contar_produtos, listar_fornecedores, obter_produtos,
+    obter_vendas, pagina_produtos, salvar_produtos)
+from modules.vendas import registrar_venda
+from utils.dinheiro import Dinheiro
+
+
+def percorrer(ordem, **filtros):
+    """Lê todas as páginas para frente e depois volta até o início"""
+    paginas = [pagina_produtos(limite=40, ordem=ordem, **filtros)]
+    while len(paginas[-1]) == 40:
+        proxima = pagina_produtos(limite=40, ordem=ordem, apos=chave_pagina(paginas[-1][-1], ordem), **filtros)
+        if not proxima:
+            break
+        paginas.append(proxima)
+    # Volta a partir da última página e confere que reconstrói a mesma sequência
+    voltando = [paginas[-1]]
+    while True:
+        anterior = pagina_produtos(limite=40, ordem=ordem, antes=chave_pagina(voltando[0][0], ordem), **filtros)
+        if not anterior:
+            break
+        voltando.insert(0, anterior)
+    linhas = [linha for pagina in paginas for linha in pagina]
+    assert linhas == [linha for pagina in voltando for linha in pagina]
+    return linhas
+
+
+def test_pagina_produtos():
+    """Testa páginas para frente/trás, desempate por id e filtros"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            with db.transacao() as conn:
+                conn.execute("INSERT INTO fornecedores (nome) VALUES ('Distribuidora')")
+                conn.executemany("""
+                    INSERT INTO produtos (nome, categoria, quantidade, estoque_minimo, preco_custo, preco_venda, fornecedor_id, ativo)
+                    VALUES (?, ?, ?, ?, 1, 2, ?, ?)
+                """, [
+                    # Nomes e quantidades repetidos: o id desempata a chave
+                    (f"Produto {i % 37:02d}", "Bebidas" if i % 3 else "Limpeza", i % 25, i % 7 * 3,
+                     1 if i % 5 == 0 else None, 0 if i % 50 == 49 else 1)
+                    for i in range(250)
+                ])
+                ativos = conn.execute("""
+                    SELECT id, nome, quantidade, categoria, fornecedor_id, estoque_minimo FROM produtos WHERE ativo = 1
+                """).fetchall()
+
+            por_nome = percorrer("nome")
+            assert [linha.id for linha in por_nome] == [
+                id_ for id_, *_ in sorted(ativos, key=lambda p: (p[1], p[0]))]
+
+            por_quantidade = percorrer("quantidade")
+            assert [linha.id for linha in por_quantidade] == [
+                id_ for id_, *_ in sorted(ativos, key=lambda p: (p[2], p[0]))]
+
+            assert [linha.id for linha in percorrer("id")] == sorted(p[0] for p in ativos)
+
+            filtrados = percorrer("nome", categoria="Limpeza", fornecedor_id=1, estoque_baixo=True)
+            esperados = [p for p in ativos if p[3] == "Limpeza" and p[4] == 1 and p[2] < p[5]]
+            assert sorted(linha.id for linha in filtrados) == sorted(p[0] for p in esperados)
+            assert contar_produtos(categoria="Limpeza", fornecedor_id=1, estoque_baixo=True) == len(esperados)
+            assert contar_produtos() == len(ativos)
+        finally:
+            db.fechar_pool()
+
+
+def test_repositorio():
+    """Testa registros tipados, leitura em lote e upsert em lote"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            with db.transacao() as conn:
+                conn.executemany("INSERT INTO fornecedores (nome, telefone) VALUES (?, ?)",
+                                 [("Zeta Alimentos", "1111"), ("Alfa Bebidas", None)])
+
+            fornecedores = listar_fornecedores()
+            nomes = [f.nome for f in fornecedores]
+            assert nomes == sorted(nomes) and nomes[0] == "Alfa Bebidas"
+            assert fornecedores[-1].nome == "Zeta Alimentos" and fornecedores[-1].telefone == "1111"
+            assert fornecedores[0].rotulo == f"Alfa Bebidas (ID: {fornecedores[0].id})"
+            assert not hasattr(fornecedores[0], "__dict__")  # slots
+
+            novos = [Produto(f"Item {i}", "Outros", 100, 200, quantidade=i,
+                             fornecedor_id=fornecedores[0].id) for i in range(500)]
+            ids = salvar_produtos(novos)
+            assert ids == [produto.id for produto in novos] and None not in ids
+
+            # Atualização em lote pelos ids já atribuídos
+            for produto in novos[:10]:
+                produto.preco_venda = Dinheiro(350)
+            salvar_produtos(novos[:10])
+
+            # Lote misto: atualizados e novos, ids na ordem da lista
+            misto = [novos[20], Produto("Novo A", "Outros", 100, 150), novos[21],
+                     Produto("Novo B", "Outros", 100, 160)]
+            novos[20].nome = "Item 20 alterado"
+            ids_misto = salvar_produtos(misto)
+            assert ids_misto[0] == ids[20] and ids_misto[2] == ids[21]
+            assert ids_misto[1:4:2] == [ids[-1] + 1, ids[-1] + 2]
+            lidos = obter_produtos(ids_misto)
+            assert [lidos[i].nome for i in ids_misto] == ["Item 20 alterado", "Novo A", "Item 21", "Novo B"]
+
+            lidos = obter_produtos(ids[5:15] + [999999])
+            assert sorted(lidos) == ids[5:15]
+            assert lidos[ids[5]].preco_venda == 350 and lidos[ids[14]].preco_venda == 200
+            assert lidos[ids[5]] == novos[5]
+            assert obter_produtos([]) == {}
+
+            venda_id = registrar_venda([(ids[0], 2, 350)], cliente="Maria")
+            venda = obter_vendas([venda_id])[venda_id]
+            assert (venda.total, venda.cliente) == (700, "Maria")
+            assert str(venda.total) == "R$ 7,00"
+        finally:
+            db.fechar_pool()
+
+
+if __name__ == "__main__":
+    test_pagina_produtos()
+    test_repositorio()
+    print("Todos os testes passaram!")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Teste dos relatórios de vendas, conferidos contra somas feitas linha a linha
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import random
+import tempfile
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from modules import db
+from modules.relatorios import (
+    CacheRelatorios, carregar_vendas, gerar_relatorio, mix_categorias, margem, receita_por_periodo,
+    ticket_medio, top_produtos)
+from modules.vendas import registrar_venda
+
+
+def test_relatorios():
+    """Testa agrupamentos, ranking, categorias, margem e filtro de período"""
+    random.seed(7)
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            with db.transacao() as conn:
+                conn.executemany("""
+                    INSERT INTO produtos (nome, categoria, quantidade, preco_custo, preco_venda)
+                    VALUES (?, ?, 100000, ?, ?)
+                """, [(f"Produto {i}", ("Bebidas", "Limpeza", "Padaria")[i % 3], i * 100, i * 150)
+                      for i in range(1, 21)])
+
+            vendas = []
+            inicio = datetime(2024, 1, 29, 8, 0)
+            for _ in range(300):
+                momento = inicio + timedelta(minutes=random.randint(0, 60 * 24 * 60))
+                itens = [(random.randint(1, 20), random.randint(1, 4), random.randint(100, 3000))
+                         for _ in range(random.randint(1, 5))]
+                registrar_venda(itens, data=momento.strftime("%Y-%m-%d %H:%M:%S"))
+                vendas.append((momento.date(), itens))
+
+            dados = carregar_vendas(tamanho_bloco=64)
+            assert len(dados.vendas) == 300
+
+            # Receita por dia, semana (segunda) e mês
+            for periodo, chave in (
+                    ("dia", lambda d: d),
+                    ("semana", lambda d: d - timedelta(days=d.weekday())),
+                    ("mes", lambda d: d.replace(day=1))):
+                esperado = defaultdict(int)
+                for dia, itens in vendas:
+                    esperado[chave(dia)] += sum(q * p for _, q, p in itens)
+                obtido = receita_por_periodo(dados, periodo)
+                assert [linha.inicio for linha in obtido] == sorted(esperado), periodo
+                # Centavos inteiros: as somas batem exatamente
+                assert all(linha.receita == esperado[linha.inicio] for linha in obtido), periodo
+
+            receita_total = sum(q * p for _, itens in vendas for _, q, p in itens)
+            assert ticket_medio(dados) == round(receita_total / 300)
+
+            # Custo pelo cadastro: o produto i custa i reais
+            custo_total = sum(q * i * 100 for _, itens in vendas for i, q, _ in itens)
+            resultado = margem(dados)
+            assert (resultado.receita, resultado.custo) == (receita_total, custo_total)
+            assert abs(resultado.percentual - round((receita_total - custo_total) / custo_total * 100, 2)) < 1e-9
+
+            por_produto = defaultdict(int)
+            for _, itens in vendas:
+                for i, q, p in itens:
+                    por_produto[i] += q * p
+            ranking = top_produtos(dados, n=5)
+            assert [linha.produto_id for linha in ranking] == sorted(
+                por_produto, key=lambda i: -por_produto[i])[:5]
+            assert len(top_produtos(dados, n=50)) == len(por_produto)
+
+            categorias = {linha.categoria: linha for linha in mix_categorias(dados)}
+            assert set(categorias) == {"Bebidas", "Limpeza", "Padaria"}
+            assert abs(sum(linha.participacao for linha in categorias.values()) - 100) < 1e-9
+            assert categorias["Bebidas"].receita == sum(v for i, v in por_produto.items() if i % 3 == 0)
+
+            # Filtro por período: fevereiro inteiro, dia final incluído
+            fevereiro = carregar_vendas("2024-02-01", "2024-02-29")
+            em_fevereiro = [itens for dia, itens in vendas if dia.month == 2]
+            assert len(fevereiro.vendas) == len(em_fevereiro)
+            assert len(fevereiro.itens) == sum(len(itens) for itens in em_fevereiro)
+            assert [linha.inicio for linha in receita_por_periodo(fevereiro, "mes")] == [date(2024, 2, 1)]
+
+            vazio = carregar_vendas("2030-01-01", "2030-01-31")
+            assert receita_por_periodo(vazio) == [] and top_produtos(vazio) == []
+            assert ticket_medio(vazio) == 0 and mix_categorias(vazio) == []
+        finally:
+            db.fechar_pool()
+
+
+def test_cache_relatorios():
+    """Testa acertos, releitura só dos meses alterados e limite de memória"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            with db.transacao() as conn:
+                conn.executemany("""
+                    INSERT INTO produtos (nome, categoria, quantidade, preco_custo, preco_venda)
+                    VALUES (?, 'Outros', 100000, 200, 300)
+                """, [(f"Produto {i}",) for i in range(5)])
+            for dia in range(1, 29):
+                registrar_venda([(1 + dia % 5, 2, 300)], data=f"2024-01-{dia:02d} 10:00:00")
+                registrar_venda([(1 + dia % 3, 1, 300)], data=f"2024-02-{dia:02d} 10:00:00")
+
+            cache = CacheRelatorios()
+            periodo = ("2024-01-01", "2024-02-29")
+            primeiro = cache.relatorio(*periodo)
+            assert primeiro == gerar_relatorio(carregar_vendas(*periodo))
+            assert cache.relatorio(*periodo) is primeiro
+            estatisticas = cache.estatisticas()
+            assert (estatisticas.acertos, estatisticas.falhas, estatisticas.blocos_lidos) == (1, 1, 2)
+            assert estatisticas.taxa_acerto == 0.5
+
+            # Venda nova em fevereiro: janeiro (encerrado) não é relido
+            registrar_venda([(1, 1, 300)], data="2024-02-29 18:00:00")
+            atual = cache.relatorio(*periodo)
+            assert atual.vendas == primeiro.vendas + 1
+            estatisticas = cache.estatisticas()
+            assert (estatisticas.blocos_lidos, estatisticas.blocos_reaproveitados) == (3, 1)
+
+            # Outro agrupamento reaproveita os dois meses
+            assert cache.relatorio(*periodo, periodo="mes").receitas[0].vendas == 28
+            assert cache.estatisticas().blocos_lidos == 3
+
+            # Venda retroativa e item apagado invalidam só janeiro
+            registrar_venda([(2, 1, 300)], data="2024-01-15 09:00:00")
+            assert cache.relatorio(*periodo).vendas == primeiro.vendas + 2
+            with db.transacao() as conn:
+                conn.execute("DELETE FROM venda_itens WHERE id = (SELECT MIN(id) FROM venda_itens)")
+            depois = cache.relatorio(*periodo)
+            assert depois == gerar_relatorio(carregar_vendas(*periodo))
+            assert cache.estatisticas().blocos_lidos == 5
+
+            # Custo alterado no cadastro: recalcula sem reler as vendas
+            with db.transacao() as conn:
+                conn.execute("UPDATE produtos SET preco_custo = 100 WHERE id = 1")
+            assert cache.relatorio(*periodo).margem.lucro > depois.margem.lucro
+            assert cache.estatisticas().blocos_lidos == 5
+
+            # Produto cadastrado depois do cache aquecido e logo vendido
+            with db.transacao() as conn:
+                suco = conn.execute("""
+                    INSERT INTO produtos (nome, categoria, quantidade, preco_custo, preco_venda)
+                    VALUES ('Suco', 'Bebidas', 10, 100, 300)
+                """).lastrowid
+            registrar_venda([(suco, 1, 300)], data="2024-02-29 19:00:00")
+            com_suco = cache.relatorio(*periodo)
+            assert com_suco == gerar_relatorio(carregar_vendas(*periodo))
+            assert "Bebidas" in [linha.categoria for linha in com_suco.categorias]
+            assert "Sem cadastro" not in [linha.categoria for linha in com_suco.categorias]
+
+            # Produto apagado também muda a versão dos produtos
+            with db.transacao() as conn:
+                conn.execute("INSERT INTO produtos (nome, categoria, preco_custo, preco_venda) VALUES ('Temporário', 'Outros', 1, 1)")
+            with db.conexao() as conn:
+                versao = conn.execute("SELECT valor FROM contadores WHERE nome = 'versao_produtos'").fetchone()[0]
+            with db.transacao() as conn:
+                conn.execute("DELETE FROM produtos WHERE id = ?", (suco + 1,))
+                assert conn.execute("SELECT valor FROM contadores WHERE nome = 'versao_produtos'").fetchone()[0] == versao + 1
+
+            # Limite de memória: as entradas mais antigas saem primeiro
+            pequeno = CacheRelatorios(limite_bytes=4096)
+            for dia in range(1, 10):
+                pequeno.relatorio(f"2024-01-{dia:02d}", f"2024-01-{dia:02d}")
+            estatisticas = pequeno.estatisticas()
+            assert estatisticas.bytes <= 4096 or estatisticas.entradas == 1
+            assert estatisticas.entradas < 9 * 2
+        finally:
+            db.fechar_pool()
+
+
+if __name__ == "__main__":
+    test_relatorios()
+    test_cache_relatorios()
+    print("Todos os testes passaram!")
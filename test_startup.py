@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Teste da inicialização preguiçosa: o login não pode carregar as outras telas
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_startup import medir_importacao, MODULOS_PROIBIDOS
+
+
+def test_login_sem_modulos_pesados():
+    """Verifica que abrir o login não importa dashboard, telas ou numpy"""
+    _, importados = medir_importacao("modules.login")
+    carregados = [m for m in MODULOS_PROIBIDOS if m in importados]
+    assert not carregados, f"Módulos carregados antes do login: {carregados}"
+
+
+if __name__ == "__main__":
+    test_login_sem_modulos_pesados()
+    print("Todos os testes passaram!")
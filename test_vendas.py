@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Teste do registro de vendas (itens e baixa de estoque)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tempfile
+import threading
+from modules import db
+from modules.vendas import registrar_venda
+
+
+def criar_produto(conn, nome, quantidade, preco, estoque_minimo=0):
+    cursor = conn.execute(
+        "INSERT INTO produtos (nome, categoria, quantidade, estoque_minimo, preco_custo, preco_venda) VALUES (?, 'Outros', ?, ?, ?, ?)",
+        (nome, quantidade, estoque_minimo, preco, preco))
+    return cursor.lastrowid
+
+
+def test_registrar_venda():
+    """Testa gravação dos itens, total e baixa de estoque concorrente"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            with db.transacao() as conn:
+                arroz = criar_produto(conn, "Arroz", 100, 2000)
+                feijao = criar_produto(conn, "Feijao", 100, 850)
+
+            # Linhas repetidas do mesmo produto são somadas na baixa
+            venda_id = registrar_venda([(arroz, 2, 2000), (feijao, 1, 850), (arroz, 1, 2000)])
+            with db.conexao() as conn:
+                total = conn.execute("SELECT total FROM vendas WHERE id = ?", (venda_id,)).fetchone()[0]
+                itens = conn.execute("SELECT COUNT(*) FROM venda_itens WHERE venda_id = ?", (venda_id,)).fetchone()[0]
+                estoque = dict(conn.execute("SELECT id, quantidade FROM produtos"))
+            assert total == 6850
+            assert itens == 3
+            assert estoque == {arroz: 97, feijao: 99}
+
+            # Vendas simultâneas em vários "caixas" não perdem baixas
+            def caixa():
+                for _ in range(10):
+                    registrar_venda([(arroz, 1, 2000), (feijao, 2, 850)])
+
+            threads = [threading.Thread(target=caixa) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            with db.conexao() as conn:
+                estoque = dict(conn.execute("SELECT id, quantidade FROM produtos"))
+            assert estoque == {arroz: 57, feijao: 19}, estoque
+
+            # Venda sem itens é recusada
+            try:
+                registrar_venda([])
+                assert False, "Venda vazia deveria ser recusada"
+            except ValueError:
+                pass
+
+            # Preço em reais (float) é recusado: os preços são centavos
+            try:
+                registrar_venda([(arroz, 1, 20.0)])
+                assert False, "Preço em float deveria ser recusado"
+            except TypeError:
+                pass
+        finally:
+            db.fechar_pool()
+
+
+def test_resumos_dashboard():
+    """Testa se os agregados do dashboard acompanham vendas e produtos"""
+    with tempfile.TemporaryDirectory() as pasta:
+        db.configurar_banco(os.path.join(pasta, "teste.sqlite3"))
+        try:
+            db.criar_tabelas()
+            with db.transacao() as conn:
+                cafe = criar_produto(conn, "Cafe", 12, 1500, estoque_minimo=10)
+                criar_produto(conn, "Acucar", 3, 400, estoque_minimo=10)
+
+            registrar_venda([(cafe, 3, 1500)], cliente="Ana", data="2025-03-10 09:00:00")
+            registrar_venda([(cafe, 1, 1500)], cliente="Ana", data="2025-03-10 18:30:00")
+            registrar_venda([(cafe, 1, 1500)], cliente="Bruno", data="2025-03-11 10:00:00")
+
+            with db.conexao() as conn:
+                resumo = conn.execute(
+                    "SELECT dia, total, quantidade FROM vendas_resumo_diario ORDER BY dia").fetchall()
+                contadores = dict(conn.execute("SELECT nome, valor FROM contadores"))
+            assert resumo == [("2025-03-10", 6000, 2), ("2025-03-11", 1500, 1)], resumo
+            # Cafe caiu de 12 para 7 unidades (mínimo 10) e entrou no estoque baixo
+            # Três vendas gravadas: versao_vendas (cache de relatórios) avançou três vezes;
+            # versao_produtos avançou com os dois cadastros, e a baixa de estoque não a altera
+            assert contadores == {'produtos': 2, 'estoque_baixo': 2, 'clientes': 2,
+                                  'versao_vendas': 3, 'versao_produtos': 2}, contadores
+
+            with db.transacao() as conn:
+                conn.execute("DELETE FROM venda_itens")
+                conn.execute("DELETE FROM vendas WHERE data LIKE '2025-03-11%'")
+                conn.execute("UPDATE produtos SET quantidade = 50 WHERE id = ?", (cafe,))
+                resumo = conn.execute(
+                    "SELECT total, quantidade FROM vendas_resumo_diario WHERE dia = '2025-03-11'").fetchone()
+                baixo = conn.execute("SELECT valor FROM contadores WHERE nome = 'estoque_baixo'").fetchone()[0]
+            assert resumo == (0, 0)
+            assert baixo == 1
+        finally:
+            db.fechar_pool()
+
+
+if __name__ == "__main__":
+    test_registrar_venda()
+    test_resumos_dashboard()
+    print("Todos os testes passaram!")
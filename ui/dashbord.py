@@ -1,9 +1,95 @@
 # Tela principal do dashboard com layout sidebar
 import customtkinter as ctk
 from tkinter import messagebox
-from modules import vendas, clientes, produtos, estoque, relatorios
-from modules.db import conectar
+from modules.db import conexao
+from modules.estoque_baixo import obter_monitor
+from utils.dinheiro import formatar_moeda
+from utils.helpers import executar_em_segundo_plano
+from collections import OrderedDict
 from datetime import datetime
+import importlib
+import time
+
+
+# Módulos de cada entrada da sidebar. São importados apenas na primeira vez
+# que a tela é aberta, assim o login e o dashboard não esperam pelas
+# dependências de todas as telas (PIL, numpy...) para abrir.
+MODULE_REGISTRY = {
+    "vendas": "modules.vendas",
+    "produtos": "modules.produtos",
+    "clientes": "modules.clientes",
+    "estoque": "modules.estoque",
+    "relatorios": "modules.relatorios"
+}
+
+
+def load_module(name):
+    """Importa (uma única vez) o módulo registrado para a entrada da sidebar"""
+    return importlib.import_module(MODULE_REGISTRY[name])
+
+
+class ViewCache:
+    """Cache LRU das telas (frames) dos módulos do dashboard.
+
+    Cada tela é construída uma única vez e depois apenas escondida/exibida.
+    O custo de memória é estimado pelo número de widgets Tk de cada tela;
+    quando o total passa de ``widget_limit`` as telas usadas há mais tempo
+    são destruídas (a tela visível nunca é descartada).
+    """
+
+    def __init__(self, widget_limit=1500):
+        self.widget_limit = widget_limit
+        self.views = OrderedDict()  # nome -> (frame, quantidade de widgets)
+        self.stats = {}
+
+    @staticmethod
+    def count_widgets(widget):
+        """Conta o widget e todos os seus descendentes"""
+        return 1 + sum(ViewCache.count_widgets(child) for child in widget.winfo_children())
+
+    def get(self, name):
+        """Retorna a tela em cache (marcando-a como recente) ou None"""
+        if name not in self.views:
+            return None
+        self.views.move_to_end(name)
+        return self.views[name][0]
+
+    def add(self, name, frame):
+        """Guarda uma tela recém-construída e aplica o limite de memória"""
+        self.views[name] = (frame, self.count_widgets(frame))
+        self.views.move_to_end(name)
+        while self.total_widgets() > self.widget_limit and len(self.views) > 1:
+            oldest = next(iter(self.views))
+            self.discard(oldest)
+            self.stats.setdefault(oldest, self._new_stats())['evictions'] += 1
+
+    def discard(self, name):
+        """Remove e destrói a tela, que será reconstruída no próximo acesso"""
+        entry = self.views.pop(name, None)
+        if entry is not None:
+            entry[0].destroy()
+
+    def total_widgets(self):
+        return sum(count for _, count in self.views.values())
+
+    @staticmethod
+    def _new_stats():
+        return {'builds': 0, 'reuses': 0, 'evictions': 0, 'last_ms': 0.0, 'total_ms': 0.0}
+
+    def record(self, name, seconds, built):
+        """Registra a latência de uma troca de tela"""
+        stats = self.stats.setdefault(name, self._new_stats())
+        stats['builds' if built else 'reuses'] += 1
+        stats['last_ms'] = seconds * 1000
+        stats['total_ms'] += seconds * 1000
+
+    def report(self):
+        """Resumo por módulo: construções, reusos, descartes e latência média"""
+        report = {}
+        for name, stats in self.stats.items():
+            switches = stats['builds'] + stats['reuses']
+            report[name] = dict(stats, avg_ms=stats['total_ms'] / switches if switches else 0.0)
+        return report
 
 
 class TelaDashboard(ctk.CTk):
@@ -11,6 +97,10 @@ class TelaDashboard(ctk.CTk):
         super().__init__()
         self.usuario_logado = usuario_logado
         self.current_module = None
+        self.dashboard_task = None  # Carregamento em andamento dos cards
+        self.view_cache = ViewCache()
+        self.current_view = None
+        self.low_stock_monitor = obter_monitor()
         self.title("PDV - Dashboard Principal")
         self.geometry("1400x800")  # Aumentado para melhor visualização
         self.minsize(1000, 700)    # Tamanho mínimo maior
@@ -35,6 +125,28 @@ class TelaDashboard(ctk.CTk):
         
         # Selecionar primeiro item por padrão
         self.select_module("dashboard")
+        
+        # Alertas de estoque baixo publicados pelos gatilhos do banco
+        self.low_stock_monitor.assinar(self.update_low_stock_card)
+        self.poll_low_stock()
+    
+    def poll_low_stock(self):
+        """Verifica em segundo plano se produtos entraram/saíram do estoque baixo"""
+        executar_em_segundo_plano(
+            self, self.low_stock_monitor.verificar, ao_concluir=self.publish_low_stock,
+            ao_falhar=lambda e: self.after(5000, self.poll_low_stock)
+        )
+    
+    def publish_low_stock(self, mudanca):
+        """Entrega a mudança aos assinantes (na thread do Tk) e agenda a próxima verificação"""
+        self.low_stock_monitor.publicar(mudanca)
+        self.after(5000, self.poll_low_stock)
+    
+    def update_low_stock_card(self, mudanca):
+        """Atualiza o card "Estoque Baixo" sem recarregar o dashboard"""
+        card = getattr(self, 'dashboard_cards', {}).get('estoque_baixo')
+        if card is not None and card.winfo_exists():
+            card.value_label.configure(text=str(mudanca.total))
     
     def setup_layout(self):
         """Configura o layout principal com sidebar e área de conteúdo"""
@@ -217,9 +329,16 @@ class TelaDashboard(ctk.CTk):
     
     def update_content_area(self, module_name):
         """Atualiza a área de conteúdo baseada no módulo selecionado"""
-        # Limpar conteúdo anterior
-        for widget in self.main_content.winfo_children():
-            widget.destroy()
+        start = time.perf_counter()
+        
+        # Descartar dados do dashboard que ainda estejam sendo carregados
+        if self.dashboard_task is not None:
+            self.dashboard_task.cancelar()
+            self.dashboard_task = None
+        
+        # Esconder a tela anterior (ela continua em cache)
+        if self.current_view is not None and self.current_view.winfo_exists():
+            self.current_view.pack_forget()
         
         # Atualizar título
         module_titles = {
@@ -233,95 +352,78 @@ class TelaDashboard(ctk.CTk):
         
         self.section_title.configure(text=module_titles.get(module_name, "Dashboard"))
         
-        # Criar conteúdo específico do módulo
+        # Reaproveitar a tela já construída ou criá-la na primeira visita
+        view = self.view_cache.get(module_name)
+        built = view is None
+        if built:
+            view = ctk.CTkFrame(self.main_content, corner_radius=0, fg_color="transparent")
+            view.pack(fill="both", expand=True)
+            self.current_view = view
+            self.build_module(view, module_name)
+            self.view_cache.add(module_name, view)
+        else:
+            view.pack(fill="both", expand=True)
+            self.current_view = view
+            self.refresh_module(module_name)
+        
+        self.update_idletasks()
+        self.view_cache.record(module_name, time.perf_counter() - start, built)
+    
+    def build_module(self, parent, module_name):
+        """Cria o conteúdo específico do módulo dentro do frame da tela"""
         if module_name == "dashboard":
-            self.create_dashboard_content()
+            self.create_dashboard_content(parent)
         elif module_name == "vendas":
-            self.create_vendas_content()
+            self.create_vendas_content(parent)
         elif module_name == "estoque":
-            self.create_estoque_content()
+            self.create_estoque_content(parent)
+        elif module_name == "relatorios":
+            self.create_relatorios_content(parent)
         else:
-            self.create_placeholder_content(module_name)
+            self.create_placeholder_content(parent, module_name)
+    
+    def refresh_module(self, module_name):
+        """Atualiza apenas os dados de uma tela reaproveitada do cache"""
+        if module_name == "dashboard":
+            self.dashboard_task = executar_em_segundo_plano(
+                self, self.get_dashboard_data, ao_concluir=self.fill_dashboard_cards
+            )
+        elif module_name == "estoque" and hasattr(self, 'tela_estoque'):
+            self.tela_estoque.load_suppliers()
+            self.tela_estoque.product_grid.recarregar()
+    
+    def reload_module(self, module_name):
+        """Descarta a tela do cache e a constrói novamente"""
+        if self.current_view is not None and self.current_view is self.view_cache.get(module_name):
+            self.current_view = None
+        self.view_cache.discard(module_name)
+        self.select_module(module_name)
     
     def get_dashboard_data(self):
         """Obtém dados dinâmicos do banco de dados para o dashboard"""
         try:
-            conn = conectar()
-            cursor = conn.cursor()
-            
-            # Verificar se as tabelas existem
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tabelas = [tabela[0] for tabela in cursor.fetchall()]
-            
-            # Vendas de hoje
-            if 'vendas' in tabelas:
-                try:
-                    cursor.execute("""
-                        SELECT COALESCE(SUM(total), 0) 
-                        FROM vendas 
-                        WHERE DATE(data_venda) = DATE('now')
-                    """)
-                    vendas_hoje = cursor.fetchone()[0]
-                except:
-                    # Tentar com campo 'data' se 'data_venda' não existir
-                    try:
-                        cursor.execute("""
-                            SELECT COALESCE(SUM(total), 0) 
-                            FROM vendas 
-                            WHERE DATE(data) = DATE('now')
-                        """)
-                        vendas_hoje = cursor.fetchone()[0]
-                    except:
-                        vendas_hoje = 0
-            else:
-                vendas_hoje = 0
-            
-            vendas_hoje_str = f"R$ {vendas_hoje:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-            
-            # Total de produtos
-            if 'produtos' in tabelas:
-                try:
-                    cursor.execute("SELECT COUNT(*) FROM produtos")
-                    total_produtos = cursor.fetchone()[0]
-                except:
-                    total_produtos = 0
-            else:
-                total_produtos = 0
-            
-            # Total de clientes (baseado em vendas únicas ou tabela clientes)
-            total_clientes = 0
-            if 'clientes' in tabelas:
-                try:
-                    cursor.execute("SELECT COUNT(*) FROM clientes")
-                    total_clientes = cursor.fetchone()[0]
-                except:
-                    pass
-            elif 'vendas' in tabelas:
-                try:
-                    cursor.execute("SELECT COUNT(DISTINCT cliente) FROM vendas WHERE cliente IS NOT NULL AND cliente != ''")
-                    total_clientes = cursor.fetchone()[0]
-                except:
-                    pass
-            
-            # Produtos com estoque baixo
-            estoque_baixo = 0
-            if 'produtos' in tabelas:
-                try:
-                    # Tentar com campo 'quantidade'
-                    cursor.execute("SELECT COUNT(*) FROM produtos WHERE quantidade < 10")
-                    estoque_baixo = cursor.fetchone()[0]
-                except:
-                    try:
-                        # Tentar com campo 'estoque'
-                        cursor.execute("SELECT COUNT(*) FROM produtos WHERE estoque < 10")
-                        estoque_baixo = cursor.fetchone()[0]
-                    except:
-                        pass
-            
-            conn.close()
+            # Os cards leem agregados mantidos por gatilhos no banco
+            # (vendas_resumo_diario e contadores), sem varrer vendas/produtos
+            with conexao() as conn:
+                cursor = conn.cursor()
+                
+                # Vendas de hoje
+                cursor.execute("""
+                    SELECT COALESCE(SUM(total), 0) 
+                    FROM vendas_resumo_diario 
+                    WHERE dia = DATE('now', 'localtime')
+                """)
+                vendas_hoje = cursor.fetchone()[0]
+                
+                # Produtos, clientes distintos e produtos com estoque baixo
+                cursor.execute("SELECT nome, valor FROM contadores")
+                contadores = dict(cursor.fetchall())
+                total_produtos = contadores.get('produtos', 0)
+                total_clientes = contadores.get('clientes', 0)
+                estoque_baixo = contadores.get('estoque_baixo', 0)
             
             return {
-                'vendas_hoje': vendas_hoje_str,
+                'vendas_hoje': formatar_moeda(vendas_hoje),
                 'produtos': str(total_produtos),
                 'clientes': str(total_clientes),
                 'estoque_baixo': str(estoque_baixo)
@@ -400,6 +502,9 @@ class TelaDashboard(ctk.CTk):
         )
         title_label.pack(anchor="w", pady=(5, 0))
         
+        # Referência para preencher o valor depois do carregamento assíncrono
+        card.value_label = value_label
+        
         return card
     
     def darken_color(self, hex_color, factor):
@@ -423,13 +528,19 @@ class TelaDashboard(ctk.CTk):
         except:
             return hex_color  # Retorna a cor original se houver erro
     
-    def create_dashboard_content(self):
+    def create_dashboard_content(self, parent):
         """Cria o conteúdo do dashboard principal"""
-        # Obter dados reais do banco
-        dados = self.get_dashboard_data()
+        # Os cards são desenhados na hora com um valor provisório; os dados
+        # reais são consultados em segundo plano e preenchidos ao chegar
+        dados = {
+            'vendas_hoje': "...",
+            'produtos': "...",
+            'clientes': "...",
+            'estoque_baixo': "..."
+        }
         
         # Cards de resumo com layout melhorado
-        cards_frame = ctk.CTkFrame(self.main_content, fg_color="transparent")
+        cards_frame = ctk.CTkFrame(parent, fg_color="transparent")
         cards_frame.pack(fill="x", pady=(0, 30), padx=20)
         
         # Configurar grid para cards com espaçamento adequado
@@ -467,8 +578,18 @@ class TelaDashboard(ctk.CTk):
         )
         card_estoque.grid(row=0, column=3, padx=12, pady=15, sticky="ew")
         
+        self.dashboard_cards = {
+            'vendas_hoje': card_vendas,
+            'produtos': card_produtos,
+            'clientes': card_clientes,
+            'estoque_baixo': card_estoque
+        }
+        self.dashboard_task = executar_em_segundo_plano(
+            self, self.get_dashboard_data, ao_concluir=self.fill_dashboard_cards
+        )
+        
         # Área de ações rápidas
-        actions_frame = ctk.CTkFrame(self.main_content)
+        actions_frame = ctk.CTkFrame(parent)
         actions_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
         
         actions_title = ctk.CTkLabel(
@@ -522,11 +643,17 @@ class TelaDashboard(ctk.CTk):
         )
         relatorio_btn.grid(row=0, column=2, padx=15, pady=20, sticky="ew")
     
-    def create_vendas_content(self):
+    def fill_dashboard_cards(self, dados):
+        """Preenche os cards do dashboard com os dados carregados"""
+        self.dashboard_task = None
+        for chave, card in self.dashboard_cards.items():
+            card.value_label.configure(text=dados[chave])
+    
+    def create_vendas_content(self, parent):
         """Cria o conteúdo da seção de vendas"""
         # Botão para abrir tela de vendas completa
         open_vendas_btn = ctk.CTkButton(
-            self.main_content,
+            parent,
             text="🚀 Abrir Tela de Vendas Completa",
             command=self.abrir_vendas_completa,
             height=60,
@@ -536,7 +663,7 @@ class TelaDashboard(ctk.CTk):
         open_vendas_btn.pack(pady=50)
         
         # Informações sobre vendas
-        info_frame = ctk.CTkFrame(self.main_content)
+        info_frame = ctk.CTkFrame(parent)
         info_frame.pack(fill="both", expand=True, pady=20)
         
         info_label = ctk.CTkLabel(
@@ -547,15 +674,15 @@ class TelaDashboard(ctk.CTk):
         )
         info_label.pack(expand=True)
     
-    def create_estoque_content(self):
+    def create_estoque_content(self, parent):
         """Cria o conteúdo integrado do módulo de estoque"""
         try:
-            # Importar o módulo de estoque
-            from modules.estoque import TelaEstoque
+            # Importar o módulo de estoque (carregado sob demanda)
+            TelaEstoque = load_module("estoque").TelaEstoque
             
             # Criar frame container para o estoque
             estoque_container = ctk.CTkFrame(
-                self.main_content,
+                parent,
                 corner_radius=0,
                 fg_color="transparent"
             )
@@ -571,7 +698,7 @@ class TelaDashboard(ctk.CTk):
         except Exception as e:
             print(f"Erro ao carregar módulo de estoque: {e}")
             # Criar mensagem de erro amigável
-            error_frame = ctk.CTkFrame(self.main_content)
+            error_frame = ctk.CTkFrame(parent)
             error_frame.pack(fill="both", expand=True)
             
             error_icon = ctk.CTkLabel(
@@ -608,14 +735,25 @@ class TelaDashboard(ctk.CTk):
                 hover_color=self.colors['primary_hover'],
                 text_color=self.colors['text_primary'],
                 corner_radius=8,
-                command=lambda: self.select_module("estoque"),
+                command=lambda: self.reload_module("estoque"),
                 cursor="hand2"
             )
             retry_btn.pack(pady=20)
     
-    def create_placeholder_content(self, module_name):
+    def create_relatorios_content(self, parent):
+        """Cria a tela de relatórios de vendas (numpy carregado sob demanda)"""
+        try:
+            TelaRelatorios = load_module("relatorios").TelaRelatorios
+            self.tela_relatorios = TelaRelatorios(parent)
+            self.tela_relatorios.pack(fill="both", expand=True, padx=10, pady=10)
+            self.tela_relatorios.gerar()
+        except Exception as e:
+            print(f"Erro ao carregar módulo de relatórios: {e}")
+            self.create_placeholder_content(parent, "relatorios")
+    
+    def create_placeholder_content(self, parent, module_name):
         """Cria conteúdo placeholder para módulos em desenvolvimento"""
-        placeholder_frame = ctk.CTkFrame(self.main_content)
+        placeholder_frame = ctk.CTkFrame(parent)
         placeholder_frame.pack(fill="both", expand=True)
         
         # Ícone do módulo
@@ -693,7 +831,7 @@ class TelaDashboard(ctk.CTk):
         """Abre a tela completa de estoque em uma nova janela com transição suave"""
         try:
             # Desabilitar botão temporariamente para evitar múltiplos cliques
-            for widget in self.main_content.winfo_children():
+            for widget in self.current_view.winfo_children():
                 if isinstance(widget, ctk.CTkFrame):
                     for child in widget.winfo_children():
                         if isinstance(child, ctk.CTkButton) and "Acessar Estoque" in child.cget("text"):
@@ -703,7 +841,7 @@ class TelaDashboard(ctk.CTk):
                             break
             
             # Importar e criar a tela de estoque
-            from modules.estoque import TelaEstoque
+            TelaEstoque = load_module("estoque").TelaEstoque
             
             # Criar nova janela para o estoque
             estoque_window = ctk.CTkToplevel(self)
@@ -829,8 +967,9 @@ class TelaDashboard(ctk.CTk):
     def abrir_vendas_completa(self):
         """Abre a tela completa de vendas"""
         try:
+            TelaVendas = load_module("vendas").TelaVendas
             self.destroy()
-            app = vendas.TelaVendas()
+            app = TelaVendas()
             app.mainloop()
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao abrir vendas: {str(e)}")
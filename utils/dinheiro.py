@@ -0,0 +1,99 @@
+# Valores em dinheiro como inteiros de centavos (somas exatas no Python e no SQLite)
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def formatar_moeda(centavos, simbolo=True):
+    """Formata centavos no padrão brasileiro: 123456 -> 'R$ 1.234,56'.
+
+    É o único formatador de dinheiro da aplicação; os valores que aparecem
+    nas telas se repetem muito (preços, totais do dia), então o texto fica
+    em cache.
+    """
+    reais, resto = divmod(abs(int(centavos)), 100)
+    texto = f"{'-' if centavos < 0 else ''}{reais:,}".replace(",", ".") + f",{resto:02d}"
+    return f"R$ {texto}" if simbolo else texto
+
+
+class Dinheiro(int):
+    """Valor em centavos.
+
+    É um int: compara, serve de chave e vai para o SQLite como INTEGER sem
+    conversão. Soma, subtração e multiplicação por inteiro (quantidade)
+    continuam Dinheiro; ``str()`` formata em reais. ``Dinheiro(1250)`` são
+    R$ 12,50; para converter reais use ``de_reais`` e ``de_texto``.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, centavos=0):
+        # Dinheiro(12.5) truncaria reais em 12 centavos sem aviso
+        if isinstance(centavos, (float, str)):
+            raise TypeError(f"Dinheiro recebe centavos inteiros; use Dinheiro.de_reais({centavos!r})")
+        return super().__new__(cls, centavos)
+
+    @classmethod
+    def de_reais(cls, valor):
+        """Converte reais (12.5, '12.50', Decimal) em centavos, meio centavo para cima"""
+        try:
+            return cls(Decimal(str(valor).strip()).scaleb(2).quantize(Decimal(1), ROUND_HALF_UP))
+        except (InvalidOperation, OverflowError):
+            raise ValueError(f"{valor!r} não é um valor em reais") from None
+
+    @classmethod
+    def de_texto(cls, texto):
+        """Converte '12,50', '1.234,56', 'R$ 3,00' ou '12.5' em centavos"""
+        if isinstance(texto, (int, float, Decimal)):
+            return cls.de_reais(texto)
+        texto = str(texto).replace("R$", "").strip()
+        if "," in texto:
+            # Formato brasileiro: ponto separa milhar, vírgula separa decimais
+            texto = texto.replace(".", "").replace(",", ".")
+        return cls.de_reais(texto)
+
+    @property
+    def reais(self):
+        return int(self) / 100
+
+    def formatar(self, simbolo=True):
+        return formatar_moeda(self, simbolo)
+
+    def __add__(self, outro):
+        if isinstance(outro, int):
+            return Dinheiro(int(self) + int(outro))
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, outro):
+        if isinstance(outro, int):
+            return Dinheiro(int(self) - int(outro))
+        return NotImplemented
+
+    def __rsub__(self, outro):
+        if isinstance(outro, int):
+            return Dinheiro(int(outro) - int(self))
+        return NotImplemented
+
+    def __mul__(self, quantidade):
+        if isinstance(quantidade, int):
+            return Dinheiro(int(self) * int(quantidade))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Dinheiro(-int(self))
+
+    def __abs__(self):
+        return Dinheiro(abs(int(self)))
+
+    def __str__(self):
+        return formatar_moeda(self)
+
+    def __format__(self, especificacao):
+        return str(self) if not especificacao else int.__format__(self, especificacao)
+
+    def __repr__(self):
+        return f"Dinheiro({int(self)})"
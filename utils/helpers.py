@@ -1 +1,79 @@
 # Funções auxiliares
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads de trabalho compartilhadas pelas telas para consultas demoradas
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdv-segundo-plano")
+
+
+class TarefaSegundoPlano:
+    """Executa uma função fora da thread do Tk e entrega o resultado nela.
+
+    O Tk não é thread-safe, então o resultado não é passado diretamente da
+    thread de trabalho: a tarefa consulta o futuro periodicamente com
+    ``widget.after()`` e chama ``ao_concluir`` (ou ``ao_falhar``) já na
+    thread da interface. Se for cancelada, ou se o widget for destruído
+    antes do fim, os callbacks nunca são chamados.
+    """
+
+    def __init__(self, widget, funcao, args=(), ao_concluir=None, ao_falhar=None,
+                 intervalo_ms=15, executor=None):
+        self.widget = widget
+        self.funcao = funcao
+        self.args = args
+        self.ao_concluir = ao_concluir
+        self.ao_falhar = ao_falhar
+        self.intervalo_ms = intervalo_ms
+        self.executor = executor or _executor
+        self.cancelada = False
+        self._futuro = None
+        self._agendamento = None
+
+    def iniciar(self):
+        self._futuro = self.executor.submit(self.funcao, *self.args)
+        self._agendar()
+        return self
+
+    def _agendar(self):
+        try:
+            self._agendamento = self.widget.after(self.intervalo_ms, self._verificar)
+        except Exception:
+            # Widget já destruído: ninguém mais espera por este resultado
+            self.cancelar()
+
+    def _verificar(self):
+        self._agendamento = None
+        if self.cancelada:
+            return
+        if not self._futuro.done():
+            self._agendar()
+            return
+        try:
+            resultado = self._futuro.result()
+        except Exception as e:
+            if self.ao_falhar:
+                self.ao_falhar(e)
+            else:
+                print(f"Erro em tarefa de segundo plano: {e}")
+            return
+        if self.ao_concluir:
+            self.ao_concluir(resultado)
+
+    def cancelar(self):
+        """Descarta o resultado; a função só é interrompida se ainda não começou"""
+        self.cancelada = True
+        if self._futuro is not None:
+            self._futuro.cancel()
+        if self._agendamento is not None:
+            try:
+                self.widget.after_cancel(self._agendamento)
+            except Exception:
+                pass
+            self._agendamento = None
+
+
+def executar_em_segundo_plano(widget, funcao, *args, ao_concluir=None, ao_falhar=None,
+                              executor=None):
+    """Atalho que cria e inicia uma TarefaSegundoPlano"""
+    return TarefaSegundoPlano(
+        widget, funcao, args, ao_concluir=ao_concluir, ao_falhar=ao_falhar,
+        executor=executor).iniciar()
@@ -0,0 +1,266 @@
+# Tratamento de imagens dos produtos (armazém por digest e miniaturas em cache)
+import hashlib
+import os
+import re
+import threading
+import time
+
+PASTA_MINIATURAS = "database/cache/miniaturas"
+PASTA_IMAGENS = "database/imagens"
+TAMANHO_PREVIEW = (180, 130)
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+class CacheMiniaturas:
+    """Cache em disco das miniaturas usadas nos previews de produtos.
+
+    A chave combina caminho absoluto, data de modificação e tamanho do
+    arquivo original, então uma foto substituída gera outra miniatura. A
+    decodificação usa ``draft()`` (o JPEG já é lido em escala reduzida) e
+    ``thumbnail()``. Quando a pasta passa de ``limite_bytes``, as
+    miniaturas acessadas há mais tempo são apagadas (LRU pela mtime).
+    """
+
+    def __init__(self, pasta=PASTA_MINIATURAS, tamanho=TAMANHO_PREVIEW,
+                 limite_bytes=50 * 1024 * 1024):
+        self.pasta = pasta
+        self.tamanho = tamanho
+        self.limite_bytes = limite_bytes
+        self._lock = threading.Lock()
+        self._stats = {'acertos': 0, 'faltas': 0, 'removidas': 0}
+
+    def _caminho_miniatura(self, caminho):
+        info = os.stat(caminho)
+        chave = f"{os.path.abspath(caminho)}|{info.st_mtime_ns}|{info.st_size}|{self.tamanho[0]}x{self.tamanho[1]}"
+        nome = hashlib.sha1(chave.encode("utf-8")).hexdigest()
+        return os.path.join(self.pasta, nome + ".png")
+
+    def _contar(self, chave, quantidade=1):
+        with self._lock:
+            self._stats[chave] += quantidade
+
+    def miniatura(self, caminho):
+        """Retorna a miniatura (PIL.Image) do arquivo, gerando-a se preciso.
+
+        Pode ser chamada fora da thread do Tk; apenas a conversão para
+        PhotoImage precisa acontecer na thread da interface.
+        """
+        from PIL import Image
+
+        destino = self._caminho_miniatura(caminho)
+        try:
+            imagem = Image.open(destino)
+            imagem.load()
+            # Atualiza a mtime: é ela que define a ordem de descarte (LRU)
+            os.utime(destino)
+            self._contar('acertos')
+            return imagem
+        except (OSError, ValueError):
+            pass
+
+        self._contar('faltas')
+        imagem = self.gerar(caminho)
+        os.makedirs(self.pasta, exist_ok=True)
+        # Grava em arquivo temporário e renomeia: leitores nunca veem PNG pela metade
+        temporario = f"{destino}.{threading.get_ident()}.tmp"
+        imagem.save(temporario, "PNG", optimize=False)
+        os.replace(temporario, destino)
+        self.aplicar_limite()
+        return imagem
+
+    def gerar(self, caminho):
+        """Decodifica o original em escala reduzida e gera a miniatura"""
+        from PIL import Image
+
+        with Image.open(caminho) as original:
+            # Em JPEG, draft() escolhe uma escala de decodificação (1/2, 1/4,
+            # 1/8) próxima do tamanho final, evitando decodificar megapixels
+            original.draft("RGB", (self.tamanho[0] * 2, self.tamanho[1] * 2))
+            imagem = original.convert("RGBA" if original.mode in ("RGBA", "LA", "P") else "RGB")
+        imagem.thumbnail(self.tamanho, Image.Resampling.LANCZOS)
+        return imagem
+
+    def aplicar_limite(self):
+        """Apaga as miniaturas menos usadas até a pasta caber no limite"""
+        try:
+            arquivos = [entrada for entrada in os.scandir(self.pasta) if entrada.name.endswith(".png")]
+        except FileNotFoundError:
+            return
+        infos = []
+        for entrada in arquivos:
+            info = entrada.stat()
+            infos.append((info.st_mtime, info.st_size, entrada.path))
+        total = sum(tamanho for _, tamanho, _ in infos)
+        if total <= self.limite_bytes:
+            return
+        for _, tamanho, caminho in sorted(infos):
+            try:
+                os.remove(caminho)
+            except OSError:
+                continue
+            self._contar('removidas')
+            total -= tamanho
+            if total <= self.limite_bytes:
+                break
+
+    def estatisticas(self):
+        """Contadores de acertos, faltas e miniaturas descartadas"""
+        with self._lock:
+            return dict(self._stats)
+
+
+class ArmazemImagens:
+    """Armazém de imagens de produtos endereçado pelo conteúdo.
+
+    Cada imagem importada é identificada pelo SHA-256 do arquivo original,
+    reduzida para no máximo ``resolucao_maxima``, recodificada em WebP e
+    gravada uma única vez em ``pasta/ab/abcdef...webp``. O digest é o que
+    fica em ``produtos.imagem_path``; a mesma foto usada por 40 variações
+    ocupa um arquivo só e gera uma única miniatura no cache.
+    """
+
+    EXTENSAO = ".webp"
+
+    def __init__(self, pasta=PASTA_IMAGENS, resolucao_maxima=(1024, 1024), qualidade=82):
+        self.pasta = pasta
+        self.resolucao_maxima = resolucao_maxima
+        self.qualidade = qualidade
+
+    @staticmethod
+    def eh_digest(valor):
+        """Indica se o valor de imagem_path é um digest do armazém"""
+        return bool(valor) and bool(_DIGEST.match(valor))
+
+    def caminho(self, digest):
+        """Caminho do arquivo armazenado para o digest"""
+        return os.path.join(self.pasta, digest[:2], digest + self.EXTENSAO)
+
+    def resolver(self, imagem_path):
+        """Converte o valor de produtos.imagem_path em um caminho de arquivo.
+
+        Cadastros antigos guardam o caminho absoluto escolhido pelo usuário;
+        esses continuam funcionando enquanto o arquivo existir.
+        """
+        if not imagem_path:
+            return None
+        if self.eh_digest(imagem_path):
+            return self.caminho(imagem_path)
+        return imagem_path
+
+    @staticmethod
+    def calcular_digest(caminho):
+        sha = hashlib.sha256()
+        with open(caminho, "rb") as arquivo:
+            for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+                sha.update(bloco)
+        return sha.hexdigest()
+
+    def importar(self, caminho):
+        """Importa uma imagem para o armazém e retorna seu digest"""
+        digest = self.calcular_digest(caminho)
+        destino = self.caminho(digest)
+        if os.path.exists(destino):
+            # Foto já importada: nenhum trabalho de decodificação
+            os.utime(destino)
+            return digest
+
+        from PIL import Image, ImageOps
+
+        with Image.open(caminho) as original:
+            original.draft("RGB", self.resolucao_maxima)
+            # Aplica a rotação EXIF antes de descartar os metadados
+            imagem = ImageOps.exif_transpose(original)
+            imagem = imagem.convert("RGBA" if imagem.mode in ("RGBA", "LA", "P") else "RGB")
+        imagem.thumbnail(self.resolucao_maxima, Image.Resampling.LANCZOS)
+
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporario = f"{destino}.{threading.get_ident()}.tmp"
+        imagem.save(temporario, "WEBP", quality=self.qualidade, method=4)
+        os.replace(temporario, destino)
+        return digest
+
+    def digests_armazenados(self):
+        """Gera (digest, caminho, mtime) de cada arquivo do armazém"""
+        if not os.path.isdir(self.pasta):
+            return
+        for subpasta in os.scandir(self.pasta):
+            if not subpasta.is_dir():
+                continue
+            for entrada in os.scandir(subpasta.path):
+                nome, extensao = os.path.splitext(entrada.name)
+                if extensao == self.EXTENSAO and self.eh_digest(nome):
+                    yield nome, entrada.path, entrada.stat().st_mtime
+
+    def coletar_lixo(self, conn, carencia_segundos=3600):
+        """Apaga imagens que nenhum produto referencia.
+
+        Arquivos mais novos que ``carencia_segundos`` são preservados: podem
+        pertencer a um cadastro que ainda não foi salvo. Retorna a
+        quantidade de arquivos removidos.
+        """
+        referenciados = {
+            linha[0] for linha in conn.execute(
+                "SELECT DISTINCT imagem_path FROM produtos WHERE imagem_path IS NOT NULL")
+        }
+        limite = time.time() - carencia_segundos
+        removidos = 0
+        for digest, caminho, mtime in list(self.digests_armazenados()):
+            if digest in referenciados or mtime > limite:
+                continue
+            try:
+                os.remove(caminho)
+                removidos += 1
+            except OSError:
+                pass
+        return removidos
+
+    def converter_caminhos_antigos(self, conn):
+        """Importa imagens de cadastros antigos (caminho absoluto) para o armazém.
+
+        Retorna quantos produtos passaram a apontar para um digest. Caminhos
+        cujo arquivo não existe mais são mantidos como estão.
+        """
+        linhas = conn.execute("""
+            SELECT id, imagem_path FROM produtos
+            WHERE imagem_path IS NOT NULL AND imagem_path != ''
+        """).fetchall()
+        atualizacoes = []
+        for produto_id, imagem_path in linhas:
+            if self.eh_digest(imagem_path) or not os.path.exists(imagem_path):
+                continue
+            try:
+                atualizacoes.append((self.importar(imagem_path), produto_id))
+            except OSError as e:
+                print(f"Imagem ignorada ({imagem_path}): {e}")
+        with conn:
+            conn.executemany("UPDATE produtos SET imagem_path = ? WHERE id = ?", atualizacoes)
+        return len(atualizacoes)
+
+
+_cache_miniaturas = CacheMiniaturas()
+_armazem_imagens = ArmazemImagens()
+
+
+def obter_cache_miniaturas():
+    """Retorna o cache de miniaturas compartilhado pela aplicação"""
+    return _cache_miniaturas
+
+
+def obter_armazem_imagens():
+    """Retorna o armazém de imagens compartilhado pela aplicação"""
+    return _armazem_imagens
+
+
+if __name__ == "__main__":
+    # Manutenção (python -m utils.imagens): converte cadastros antigos e
+    # apaga imagens sem referência
+    from modules.db import conexao, criar_tabelas
+
+    criar_tabelas()
+    armazem = obter_armazem_imagens()
+    with conexao() as conn:
+        convertidos = armazem.converter_caminhos_antigos(conn)
+        removidos = armazem.coletar_lixo(conn)
+    print(f"Produtos convertidos para o armazém: {convertidos}")
+    print(f"Imagens sem referência removidas: {removidos}")
@@ -1 +1,268 @@
-# Comunicação com impressora
\ No newline at end of file
+# Comunicação com impressora (cupons ESC/POS impressos por uma fila em segundo plano)
+import os
+import queue
+import socket
+import threading
+import time
+from collections import namedtuple
+from utils.dinheiro import formatar_moeda
+
+# Destino da impressora: caminho do dispositivo/arquivo (ex.: /dev/usb/lp0)
+# ou "tcp://host:porta" para impressoras de rede. Vazio = sem impressora
+DESTINO_IMPRESSORA = os.environ.get("PDV_IMPRESSORA", "")
+
+# Cupons ainda não impressos, um arquivo por trabalho
+PASTA_FILA = "database/impressao"
+EXTENSAO = ".escpos"
+# Trabalhos que falharam com um erro que não se resolve tentando de novo
+EXTENSAO_FALHA = ".falhou"
+
+# Colunas da fonte padrão (A) em bobina de 80 mm
+LARGURA = 48
+
+# Valores em centavos
+ItemCupom = namedtuple("ItemCupom", "nome quantidade preco_unitario subtotal")
+Cupom = namedtuple("Cupom", "venda_id data itens total cliente", defaults=(None,))
+
+# Comandos ESC/POS
+ESC, GS = b"\x1b", b"\x1d"
+INICIALIZAR = ESC + b"@"
+PAGINA_PC850 = ESC + b"t\x02"      # tabela de caracteres com acentos
+ALINHAR_ESQUERDA = ESC + b"a\x00"
+ALINHAR_CENTRO = ESC + b"a\x01"
+NEGRITO = ESC + b"E\x01"
+SEM_NEGRITO = ESC + b"E\x00"
+FONTE_DUPLA = GS + b"!\x11"        # altura e largura em dobro
+FONTE_NORMAL = GS + b"!\x00"
+CORTAR = GS + b"V\x42\x03"         # avança 3 linhas e corta (parcial)
+
+
+def _texto(texto):
+    return texto.encode("cp850", errors="replace") + b"\n"
+
+
+def _colunas(esquerda, direita, largura=LARGURA):
+    """Texto à esquerda e valor alinhado à direita na mesma linha"""
+    espaco = largura - len(direita) - 1
+    return f"{esquerda[:espaco]:<{espaco}} {direita}"
+
+
+def renderizar_cupom(cupom, largura=LARGURA, cabecalho="PDV"):
+    """Gera os bytes ESC/POS do cupom de uma venda"""
+    partes = [INICIALIZAR, PAGINA_PC850, ALINHAR_CENTRO, NEGRITO, FONTE_DUPLA,
+              _texto(cabecalho), FONTE_NORMAL, SEM_NEGRITO,
+              _texto("CUPOM NÃO FISCAL"), ALINHAR_ESQUERDA,
+              _texto(f"Venda {cupom.venda_id}  {cupom.data}")]
+    if cupom.cliente:
+        partes.append(_texto(f"Cliente: {cupom.cliente}"))
+    partes.append(_texto("-" * largura))
+    for item in cupom.itens:
+        partes.append(_texto(item.nome[:largura]))
+        partes.append(_texto(_colunas(
+            f"  {item.quantidade} x {formatar_moeda(item.preco_unitario, False)}",
+            formatar_moeda(item.subtotal, False), largura)))
+    partes += [_texto("-" * largura), NEGRITO,
+               _texto(_colunas("TOTAL R$", formatar_moeda(cupom.total, False), largura)), SEM_NEGRITO,
+               ALINHAR_CENTRO, _texto("Obrigado pela preferência!"), CORTAR]
+    return b"".join(partes)
+
+
+class ImpressoraArquivo:
+    """Impressora ligada a um arquivo de dispositivo (/dev/usb/lp0, LPT1...).
+
+    Apontada para um arquivo comum, acumula os cupons nele: serve de
+    impressora de teste.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+
+    def enviar(self, dados):
+        with open(self.caminho, "ab") as saida:
+            saida.write(dados)
+            saida.flush()
+
+
+class ImpressoraRede:
+    """Impressora de rede (porta RAW, normalmente 9100)"""
+
+    def __init__(self, host, porta=9100, timeout=10.0):
+        self.host = host
+        self.porta = porta
+        self.timeout = timeout
+
+    def enviar(self, dados):
+        with socket.create_connection((self.host, self.porta), timeout=self.timeout) as conexao:
+            conexao.sendall(dados)
+
+
+class ImpressoraSimulada(ImpressoraArquivo):
+    """Impressora de arquivo com a lentidão e as falhas de uma térmica real.
+
+    Cada cupom leva ``segundos_por_cupom``; as ``falhas`` primeiras
+    tentativas levantam OSError (papel acabou, cabo solto). Usada nos
+    testes e no benchmark.
+    """
+
+    def __init__(self, caminho, segundos_por_cupom=0.0, falhas=0):
+        super().__init__(caminho)
+        self.segundos_por_cupom = segundos_por_cupom
+        self.falhas = falhas
+        self.tentativas = 0
+
+    def enviar(self, dados):
+        self.tentativas += 1
+        if self.falhas > 0:
+            self.falhas -= 1
+            raise OSError("Impressora sem resposta")
+        time.sleep(self.segundos_por_cupom)
+        super().enviar(dados)
+
+
+def abrir_impressora(destino):
+    """Cria a impressora de um destino 'tcp://host:porta' ou caminho de arquivo"""
+    if destino.startswith("tcp://"):
+        host, _, porta = destino[len("tcp://"):].partition(":")
+        return ImpressoraRede(host, int(porta or 9100))
+    return ImpressoraArquivo(destino)
+
+
+class FilaImpressao:
+    """Fila de impressão atendida por uma thread própria.
+
+    ``enfileirar()`` grava o cupom já renderizado na pasta da fila (arquivo
+    temporário + os.replace, então nunca fica um trabalho pela metade) e
+    retorna sem esperar a impressora. A thread envia os trabalhos em ordem;
+    em caso de erro tenta de novo o mesmo trabalho, com espera crescente
+    até ``espera_maxima``, sem nunca descartá-lo. O arquivo só é apagado
+    depois de impresso: ao abrir o programa de novo, ``iniciar()`` recoloca
+    na fila o que tinha ficado pendente.
+
+    Só OSError (impressora desligada, sem papel, rede) é tentado de novo.
+    Qualquer outro erro do trabalho é permanente: o arquivo é renomeado
+    para ``EXTENSAO_FALHA`` (fica na pasta para análise) e a fila segue com
+    os próximos cupons.
+    """
+
+    def __init__(self, impressora, pasta=PASTA_FILA, espera_inicial=0.5, espera_maxima=30.0):
+        self.impressora = impressora
+        self.pasta = pasta
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self._fila = queue.Queue()
+        self._parar = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._sequencia = 0
+        self.impressos = 0
+        self.falhas = 0
+        self.descartados = 0
+        self.ultimo_erro = None
+        os.makedirs(pasta, exist_ok=True)
+
+    def _pendentes_em_disco(self):
+        nomes = sorted(nome for nome in os.listdir(self.pasta) if nome.endswith(EXTENSAO))
+        return [os.path.join(self.pasta, nome) for nome in nomes]
+
+    def iniciar(self):
+        """Recoloca na fila os trabalhos pendentes e inicia a thread"""
+        if self._thread is not None:
+            return self
+        for caminho in self._pendentes_em_disco():
+            self._fila.put(caminho)
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="fila-impressao", daemon=True)
+        self._thread.start()
+        return self
+
+    def enfileirar(self, cupom):
+        """Grava o trabalho (Cupom ou bytes ESC/POS) e retorna seu caminho"""
+        dados = cupom if isinstance(cupom, bytes) else renderizar_cupom(cupom)
+        with self._lock:
+            self._sequencia += 1
+            # Nome ordenável: momento + sequência, para manter a ordem entre reinícios
+            nome = f"{time.time_ns():020d}-{self._sequencia:06d}{EXTENSAO}"
+        caminho = os.path.join(self.pasta, nome)
+        temporario = caminho + ".tmp"
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(dados)
+        os.replace(temporario, caminho)
+        self._fila.put(caminho)
+        return caminho
+
+    def _loop(self):
+        while not self._parar.is_set():
+            try:
+                caminho = self._fila.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            try:
+                self._imprimir(caminho)
+            except Exception as e:
+                self._descartar(caminho, e)
+
+    def _imprimir(self, caminho):
+        try:
+            with open(caminho, "rb") as arquivo:
+                dados = arquivo.read()
+        except FileNotFoundError:
+            return  # já impresso (recolocado duas vezes)
+        espera = self.espera_inicial
+        while not self._parar.is_set():
+            try:
+                self.impressora.enviar(dados)
+            except OSError as e:
+                self.falhas += 1
+                self.ultimo_erro = e
+                self._parar.wait(espera)
+                espera = min(espera * 2, self.espera_maxima)
+                continue
+            os.remove(caminho)
+            self.impressos += 1
+            self.ultimo_erro = None
+            return
+
+    def _descartar(self, caminho, erro):
+        """Tira da fila um trabalho com erro permanente, sem apagá-lo"""
+        self.descartados += 1
+        self.ultimo_erro = erro
+        print(f"Cupom {os.path.basename(caminho)} não impresso: {erro!r}")
+        try:
+            os.replace(caminho, caminho[:-len(EXTENSAO)] + EXTENSAO_FALHA)
+        except OSError:
+            pass
+
+    def pendentes(self):
+        """Número de trabalhos ainda não impressos"""
+        return len(self._pendentes_em_disco())
+
+    def aguardar(self, timeout=None):
+        """Espera a fila esvaziar; retorna False se o tempo acabar antes"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self.pendentes():
+            if limite is not None and time.monotonic() > limite:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def parar(self, timeout=2.0):
+        """Para a thread; o que não foi impresso continua na pasta da fila"""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_fila = None
+_fila_lock = threading.Lock()
+
+
+def obter_fila():
+    """Fila de impressão da aplicação, ou None se não houver impressora (PDV_IMPRESSORA)"""
+    global _fila
+    if not DESTINO_IMPRESSORA:
+        return None
+    with _fila_lock:
+        if _fila is None:
+            _fila = FilaImpressao(abrir_impressora(DESTINO_IMPRESSORA)).iniciar()
+    return _fila